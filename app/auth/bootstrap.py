@@ -17,6 +17,7 @@ from typing import Iterable, List, Optional
 from fastlite import NotFoundError
 
 from auth.roles import ADMIN, APPLICANT, normalize_role
+from auth.user_cache import user_cache
 from auth.utils import get_password_hash
 
 
@@ -85,6 +86,7 @@ def ensure_default_users(db) -> None:
 
             if updates:
                 users_table.update(updates, pk_values=email)
+                user_cache.invalidate(email)
                 print(
                     f"--- Default user bootstrap: updated existing user '{email}' ({', '.join(updates.keys())}) ---"
                 )
@@ -109,6 +111,7 @@ def ensure_default_users(db) -> None:
                 "national_id_number": national_id,
             }
             users_table.insert(new_user, pk="email")
+            user_cache.invalidate(email)
             print(
                 f"--- Default user bootstrap: created user '{email}' with role '{role}' ---"
             )
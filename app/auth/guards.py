@@ -5,29 +5,26 @@ import inspect
 from functools import wraps
 from typing import Any, Awaitable, Callable, Iterable, Tuple
 
-from fastlite import NotFoundError
 from starlette.requests import Request
 from starlette.responses import RedirectResponse, Response
 
 from auth.roles import ADMIN, ALL_ROLES, allowed_roles, describe_roles, normalize_role
+from utils.identity_map import identity_map
 
 GuardedHandler = Callable[..., Awaitable[Any] | Any]
 
 
 def get_current_user(request: Request) -> dict[str, Any] | None:
-    """Retrieve the current user record using the request-bound database."""
+    """Retrieve the current user record through the request's identity map."""
     email = request.session.get("user_email")
     if not email:
         return None
 
-    db = getattr(request.state, "db", None)
+    db = getattr(request.state, "read_db", None) or getattr(request.state, "db", None)
     if db is None:
         return None
 
-    try:
-        return db.t.users[email]
-    except NotFoundError:
-        return None
+    return identity_map(request, db).user(email)
 
 
 def require_role(*roles: str) -> Callable[[GuardedHandler], GuardedHandler]:
@@ -5,66 +5,125 @@ from __future__ import annotations
 import base64
 import json
 import os
+import re
 from binascii import Error as BinasciiError
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional, Pattern
 
 from itsdangerous import BadSignature, Signer
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.requests import Request
-from starlette.responses import RedirectResponse, Response
-from starlette.types import ASGIApp
+from starlette.requests import HTTPConnection
+from starlette.responses import RedirectResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from auth.user_cache import UserCache, user_cache as shared_user_cache
+from utils.identity_map import IdentityMap
+from utils.log import debug
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    """Ensure requests are authenticated while supporting legacy session cookies."""
 
-    def __init__(self, app: ASGIApp, db, session_secret: Optional[str] = None):
-        super().__init__(app)
+def compile_public_paths(prefixes: Iterable[str], exact_paths: Iterable[str]) -> Pattern:
+    """One regex matching any path under ``prefixes`` or equal to one of ``exact_paths``."""
+    alternatives = [re.escape(p) for p in prefixes] + [re.escape(p) + r"\Z" for p in exact_paths]
+    return re.compile("|".join(alternatives))
+
+
+class AuthMiddleware:
+    """Ensure requests are authenticated while supporting legacy session cookies.
+
+    A plain ASGI middleware: the response, streamed or not, goes straight to the
+    server. Only ``http.response.start`` is looked at, to return the request's
+    read connection to the pool as soon as the handler has produced its response.
+    """
+
+    def __init__(self, app: ASGIApp, db, session_secret: Optional[str] = None, pool=None,
+                 user_cache: Optional[UserCache] = None):
+        self.app = app
         # All Smart-ID routes are public
         self.public_prefixes = ["/static/", "/auth/smart-id/"]
         self.public_exact_paths = ["/", "/logout", "/favicon.ico", "/test"]
+        self._public = compile_public_paths(self.public_prefixes, self.public_exact_paths)
         self.db = db
+        self.pool = pool  # Optional utils.db_pool.ConnectionPool for read-only connections
+        self.user_cache = user_cache or shared_user_cache  # Users and roles for the guards, without a query per request
         self.session_secret = session_secret or os.environ.get("SESSION_SECRET_KEY")
+        self._signer = Signer(self.session_secret) if self.session_secret else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        state = scope.setdefault("state", {})
+        state["db"] = self.db  # Attach db (the writer) to all requests
+        if path.startswith("/static/"):
+            await self.app(scope, receive, send)
+            return
+        if self.pool is None:
+            await self._dispatch_with_identities(scope, receive, send, path, self.db)
+            return
+
+        state["pool"] = self.pool
+        reader = self.pool.checkout()
+        state["read_db"] = reader or self.db  # Writer doubles as reader when the pool is exhausted
+        checked_in = False
+
+        def checkin() -> None:
+            nonlocal checked_in
+            if not checked_in:
+                checked_in = True
+                self.pool.checkin(reader)
+
+        async def send_and_checkin(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                checkin()  # The body may stream for a long time; it does not need the reader
+            await send(message)
+
+        try:
+            await self._dispatch_with_identities(scope, receive, send_and_checkin, path, state["read_db"])
+        finally:
+            checkin()
+
+    async def _dispatch_with_identities(self, scope: Scope, receive: Receive, send: Send, path: str, db) -> None:
+        # One load per row per request for the user, profile and qualifications (utils.identity_map)
+        identities = scope["state"]["identity_map"] = IdentityMap(db, self.user_cache)
+        try:
+            await self._dispatch(scope, receive, send, path)
+        finally:
+            identities.record()
+            if identities.hits:
+                debug(f"IdentityMap {path}: {identities.loads} loads, {identities.hits} queries saved")
 
-    async def dispatch(
-        self,
-        request: Request,
-        call_next: RequestResponseEndpoint,
-    ) -> Response:
-        path = request.url.path
-        request.state.db = self.db  # Attach db to all requests
+    async def _dispatch(self, scope: Scope, receive: Receive, send: Send, path: str) -> None:
         # Allow public paths to proceed without any auth checks.
-        if any(path.startswith(prefix) for prefix in self.public_prefixes) or path in self.public_exact_paths:
-            return await call_next(request)
+        if self._public.match(path):
+            await self.app(scope, receive, send)
+            return
 
         # For all other non-public paths, check for an authenticated session.
-        if not request.session.get("authenticated"):
-            legacy_session = self._load_legacy_session(request)
+        session = scope.setdefault("session", {})
+        if not session.get("authenticated"):
+            legacy_session = self._load_legacy_session(HTTPConnection(scope))
             if legacy_session:
-                session_store = request.scope.setdefault("session", {})
-                session_store.update(legacy_session)
-                for key, value in legacy_session.items():
-                    request.session[key] = value
-                request.state.legacy_session = legacy_session
+                session.update(legacy_session)
+                scope["state"]["legacy_session"] = legacy_session
 
-        if not request.session.get("authenticated"):
+        if not session.get("authenticated"):
             # If not authenticated, redirect to the main landing page to log in.
-            return RedirectResponse(url="/", status_code=303)
+            await RedirectResponse(url="/", status_code=303)(scope, receive, send)
+            return
 
         # If the user is authenticated, let the request proceed.
         # The route-specific `guard_request` function will now handle authorization (role checks).
-        return await call_next(request)
+        await self.app(scope, receive, send)
 
-    def _load_legacy_session(self, request: Request) -> Optional[Dict[str, Any]]:
+    def _load_legacy_session(self, conn: HTTPConnection) -> Optional[Dict[str, Any]]:
         """Attempt to decode legacy signer-based session cookies."""
 
-        raw_cookie = request.cookies.get("session")
-        if not raw_cookie or not self.session_secret:
+        raw_cookie = conn.cookies.get("session")
+        if not raw_cookie or self._signer is None:
             return None
 
-        signer = Signer(self.session_secret)
         try:
-            unsigned = signer.unsign(raw_cookie)
+            unsigned = self._signer.unsign(raw_cookie)
             decoded = base64.b64decode(unsigned)
             payload = json.loads(decoded.decode("utf-8"))
         except (BadSignature, BinasciiError, UnicodeDecodeError, json.JSONDecodeError, ValueError):
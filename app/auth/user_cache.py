@@ -0,0 +1,84 @@
+"""Process-wide TTL cache of user rows for authentication and authorization.
+
+``AuthMiddleware`` hands ``user_cache`` to each request's identity map, so the
+guard's role check, the navbar and the controllers read the user row from
+memory; an htmx poll or autosave by a known user costs no query to authorize.
+
+Code that changes a user's row in this process calls ``invalidate(email)``
+(role changes in the admin dashboard, Smart-ID login, default-user bootstrap).
+Writes from another process, e.g. ``promote_user.py`` against a running server,
+are picked up when the entry expires after ``USER_CACHE_TTL`` seconds.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastlite import NotFoundError
+
+DEFAULT_TTL = float(os.environ.get("USER_CACHE_TTL", 60))
+DEFAULT_MAX_ENTRIES = 2048
+
+
+class UserCache:
+    """Bounded LRU of ``email -> user`` whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0 # Bumped by invalidate: a load that raced with it is not cached
+        self._metrics = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, db, email: str) -> Optional[dict]:
+        """The user row for ``email`` (a copy callers may change), loading it from ``db`` on a miss."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(email)
+                self._metrics["hits"] += 1
+                return dict(entry[0])
+            self._metrics["expired" if entry else "misses"] += 1
+            self._entries.pop(email, None)
+            generation = self._generation
+        try:
+            user = db.t.users[email]
+        except NotFoundError:
+            return None # Not cached: a user created by the next login must be seen at once
+        with self._lock:
+            if generation == self._generation:
+                self._store(email, user, now)
+        return dict(user)
+
+    def _store(self, email: str, user: dict, loaded_at: float) -> None: # Holding _lock
+        self._entries[email] = (dict(user), loaded_at + self.ttl)
+        self._entries.move_to_end(email)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._metrics["evictions"] += 1
+
+    def invalidate(self, email: Optional[str] = None) -> None:
+        """Drops ``email``'s entry, or every entry when None."""
+        with self._lock:
+            self._generation += 1
+            self._metrics["invalidations"] += 1
+            if email is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(email, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._metrics["hits"] + self._metrics["misses"] + self._metrics["expired"]
+            return {**self._metrics, "entries": len(self._entries), "ttl": self.ttl,
+                    "hit_rate": round(self._metrics["hits"] / lookups, 3) if lookups else None}
+
+
+user_cache = UserCache()
@@ -7,6 +7,7 @@ from .utils import get_badge_counts
 from monsterui.all import *
 from fastlite import NotFoundError
 from typing import Optional, Tuple
+from utils.identity_map import IdentityMap
 
 def format_estonian_date(iso_date_str: Optional[str]) -> str:
     """Converts 'YYYY-MM-DD' to 'DD.MM.YYYY'. Returns a fallback on error."""
@@ -26,21 +27,23 @@ class ApplicantController:
         self.users_table = db.t.users
         self.qualifications_table = db.t.applied_qualifications
 
-    def _get_applicant_data(self, user_email: str) -> Tuple[dict, str]:
+    def _get_applicant_data(self, user_email: str, identities: Optional[IdentityMap] = None) -> Tuple[dict, str]:
         """
         Internal helper to fetch data for the applicant dashboard.
         Returns a tuple of (data_dict, applicant_name).
+        Rows come from the request's identity map when one is passed.
         """
+        identities = identities or IdentityMap(self.db)
         applicant_name = "Taotleja andmed"
         db_data = {}
         try:
-            user_data = self.users_table[user_email]
+            user_data = identities.user(user_email)
+            if user_data is None: raise NotFoundError(user_email)
             applicant_name = user_data.get('full_name') or applicant_name
             db_data["E-post"] = user_email
             db_data["Sünniaeg"] = format_estonian_date(user_data.get('birthday'))
             db_data["Kehtivad kutsetunnistused"] = "Andmed puuduvad"
-            all_quals = self.qualifications_table(order_by='id')
-            user_quals = [q for q in all_quals if q.get('user_email') == user_email]
+            user_quals = identities.qualifications(user_email)
             db_data["Taotluse seisund"] = "Koostamisel" if user_quals else "Alustamata"
         except NotFoundError:
             print(f"--- WARN [ApplicantController]: User not found for email: {user_email} ---")
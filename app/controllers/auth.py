@@ -2,6 +2,7 @@
 
 # Ensure necessary imports are present
 import os
+import asyncio
 from fasthtml.common import *
 from starlette.requests import Request
 from starlette.responses import RedirectResponse, Response
@@ -9,25 +10,36 @@ from fastlite import NotFoundError
 from monsterui.all import *
 from auth.roles import APPLICANT, EVALUATOR, ADMIN, normalize_role
 from auth.utils import get_password_hash, verify_password
+from auth.user_cache import user_cache
 import traceback
 from typing import Any, Dict, Optional
 import hashlib, base64
 from services import smart_id_service
-from services import smart_id_service
+from services.smart_id_watcher import SessionWatcher, WatcherBusy
+from services.application_index import ApplicationIndex
+from database import transaction
+from utils.write_queue import run_write
 from auth.utils import calculate_verification_code, get_birthdate_from_national_id
 from utils.log import log, debug, error
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
 from cryptography.x509.oid import NameOID
 
+SSE_KEEPALIVE = 15 # Seconds between comment lines that keep idle proxies from closing the stream
+STATUS_WAIT = 15 # How long a status request waits on the watcher before answering RUNNING
+
 class AuthController:
     """ Handles user authentication (login, registration, logout). """
 
-    def __init__(self, db):
+    def __init__(self, db, watcher: Optional[SessionWatcher] = None, index: Optional[ApplicationIndex] = None,
+                 write_queue=None):
         self.db = db
         self.users = db.t.users
+        self.index = index or ApplicationIndex(db)
+        self.watcher = watcher or SessionWatcher()
+        self.write_queue = write_queue
 
-    def get_login_form(self) -> FT:
+    def get_login_form(self, error: str = "") -> FT:
         """Returns the new Smart-ID login form."""
         return Div(
             Form(
@@ -40,7 +52,7 @@ class AuthController:
                     placeholder="40404040009", # See docs/smart_id_testing.md for more demo IDs
                     required=True,
                 ),
-                Span(id="sid-error", cls="text-red-500"),
+                Span(error, id="sid-error", cls="text-red-500"),
                 Button("Logi sisse", type="submit", cls="w-full"),
                 hx_post="/auth/smart-id/initiate",
                 hx_target="#smart-id-login-flow",
@@ -52,6 +64,7 @@ class AuthController:
 
     async def initiate_smart_id(self, national_id: str) -> FT:
         if not national_id: return self.get_login_form("Isikukood on vajalik.")
+        if self.watcher.full(): return self.get_login_form("Liiga palju samaaegseid sisselogimisi. Proovi hetke pärast uuesti.")
         
         digest = hashlib.sha256(os.urandom(32)).digest()
         encoded = base64.b64encode(digest).decode('utf-8')
@@ -59,18 +72,43 @@ class AuthController:
         sess = await smart_id_service.initiate_authentication(national_id, encoded)
         if not sess or "sessionID" not in sess: return self.get_login_form("Sessiooni alustamine ebaõnnestus.")
         
+        try: self.watcher.watch(sess["sessionID"]) # Start polling before the browser connects
+        except WatcherBusy: pass # The stream's status request reports it
+
         code = calculate_verification_code(digest)
         return Div(
             H3(f"Kontrollkood: {code}", cls="text-center font-bold text-2xl tracking-wider"),
             P("Sisesta PIN1 oma Smart-ID rakenduses.", cls="text-center"),
-            Div(cls="loading loading-lg mx-auto block"),
-            hx_get=f"/auth/smart-id/status/{sess['sessionID']}",
-            hx_trigger="load delay:3s", hx_swap="innerHTML",
+            self._status_listener(sess["sessionID"]),
             id="smart-id-login-flow", cls="space-y-4"
         )
 
+    @staticmethod
+    def _status_listener(session_id: str) -> FT:
+        """Spinner that listens on the session's event stream and fetches the outcome once it is done."""
+        return Div(
+            Div(cls="loading loading-lg mx-auto block"),
+            hx_ext="sse", sse_connect=f"/auth/smart-id/events/{session_id}",
+            hx_get=f"/auth/smart-id/status/{session_id}", hx_trigger="sse:done",
+            hx_target="#smart-id-login-flow", hx_swap="innerHTML"
+        )
+
+    async def stream_smart_id_status(self, session_id: str):
+        """SSE stream that sends one ``done`` event when the session's watcher has the final state."""
+        async def events():
+            try: task = self.watcher.watch(session_id)
+            except WatcherBusy: task = None # ``done`` at once; the status request shows the error
+            while task is not None and not task.done():
+                await asyncio.wait({task}, timeout=SSE_KEEPALIVE)
+                if not task.done(): yield ": keep-alive\n\n"
+            status = task.result() if task is not None and not task.cancelled() else None
+            state = (status or {}).get("state")
+            yield sse_message(state or "ERROR", event="done") # An event without data is never dispatched
+        return EventStream(events())
+
     async def check_smart_id_status(self, req: Request, session_id: str) -> FT:
-        status = await smart_id_service.check_session_status(session_id)
+        try: status = await self.watcher.status(session_id, wait=STATUS_WAIT)
+        except WatcherBusy: status = None
         if not status: 
             return Div(
                 P("Kontroll ebaõnnestus.", cls="text-red-500 text-center"), 
@@ -83,9 +121,7 @@ class AuthController:
             return Div(
                 H3("Kontrollkood: ...", cls="text-center font-bold text-2xl tracking-wider"),
                 P("Ootan PIN1...", cls="text-center"),
-                Div(cls="loading loading-lg mx-auto block"),
-                hx_get=f"/auth/smart-id/status/{session_id}",
-                hx_trigger="load delay:3s", hx_swap="innerHTML",
+                self._status_listener(session_id),
                 id="smart-id-login-flow", cls="space-y-4"
             )
         elif state == "COMPLETE": 
@@ -168,6 +204,15 @@ class AuthController:
             return serial.split("-", 1)[-1]
         return serial or None
 
+    def _update_user(self, user_data: dict, name_changed: bool):
+        with transaction(self.db):
+            self.users.update(user_data)
+            if name_changed: self.index.refresh_user(user_data['email'])
+
+    def _insert_user(self, new_user: dict):
+        with transaction(self.db):
+            self.users.insert(new_user, pk='email')
+
     async def process_smart_id_login(self, request: Request, status_data: dict):
         """
         Processes a successful Smart-ID login, finds or creates a user, and sets the session.
@@ -216,6 +261,7 @@ class AuthController:
                 user_records = self.users("national_id_number = ?", [national_id])
                 if not user_records: raise NotFoundError
                 user_data = user_records[0]
+                previous_name = user_data.get('full_name')
                 print(f"--- DEBUG [AuthController]: Found existing user by national ID: {user_data['email']} ---")
                 
                 # Sync Role
@@ -251,7 +297,8 @@ class AuthController:
                     print(f"--- DEBUG [AuthController]: Updating birthday for {national_id} to {birth_date} ---")
                     user_data['birthday'] = birth_date
                 
-                self.users.update(user_data)
+                await run_write(self.write_queue, self._update_user, user_data, user_data.get('full_name') != previous_name)
+                user_cache.invalidate(user_data['email']) # The role may have changed
 
             except NotFoundError:
                 print(f"--- DEBUG [AuthController]: User with national ID {national_id} not found. Creating new user. ---")
@@ -266,7 +313,8 @@ class AuthController:
                     "email": email, "hashed_password": "", "full_name": full_name,
                     "birthday": birth_date, "role": initial_role, "national_id_number": national_id
                 }
-                self.users.insert(new_user, pk='email')
+                await run_write(self.write_queue, self._insert_user, new_user)
+                user_cache.invalidate(email)
                 user_data = new_user
 
             request.session['authenticated'] = True
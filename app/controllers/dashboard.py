@@ -2,16 +2,22 @@
 from fasthtml.common import *
 from starlette.requests import Request
 from starlette.responses import RedirectResponse
-from auth.roles import is_admin, is_evaluator, normalize_role
+from auth.roles import ADMIN, APPLICANT, EVALUATOR, is_admin, is_evaluator, normalize_role
+from auth.user_cache import user_cache
 from ui.layouts import dashboard_layout
 from .applicant import ApplicantController 
 from .evaluator import EvaluatorController 
 from datetime import datetime
+from database import transaction
+from utils.write_queue import run_write
+from utils.identity_map import identity_map
 from ui.dashboard_page import render_applicant_dashboard, render_evaluator_dashboard, render_admin_dashboard
 
 class DashboardController:
-    def __init__(self, db, applicant_controller: ApplicantController, evaluator_controller: EvaluatorController):
+    def __init__(self, db, applicant_controller: ApplicantController, evaluator_controller: EvaluatorController,
+                 write_queue=None):
         self.db = db
+        self.write_queue = write_queue
         # --- THE FIX: Receive controllers instead of creating them ---
         self.applicant_controller = applicant_controller
         self.evaluator_controller = evaluator_controller
@@ -37,14 +43,13 @@ class DashboardController:
 
         elif is_evaluator(user_role):
             # Evaluator View (Dashboard accessible via /dashboard or link)
-            evaluator_apps = self.evaluator_controller.search_controller._get_flattened_applications()
-            evaluator_data = {"applications_to_review": len(evaluator_apps)}
+            evaluator_data = {"applications_to_review": self.evaluator_controller.search_controller.index.count()}
             content = render_evaluator_dashboard(evaluator_data, current_user.get("full_name", user_email))
             title = "Hindaja Töölaud"
 
         else: # Default to applicant view
             # For applicants, fetch their application status
-            applicant_data, applicant_name = self.applicant_controller._get_applicant_data(user_email)
+            applicant_data, applicant_name = self.applicant_controller._get_applicant_data(user_email, identity_map(request, self.db))
             content = render_applicant_dashboard(applicant_data, applicant_name)
             title = "Minu töölaud | Ehitamise kutsed"
 
@@ -52,45 +57,58 @@ class DashboardController:
         
         return dashboard_layout(request=request, title=title, content=content, db=self.db)
     
+    def _forget_user(self, req: Request, id_code: str):
+        """Drops cached copies of the user with id_code once their role change is committed."""
+        for u in self.db.t.users("national_id_number = ?", [id_code]):
+            user_cache.invalidate(u['email'])
+            identity_map(req).forget("users", u['email'])
+
     async def add_evaluator(self, req: Request):
         form = await req.form()
         id_code = form.get("national_id_number")
         if id_code:
             try:
-                self.db.t.allowed_evaluators.insert({
-                    "national_id_number": id_code,
-                    "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "added_by": req.state.current_user.get("email")
-                })
-                # Check if this user exists and promote them immediately if not admin
-                try:
-                    user_records = self.db.t.users("national_id_number = ?", [id_code])
-                    if user_records:
-                        u = user_records[0]
-                        if normalize_role(u['role']) != ADMIN:
-                            u['role'] = EVALUATOR
-                            self.db.t.users.update(u)
-                except Exception as e:
-                    print(f"Error promoting existing user: {e}")
+                await run_write(self.write_queue, self._add_evaluator, id_code, req.state.current_user.get("email"))
+                self._forget_user(req, id_code)
 
             except Exception as e:
                 print(f"Error adding evaluator: {e}")
         
         return self.show_dashboard(req)
 
-    def delete_evaluator(self, req: Request, id_code: str):
-        try:
-            self.db.t.allowed_evaluators.delete(id_code)
-            # Check if this user exists and demote them immediately if not admin
+    def _add_evaluator(self, id_code: str, added_by: str):
+        with transaction(self.db):
+            self.db.t.allowed_evaluators.insert({
+                "national_id_number": id_code,
+                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "added_by": added_by
+            })
+            # Check if this user exists and promote them immediately if not admin
             try:
                 user_records = self.db.t.users("national_id_number = ?", [id_code])
                 if user_records:
                     u = user_records[0]
-                    if normalize_role(u['role']) == EVALUATOR: # Only demote if they are just Evaluator
-                        u['role'] = APPLICANT
+                    if normalize_role(u['role']) != ADMIN:
+                        u['role'] = EVALUATOR
                         self.db.t.users.update(u)
             except Exception as e:
-                print(f"Error demoting existing user: {e}")
+                print(f"Error promoting existing user: {e}")
+
+    def delete_evaluator(self, req: Request, id_code: str):
+        try:
+            with transaction(self.db):
+                self.db.t.allowed_evaluators.delete(id_code)
+                # Check if this user exists and demote them immediately if not admin
+                try:
+                    user_records = self.db.t.users("national_id_number = ?", [id_code])
+                    if user_records:
+                        u = user_records[0]
+                        if normalize_role(u['role']) == EVALUATOR: # Only demote if they are just Evaluator
+                            u['role'] = APPLICANT
+                            self.db.t.users.update(u)
+                except Exception as e:
+                    print(f"Error demoting existing user: {e}")
+            self._forget_user(req, id_code)
 
         except Exception as e:
             print(f"Error deleting evaluator: {e}")
@@ -6,45 +6,21 @@ from ui.layouts import app_layout
 from ui.nav_components import tab_nav
 from .utils import get_badge_counts
 from ui.documents_page import render_documents_page
-from google.cloud import storage
-from google.oauth2 import service_account
 from werkzeug.utils import secure_filename
 from utils.log import log, error, debug
-from pathlib import Path
-import os, uuid, json, datetime
-
-GCS_BUCKET = os.environ.get("GCS_BUCKET_NAME", "your-gcs-bucket-name-here")
-ALLOW_LOCAL = os.environ.get("ALLOW_LOCAL_STORAGE_FALLBACK", "").lower() in {"1", "true", "yes"}
+from utils.write_queue import run_write
+from database import transaction
+from services.storage import run_storage
+from utils.streaming_upload import UploadError, UploadTooLarge, receive_upload
+import uuid, json, datetime, functools
 
 class DocumentsController:
-    def __init__(self, db):
+    def __init__(self, db, write_queue=None, storage=None, backend=None):
         self.db, self.tbl = db, db.t.documents
+        self.write_queue = write_queue
+        self.storage = storage # services.storage.StorageService: GCS and disk I/O off the event loop
+        self.backend = backend # services.file_storage.StorageBackend, None when no storage is configured
         self.documents_table = self.tbl # Alias for main.py compatibility
-        self.bucket, self.local_dir = self._setup_storage()
-        self.local_storage_dir = self.local_dir # Alias for main.py compatibility
-
-    def _setup_storage(self):
-        try:
-            if not GCS_BUCKET or "name-here" in GCS_BUCKET: raise ValueError("GCS Bucket not config")
-            
-            creds = None
-            if raw := os.environ.get("GCS_SA_JSON"):
-                info = json.loads(raw)
-                creds = service_account.Credentials.from_service_account_info(info)
-            
-            client = storage.Client(credentials=creds, project=creds.project_id if creds else None)
-            bucket = client.bucket(GCS_BUCKET)
-            debug(f"GCS connected: {GCS_BUCKET}")
-            return bucket, None
-        except Exception as e:
-            error(f"GCS init failed: {e}")
-            if ALLOW_LOCAL:
-                ldir = Path(__file__).parents[2] / "Uploads"
-                ldir.mkdir(parents=True, exist_ok=True)
-                debug(f"Using local storage: {ldir}")
-                return None, ldir
-            error("Cloud storage required & local disabled")
-            return None, None
 
     def show_documents_tab(self, req: Request):
         uid = req.session.get("user_email")
@@ -62,29 +38,24 @@ class DocumentsController:
     async def upload_document(self, req: Request, dtype: str):
         uid = req.session.get("user_email")
         if not uid: return Response("Autentimisviga", 403)
-        if not self.bucket and not self.local_dir: return Response("Salvestusruumi viga", 503)
+        if not self.backend: return Response("Salvestusruumi viga", 503)
 
         try:
-            form = await req.form()
-            f = form.get("document_file")
+            # The file is streamed to storage while the body is read; form fields come along
+            try:
+                form = await receive_upload(req, self.backend.opener("document_file", uid, "documents"), max_files=1,
+                                            run=functools.partial(run_storage, self.storage, "upload"))
+            except UploadTooLarge:
+                return Response("Fail liiga suur (>10MB)", 413)
+            except UploadError as e:
+                error(f"Upload rejected {uid}: {e}")
+                return Response("Üleslaadimine ebaõnnestus", 400)
             desc = form.get("description", "")
-            
-            if not f or not f.filename: return Response("Fail puudub", 400)
-            
-            fname = secure_filename(f.filename) or f"file_{uuid.uuid4().hex}"
-            ext = Path(fname).suffix
-            content = await f.read()
-            sid = ""
 
-            if self.bucket:
-                sid = f"{uid}/{uuid.uuid4()}{ext}"
-                self.bucket.blob(sid).upload_from_string(content, content_type=f.content_type)
-            else:
-                uname = secure_filename(uid) or uuid.uuid4().hex
-                path = self.local_dir / uname / f"{uuid.uuid4()}{ext}"
-                path.parent.mkdir(parents=True, exist_ok=True)
-                path.write_bytes(content)
-                sid = f"local:{path.relative_to(self.local_dir)}"
+            if not form.files: return Response("Fail puudub", 400)
+            f = form.files[0]
+            fname = secure_filename(f.filename) or f"file_{uuid.uuid4().hex}"
+            sid = f.storage_identifier
 
             meta = {}
             if dtype == 'education':
@@ -96,11 +67,16 @@ class DocumentsController:
                     # If still empty, use filename (or leave empty to let UI handle it)
                     if not desc: desc = fname
 
-            self.tbl.insert({
-                "user_email": uid, "document_type": dtype, "description": desc,
-                "metadata": json.dumps(meta), "original_filename": fname,
-                "storage_identifier": sid, "upload_timestamp": str(datetime.datetime.now())
-            })
+            try:
+                await run_write(self.write_queue, self.tbl.insert, {
+                    "user_email": uid, "document_type": dtype, "description": desc,
+                    "metadata": json.dumps(meta), "original_filename": fname,
+                    "storage_identifier": sid, "upload_timestamp": str(datetime.datetime.now()),
+                    "file_size": f.size, "sha256": f.sha256
+                })
+            except Exception:
+                await run_storage(self.storage, "discard", form.discard) # No row points at the file
+                raise
             
             return Response(headers={'HX-Redirect': '/app/dokumendid'})
         except Exception as e:
@@ -117,7 +93,7 @@ class DocumentsController:
             if doc.get('user_email') != uid: return Response("Puudub õigus", 403)
             
             # Delete from DB
-            self.tbl.delete(doc_id)
+            with transaction(self.db): self.tbl.delete(doc_id)
             
             # Optional: Delete from storage
             # (Simplification: We keep files for audit or soft-delete in real apps, 
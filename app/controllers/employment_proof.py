@@ -7,15 +7,20 @@ from ui.nav_components import tab_nav
 from ui.employment_proof_form import render_employment_proof_form
 from .utils import get_badge_counts
 from utils.log import log, error
-from pathlib import Path
-import datetime, uuid
-
-UPLOAD_DIR = Path(__file__).parents[2] / 'uploads'
+from utils.write_queue import run_write
+from services.storage import run_storage
+from services.file_storage import legacy_backend, resolve
+from utils.streaming_upload import UploadTooLarge, receive_upload
+import datetime, functools
 
 class EmploymentProofController:
-    def __init__(self, db):
+    def __init__(self, db, write_queue=None, storage=None, backend=None):
         self.db = db
         self.tbl = db.t.employment_proof
+        self.write_queue = write_queue
+        self.storage = storage
+        self.backend = backend or legacy_backend() # Shared with the documents tab; uploads/ when none is configured
+        self.legacy = legacy_backend() # Proofs uploaded before the shared backend
 
     def show_employment_proof_tab(self, req: Request):
         uid = req.session.get("user_email")
@@ -34,28 +39,39 @@ class EmploymentProofController:
         if not uid: return ToastAlert("Autentimine vajalik", alert_type="error")
 
         try:
-            form = await req.form()
-            f = form.get("employment_proof")
-            if not f or not f.filename: return ToastAlert("Fail puudub", alert_type="error")
-            
-            # Relaxed validation for containers
-            # if f.content_type not in ["application/octet-stream", "application/vnd.etsi.asic-e+zip"]: pass 
-
-            content = await f.read()
-            if len(content) > 10*1024*1024: return ToastAlert("Fail liiga suur (>10MB)", alert_type="error")
-
-            UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-            sname = f"{uid}_employment_proof_{f.filename}"
-            (UPLOAD_DIR / sname).write_bytes(content)
-
-            # Upsert
-            self.tbl.insert({
-                "user_email": uid,
-                "file_description": form.get("file_description"),
-                "original_filename": f.filename,
-                "storage_identifier": sname,
-                "upload_timestamp": str(datetime.datetime.now())
-            }, pk='user_email', replace=True)
+            # Relaxed validation for containers (.asice etc.); a new key per upload, so a failed
+            # re-upload never clobbers the proof on record
+            try:
+                form = await receive_upload(req, self.backend.opener("employment_proof", uid, "employment_proof"), max_files=1,
+                                            run=functools.partial(run_storage, self.storage, "upload"))
+            except UploadTooLarge:
+                return ToastAlert("Fail liiga suur (>10MB)", alert_type="error")
+            if not form.files: return ToastAlert("Fail puudub", alert_type="error")
+            f = form.files[0]
+
+            def upsert():
+                previous = self.db.execute("SELECT storage_identifier FROM employment_proof WHERE user_email = ?", (uid,)).fetchone()
+                self.tbl.insert({
+                    "user_email": uid,
+                    "file_description": form.get("file_description"),
+                    "original_filename": f.filename,
+                    "storage_identifier": f.storage_identifier,
+                    "upload_timestamp": str(datetime.datetime.now()),
+                    "file_size": f.size, "sha256": f.sha256
+                }, pk='user_email', replace=True)
+                return previous
+
+            try:
+                previous = await run_write(self.write_queue, upsert)
+            except Exception:
+                await run_storage(self.storage, "discard", form.discard)
+                raise
+            old_backend, old_key = resolve(previous[0], self.backend, self.legacy) if previous and previous[0] else (None, None)
+            if old_key and previous[0] != f.storage_identifier:
+                try:
+                    await run_storage(self.storage, "discard", old_backend.delete, old_key)
+                except Exception as e: # The new proof is saved; the old file is only left behind
+                    error(f"Old emp proof delete failed {uid} ({previous[0]}): {e}")
 
             return Response(headers={'HX-Redirect': '/app/tootamise_toend'})
         except Exception as e:
@@ -6,8 +6,12 @@ import datetime
 import json
 import re
 import traceback
-from logic.helpers import calculate_total_experience_years
 from logic.models import ApplicantData, ComplianceDashboardState
+from services.evaluation_store import EvaluationStore
+from services.state_cache import EvaluationStateCache
+from services.fragment_cache import FragmentCache
+from services.experience_summary import ExperienceSummary
+from services.applicant_data import load_applicant_data
 from ui.evaluator_v2.ev_layout import ev_layout
 from ui.evaluator_v2.left_panel import render_left_panel
 from ui.evaluator_v2.center_panel import render_center_panel
@@ -31,12 +35,17 @@ class EvaluatorController:
         self.qual_table = db.t.applied_qualifications
         self.work_exp_table = db.t.work_experience
         self.evaluations_table = db.t.evaluations
+        self.evaluation_store = EvaluationStore(db)
+        self.experience_summary = ExperienceSummary(db)
         self.search_controller = search_controller
         self.workbench_controller = workbench_controller
         self.validation_engine = validation_engine
+        self.state_cache = EvaluationStateCache(self.evaluation_store, validation_engine)
+        self.fragment_cache = FragmentCache(db)
 
     def show_dashboard_v2(self, request: Request):
-        applications_data = self.search_controller._get_flattened_applications()
+        list_version = self.search_controller.index.version()
+        applications_data, next_cursor = self.search_controller.get_first_page()
         center_panel = Div("Select an application to view details.", cls="p-4 text-center text-gray-500")
         right_panel = Div(cls="p-4")
         selected_qual_id = None
@@ -51,14 +60,16 @@ class EvaluatorController:
                 traceback.print_exc()
                 center_panel = Div("Error loading application.", cls="p-4 text-red-500")
 
-        left_panel_desktop = render_left_panel(applications_data, active_qual_id=selected_qual_id)
+        left_panel_desktop = render_left_panel(applications_data, active_qual_id=selected_qual_id, next_cursor=next_cursor, list_version=list_version)
         
         # Drawer Left: Application List (Light / Darker Dark)
         left_panel_drawer = render_left_panel(
             applications_data, 
             id_suffix="-drawer", 
             active_qual_id=selected_qual_id,
-            bg_class="bg-white dark:bg-gray-950" 
+            bg_class="bg-white dark:bg-gray-950",
+            next_cursor=next_cursor,
+            list_version=list_version
         )
 
         return ev_layout(
@@ -76,18 +87,22 @@ class EvaluatorController:
             # Use fixed separator
             user_email, level, activity = qual_id.split(':::', 2)
 
+            # 0. Unchanged since the panel was last rendered: serve the cached HTML
+            # (the rule set matters for applications without a saved evaluation; the date
+            # because fresh validation and ongoing roles count experience up to today)
+            version = (*self.fragment_cache.version(qual_id), getattr(self.validation_engine, 'rule_set_hash', None),
+                       datetime.date.today().isoformat())
+            cached = self.fragment_cache.get(qual_id, version)
+            if cached is not None:
+                return NotStr(cached), None, None
+
             # 1. Prefer saved evaluation state for persistence
             best_state = None
             loaded_from_db = False
             try:
-                # Use raw SQL for retrieval
-                rows = list(self.db.execute("SELECT evaluation_state_json FROM evaluations WHERE qual_id = ?", (qual_id,)))
-                if rows:
-                    evaluation_state_json = rows[0][0] # First row, first column
-                    saved_state_data = json.loads(evaluation_state_json)
-                    debug(f"Loaded Saved State for {qual_id}: decision='{saved_state_data.get('final_decision')}'")
-                    
-                    best_state = self.validation_engine.dict_to_state(saved_state_data)
+                best_state = self.state_cache.get(qual_id)
+                if best_state:
+                    debug(f"Loaded Saved State for {qual_id}: decision='{best_state.final_decision}'")
                     loaded_from_db = True
             except Exception as e:
                 debug(f"Failed to rehydrate saved state: {e} ({type(e).__name__})")
@@ -166,6 +181,7 @@ class EvaluatorController:
                 except: pass
 
             center_panel = render_center_panel(qual_data, user_data, best_state, user_work_experience, user_documents)
+            self.fragment_cache.put(qual_id, version, to_xml(center_panel))
             
             # Log the final state being presented
             self._log_application_state(qual_id, best_state, source="Saved Evaluation" if loaded_from_db else "Fresh Validation")
@@ -181,41 +197,8 @@ class EvaluatorController:
             )
 
     def _get_applicant_data_for_validation(self, user_email: str, activity: str = None) -> ApplicantData:
-        # 1. Fetch Education from DB
-        user_education = self.db.t.education("user_email=?", [user_email])
-        best_edu = "any"
-        if user_education:
-            from logic.validator import EDUCATION_HIERARCHY
-            sorted_edu = sorted(user_education, key=lambda x: EDUCATION_HIERARCHY.get(x.get('education_category', 'any'), 0), reverse=True)
-            best_edu = sorted_edu[0].get('education_category', 'any')
-
-        # 2. Fetch Work Experience (All)
-        work_experiences_all = list(self.work_exp_table.rows_where("user_email=?", [user_email]))
-        
-        # Calculate Total (General) Experience
-        total_years = calculate_total_experience_years([
-            (datetime.datetime.strptime(exp['start_date'], '%Y-%m').date(),
-             datetime.datetime.strptime(exp['end_date'] or datetime.date.today().strftime('%Y-%m'), '%Y-%m').date())
-            for exp in work_experiences_all if exp.get('start_date')
-        ])
-
-        # Calculate Matching (Specific Activity) Experience
-        matching_years = total_years
-        if activity:
-            matching_exps = [e for e in work_experiences_all if e.get('associated_activity') == activity]
-            matching_years = calculate_total_experience_years([
-                (datetime.datetime.strptime(exp['start_date'], '%Y-%m').date(),
-                 datetime.datetime.strptime(exp['end_date'] or datetime.date.today().strftime('%Y-%m'), '%Y-%m').date())
-                for exp in matching_exps if exp.get('start_date')
-            ])
-        
-        return ApplicantData(
-            education=best_edu,
-            work_experience_years=total_years,
-            matching_experience_years=matching_years,
-            has_prior_level_4=True, base_training_hours=40, manager_training_hours=30,
-            cpd_training_hours=16, is_education_old_or_foreign=False
-        )
+        # Best education plus total/matching experience from the per-user summary cache
+        return load_applicant_data(self.db, self.experience_summary, user_email, activity)
 
     def _log_application_state(self, qual_id: str, state: ComplianceDashboardState, source: str):
         """
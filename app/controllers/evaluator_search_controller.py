@@ -2,128 +2,98 @@
 
 from fasthtml.common import *
 from starlette.requests import Request
-from collections import defaultdict
-import json
-from config.qualification_data import kt
-from ui.evaluator_v2.application_list import render_application_list
+from services.application_index import ApplicationIndex, DEFAULT_PAGE_SIZE
+from services.application_search import ApplicationSearch
+from utils.db_pool import read_db
+from ui.evaluator_v2.application_list import render_application_list, render_application_page, application_page_url, list_version_header
+
+LIST_FILTERS = ("level", "decision", "precheck")
 
 class EvaluatorSearchController:
-    def __init__(self, db, validation_engine):
+    def __init__(self, db, validation_engine, index=None):
         self.db = db
         self.validation_engine = validation_engine
         self.users_table = db.t.users
         self.qual_table = db.t.applied_qualifications
+        self.index = index or ApplicationIndex(db)
+        self.search = ApplicationSearch(db, self.index)
 
     def _get_flattened_applications(self, override_eval_states=None):
         """
-        Fetches and flattens application data for the search list.
+        Returns the application list from the materialised application_index.
         Optional override_eval_states: dict {qual_id: ComplianceDashboardState/dict}
         """
-        all_users = self.users_table()
-        all_quals = self.qual_table()
-        all_evals = self.db.t.evaluations()
-        user_name_lookup = {user.get('email'): user.get('full_name', 'N/A') for user in all_users}
-        eval_lookup = {}
-        
-        # 1. Load from DB
-        for ev in all_evals:
-            try:
-                state = json.loads(ev.get('evaluation_state_json', '{}'))
-                eval_lookup[ev.get('qual_id')] = {
-                    "precheck_met": state.get('overall_met'),
-                    "final_decision": state.get('final_decision')
-                }
-            except: continue
-            
-        # 2. Apply Overrides (Robustness against DB latency)
-        if override_eval_states:
-            for q_id, state_obj in override_eval_states.items():
-                # Allow passing either the State object or a dict or a pre-digested dict
-                if hasattr(state_obj, 'overall_met'): # It's a State object
-                    eval_lookup[q_id] = {
-                        "precheck_met": state_obj.overall_met,
-                        "final_decision": state_obj.final_decision
-                    }
-                elif isinstance(state_obj, dict):
-                     eval_lookup[q_id] = {
-                        "precheck_met": state_obj.get('overall_met'),
-                        "final_decision": state_obj.get('final_decision')
-                    }
-
-        grouped_by_activity = defaultdict(lambda: defaultdict(list))
-        for qual in all_quals:
-            user_email = qual.get('user_email')
-            level = qual.get('level')
-            activity = qual.get('qualification_name')
-            # Store the full qualification object so we can access decision columns later
-            grouped_by_activity[user_email][(level, activity)].append(qual)
+        flattened_data = self.index.list_all()
 
-        flattened_data = []
-        for user_email, activities in grouped_by_activity.items():
-            for (level, activity), qual_list in activities.items():
-                if not level or not activity: continue
-                
-                # Extract specialisations from the list of qual objects
-                specialisations = [q.get('specialisation') for q in qual_list]
-                
-                # Use the first qualification as the representative for shared data (decision, etc)
-                representative_qual = qual_list[0]
-                
-                applicant_name = user_name_lookup.get(user_email, user_email)
-                total_specialisations = len(kt.get(level, {}).get(activity, []))
+        # Apply Overrides (Robustness against DB latency)
+        if override_eval_states:
+            for app in flattened_data:
+                state_obj = override_eval_states.get(app['qual_id'])
+                if state_obj is not None:
+                    self._apply_override(app, state_obj)
+        return flattened_data
 
-                qual_id = f"{user_email}:::{level}:::{activity}"
-                eval_info = eval_lookup.get(qual_id)
+    @staticmethod
+    def _apply_override(app: dict, state_obj):
+        # Allow passing either the State object or a dict
+        if hasattr(state_obj, 'overall_met'): # It's a State object
+            precheck_met, final_decision = state_obj.overall_met, state_obj.final_decision
+        elif isinstance(state_obj, dict):
+            precheck_met, final_decision = state_obj.get('overall_met'), state_obj.get('final_decision')
+        else:
+            return
+        app['precheck_met'] = precheck_met
+        if final_decision: app['final_decision'] = final_decision
 
-                precheck_met = None
-                final_decision = None
+    def get_first_page(self, override_eval_states=None, **filters):
+        """First sidebar page as (applications, next_cursor), with the same overrides as above."""
+        applications, next_cursor = self.index.page(**filters)
+        if override_eval_states:
+            for app in applications:
+                state_obj = override_eval_states.get(app['qual_id'])
+                if state_obj is not None:
+                    self._apply_override(app, state_obj)
+        return applications, next_cursor
 
-                if eval_info:
-                    precheck_met = eval_info.get('precheck_met')
-                    final_decision = eval_info.get('final_decision')
-                
-                # Fallback: If decision not in JSON state, check the main table column
-                if not final_decision:
-                    # FIX: Use representative_qual instead of stale 'qual' variable
-                    final_decision = representative_qual.get('eval_decision')
-                
-                # If no precheck met status in DB, we could optionally run a fast check here
-                # but for now we rely on the saved state. If None, it shows "Pending" in UI.
+    def list_applications(self, request: Request):
+        """
+        GET endpoint for one page of the sidebar list (infinite scroll and filters).
+        Query params: cursor, limit, level, decision, precheck, plus suffix/active for rendering.
+        """
+        params = request.query_params
+        filters = {k: params.get(k) for k in LIST_FILTERS if params.get(k)}
+        try:
+            limit = int(params.get("limit", DEFAULT_PAGE_SIZE))
+        except ValueError:
+            limit = DEFAULT_PAGE_SIZE
+        cursor = params.get("cursor")
+        id_suffix, active_qual_id = params.get("suffix", ""), params.get("active")
 
-                flattened_data.append({
-                    "qual_id": qual_id,
-                    "applicant_name": applicant_name,
-                    "qualification_name": activity,
-                    "level": level,
-                    "submission_date": "2025-10-20", # Placeholder
-                    "selected_specialisations_count": len(specialisations),
-                    "total_specialisations": total_specialisations,
-                    "specialisations": specialisations,
-                    "precheck_met": precheck_met,
-                    "final_decision": final_decision
-                })
-        return sorted(flattened_data, key=lambda x: x['applicant_name'])
+        applications, next_cursor = self.index.using(read_db(request, self.db)).page(cursor=cursor, limit=limit, **filters)
+        next_url = None
+        if next_cursor:
+            next_url = application_page_url(next_cursor, id_suffix, active_qual_id, limit=limit if limit != DEFAULT_PAGE_SIZE else None, **filters)
+        return render_application_page(applications, next_url, active_qual_id, is_first_page=not cursor, id_suffix=id_suffix)
 
     def get_application_by_id(self, qual_id: str):
         """Fetches data for a single application."""
-        all_apps = self._get_flattened_applications()
-        return next((app for app in all_apps if app['qual_id'] == qual_id), None)
+        return self.index.get(qual_id)
 
-    def search_applications(self, request: Request, search: str):
+    def search_applications(self, request: Request, search: str, filters: dict = None, id_suffix: str = ""):
         """
-        Handles the live search request and returns the filtered application list.
+        Handles the live search / filter request and returns the filtered application list.
+        Without search text this is the first page of the paginated list.
         """
-        all_apps = self._get_flattened_applications()
-
-        if search:
-            search_lower = search.lower()
-            filtered_apps = [
-                app for app in all_apps if
-                (search_lower in app.get('applicant_name', '').lower()) or
-                (search_lower in app.get('qualification_name', '').lower()) or
-                (search_lower in app.get('level', '').lower())
-            ]
-        else:
-            filtered_apps = all_apps
+        filters = {k: v for k, v in (filters or {}).items() if k in LIST_FILTERS and v}
+        search_db = read_db(request, self.db)
+        index = self.index.using(search_db)
+        # Read before the list so a concurrent change can only make the stamp older (forcing a reload), never newer
+        version_stamp = list_version_header(index.version(), id_suffix=id_suffix)
+        if not search:
+            applications, next_cursor = index.page(**filters)
+            next_url = application_page_url(next_cursor, id_suffix, **filters) if next_cursor else None
+            return render_application_page(applications, next_url, id_suffix=id_suffix), version_stamp
 
-        return render_application_list(filtered_apps, include_oob=False)
\ No newline at end of file
+        # Ranked FTS5 matches with highlighted name / qualification
+        results = self.search.using(search_db).search(search, **filters)
+        return render_application_list(results, include_oob=False, id_suffix=id_suffix), version_stamp
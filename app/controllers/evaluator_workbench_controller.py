@@ -15,8 +15,12 @@ import dataclasses
 from logic.validator import ValidationEngine
 from logic.models import ApplicantData, ComplianceDashboardState
 from ui.evaluator_v2.center_panel import render_compliance_dashboard
-from ui.evaluator_v2.application_list import render_application_item, render_application_list
+from ui.evaluator_v2.application_list import render_application_item, render_application_patch, list_version_header
+from services.application_index import ApplicationIndex
+from services.evaluation_store import EvaluationStore
+from database import transaction
 from utils.log import debug, error
+from utils.write_queue import run_write
 
 QUALIFICATION_LEVEL_TO_RULE_ID = {
     "Ehituse tööjuht, TASE 5": "toojuht_tase_5",
@@ -36,13 +40,17 @@ def _calculate_years(start_str, end_str):
             return 0.0
 
 class EvaluatorWorkbenchController:
-    def __init__(self, db, validation_engine, main_controller, search_controller):
+    def __init__(self, db, validation_engine, main_controller, search_controller, write_queue=None, index=None):
         self.db = db
+        self.write_queue = write_queue
         self.evaluations_table = db.t.evaluations
         self.validation_engine = validation_engine
         self.main_controller = main_controller 
         self.search_controller = search_controller
         self.qual_table = db.t.applied_qualifications
+        self.index = index or ApplicationIndex(db)
+        self.evaluation_store = EvaluationStore(db)
+        self.index.resolve_source() # The store may have just added the typed evaluation columns
 
     def _apply_accepted_experience_logic(self, state: ComplianceDashboardState, work_experience: list):
         if not work_experience: return
@@ -53,8 +61,10 @@ class EvaluatorWorkbenchController:
             for exp in work_experience:
                 if exp.get('id') in state.accepted_work_experience_ids:
                     accepted_years += _calculate_years(exp.get('start_date'), exp.get('end_date'))
-        
-       # 2. Construct Header
+        self._apply_accepted_years(state, accepted_years)
+
+    def _apply_accepted_years(self, state: ComplianceDashboardState, accepted_years: float):
+        # 2. Construct Header
         from logic.helpers import construct_workex_header
         
         # We pass the CURRENT provided string as the raw source. 
@@ -79,16 +89,33 @@ class EvaluatorWorkbenchController:
         # Force the compliance status based on ACCEPTED amount
         state.matching_experience.is_met = accepted_years >= req_val
 
+    def _accepted_years(self, user_email: str, accepted_ids: list) -> Tuple[float, list]:
+        """
+        Sum over the accepted rows as they are now, and the accepted ids that still exist. One
+        query over the ids: edits, deletions and ongoing roles never leave a stale total.
+        """
+        if not accepted_ids: return 0.0, []
+        rows = list(self.db.execute(
+            f"SELECT id, start_date, end_date FROM work_experience WHERE user_email = ? AND id IN ({', '.join('?' * len(accepted_ids))})",
+            (user_email, *accepted_ids)))
+        existing = {row_id for row_id, _, _ in rows}
+        return sum(_calculate_years(start, end) for _, start, end in rows), [i for i in accepted_ids if i in existing]
+
     async def toggle_work_experience(self, request: Request, qual_id: str, exp_id: int):
+        """
+        Accepts or un-accepts one work-experience row. The accepted-years total is recomputed
+        from the accepted rows (ids of deleted rows are dropped), the state is saved once, and
+        the response is the row plus the Töökogemus header (out-of-band).
+        """
         try:
             exp_id = int(exp_id)
             user_email, level, activity = qual_id.split(':::', 2)
+            exp = next(self.db.t.work_experience.rows_where("id = ? AND user_email = ?", [exp_id, user_email]), None)
+            if exp is None:
+                return Div("Töökogemust ei leitud.", cls="text-red-500")
             
             # 1. Load State
-            best_state = None
-            rows = list(self.db.execute("SELECT evaluation_state_json FROM evaluations WHERE qual_id = ?", (qual_id,)))
-            if rows:
-                best_state = self.validation_engine.dict_to_state(json.loads(rows[0][0]))
+            best_state = self.main_controller.state_cache.get(qual_id)
             
             if not best_state:
                 # FALLBACK: Generate fresh state if not found (First interaction workaround)
@@ -105,40 +132,26 @@ class EvaluatorWorkbenchController:
                      best_state.final_decision = uq_rows[0].get('eval_decision')
                      if uq_rows[0].get('eval_comment'): 
                          best_state.otsus_comment = uq_rows[0].get('eval_comment')
-                
-                # debug(f"Generated fresh state on-the-fly for toggle: {qual_id}")
 
-            # 2. Toggle ID
-            if not hasattr(best_state, 'accepted_work_experience_ids'):
-                best_state.accepted_work_experience_ids = []
-            
-            if exp_id in best_state.accepted_work_experience_ids:
-                best_state.accepted_work_experience_ids.remove(exp_id)
+            # 2. Toggle ID and recompute the total over the rows as they are now
+            accepted_ids = best_state.accepted_work_experience_ids
+            if exp_id in accepted_ids:
+                accepted_ids.remove(exp_id)
             else:
-                best_state.accepted_work_experience_ids.append(exp_id)
-            
-            # 3. Apply Logic with fresh data
-            work_experience = list(self.db.t.work_experience.rows_where("user_email = ?", [user_email], order_by='start_date DESC, id DESC'))
-            self._apply_accepted_experience_logic(best_state, work_experience)
+                accepted_ids.append(exp_id)
+            accepted_years, accepted_ids[:] = self._accepted_years(user_email, accepted_ids)
+            self._apply_accepted_years(best_state, accepted_years)
 
-            # 4. Save
-            self._save_evaluation_state(qual_id, user_email, best_state) # Note: session user might be different from applicant, but here we need evaluator email?
-            # Re-read evaluator email from session?
-            evaluator_email = request.session.get("user_email")
-            self._save_evaluation_state(qual_id, evaluator_email, best_state)
+            # 3. Save (as the evaluator)
+            await run_write(self.write_queue, self._save_evaluation_state, qual_id, request.session.get("user_email"), best_state)
 
-            # 5. Render Dashboard
-            # Pass qual_id and work_experience explicitly
-            accepted_ids = best_state.accepted_work_experience_ids
-            from ui.evaluator_v2.workex_table import render_work_experience_table
-            
-            # Since we only want to update the dashboard/center panel, we call render_compliance_dashboard
-            # But wait, render_compliance_dashboard renders the WHOLE list of sections.
-            # We assume toggle is done via OOB or simple replacement.
-            # The UI asks for hx_target="#compliance-dashboard-container"
-            dashboard = render_compliance_dashboard(best_state, work_experience=work_experience, qual_id=qual_id)
-            
-            return dashboard
+            # 4. Render the row and the section header
+            row_number = int((await request.form()).get("row_number") or 0) or "-"
+            from ui.evaluator_v2.workex_table import render_work_experience_row
+            from ui.evaluator_v2.center_panel import render_workex_section_header
+            emp_docs = list(self.db.t.documents.rows_where("user_email = ? AND document_type = ?", [user_email, "employment_proof"]))
+            header = render_workex_section_header(best_state, emp_docs)(hx_swap_oob="true")
+            return render_work_experience_row(exp, row_number, qual_id, exp_id in accepted_ids), header
 
         except Exception as e:
             traceback.print_exc()
@@ -152,14 +165,11 @@ class EvaluatorWorkbenchController:
             
             debug(f"Raw form data received: {form_data}")
 
-            # 1. Restore previous state using raw SQL
+            # 1. Restore previous state
             best_state = None
             try:
-                rows = list(self.db.execute("SELECT evaluation_state_json FROM evaluations WHERE qual_id = ?", (qual_id,)))
-                if rows:
-                    evaluation_state_json = rows[0][0]
-                    saved_state_data = json.loads(evaluation_state_json)
-                    best_state = self.validation_engine.dict_to_state(saved_state_data)
+                best_state = self.main_controller.state_cache.get(qual_id)
+                if best_state:
                     debug(f"Loaded previous state for {qual_id}")
             except Exception as e:
                 debug(f"Could not load previous state for {qual_id}: {e} ({type(e).__name__})")
@@ -211,6 +221,7 @@ class EvaluatorWorkbenchController:
                 if selected_education is not None:
                     applicant_data.education = selected_education or "any"
                 applicant_data.is_education_old_or_foreign = is_old_or_foreign
+                applicant_data.certification_type = best_state.certification_type
 
                 qualification_rule_id = QUALIFICATION_LEVEL_TO_RULE_ID.get(level, "toojuht_tase_5")
                 all_states = self.validation_engine.validate(applicant_data, qualification_rule_id)
@@ -261,35 +272,27 @@ class EvaluatorWorkbenchController:
             work_experience = list(self.db.t.work_experience.rows_where("user_email = ?", [user_email], order_by='start_date DESC'))
             self._apply_accepted_experience_logic(best_state, work_experience)
 
-            # 7. Final Sync & Save
-            self._save_evaluation_state(qual_id, request.session.get("user_email"), best_state)
+            # 7. Final Sync & Save (list version read first so the client can tell if it missed other changes)
+            base_version = self.index.version()
+            await run_write(self.write_queue, self._save_evaluation_state, qual_id, request.session.get("user_email"), best_state)
             
             # Pass qual_id to ensure checkboxes are clickable
             dashboard = render_compliance_dashboard(best_state, work_experience=work_experience, qual_id=qual_id)
             
-            # --- OOB update: Full Sidebar Refresh (Ensures consistency) ---
-            # Fetch all applications to render the updated list
+            # --- OOB update: patch only this application's sidebar item in both containers ---
             # We pass the current 'best_state' as an override to ensure the list reflects the NEW decision immediately,
             # bypassing any potential DB commit/read latency.
-            all_apps = self.search_controller._get_flattened_applications(
-                override_eval_states={qual_id: best_state}
-            )
-            
-            # 1. Desktop List Content
-            desktop_list_content = render_application_list(all_apps, include_oob=False, active_qual_id=qual_id)
+            oob_swaps = ()
+            app = self.search_controller.get_application_by_id(qual_id)
+            if app:
+                self.search_controller._apply_override(app, best_state)
+                oob_swaps = render_application_patch(app, active_qual_id=qual_id)
+            version = self.index.version()
+            version_stamp = list_version_header(version, base_version=base_version)
+
+            print(f"--- [DEBUG] OOB Update - Patching sidebar item {qual_id} (list version {base_version} -> {version})")
             
-            # 2. Drawer List Content (Same content logic, effectively just regenerating the FT components)
-            drawer_list_content = render_application_list(all_apps, include_oob=False, active_qual_id=qual_id)
-
-            # Create OOB swaps for BOTH containers
-            oob_swaps = (
-                Div(desktop_list_content, id="application-list-container", hx_swap_oob="true"),
-                Div(drawer_list_content, id="application-list-container-drawer", hx_swap_oob="true")
-            )
-            
-            print(f"--- [DEBUG] OOB Update - Refreshing application lists ({len(all_apps)} items) with active: {qual_id}")
-            
-            return dashboard, *oob_swaps
+            return dashboard, *oob_swaps, version_stamp
 
         except Exception as e:
             print(f"--- [ERROR] Re-evaluation failed: {e} ---")
@@ -298,37 +301,39 @@ class EvaluatorWorkbenchController:
 
     def _save_evaluation_state(self, qual_id: str, evaluator_email: str, state: ComplianceDashboardState):
         try:
-            state_dict = dataclasses.asdict(state)
-            
-            # Use raw SQL for robust INSERT OR REPLACE
-            sql = """
-                INSERT OR REPLACE INTO evaluations 
-                (qual_id, evaluator_email, evaluation_state_json, updated_at) 
-                VALUES (?, ?, ?, ?)
-            """
-            self.db.execute(sql, (
-                qual_id, 
-                evaluator_email, 
-                json.dumps(state_dict), 
-                str(datetime.datetime.now())
-            ))
-
-            # 2. Sync to applied_qualifications (Legacy/Robustness)
-            # This ensures that even if the JSON state acts up, the core decision is preserved in the main table.
-            try:
-                user_email, level, activity = qual_id.split(':::', 2)
-                decision = state.final_decision
-                comment = state.otsus_comment
+            # One transaction: the typed state, the legacy decision columns and the index row commit together
+            with transaction(self.db):
+                # 1. Typed state (scalar columns + checks/accepted experience child tables)
+                revision = self.evaluation_store.save(qual_id, evaluator_email, state)
+
+                # 2. Sync to applied_qualifications (Legacy/Robustness)
+                # This ensures the core decision is also preserved in the main table.
+                try:
+                    user_email, level, activity = qual_id.split(':::', 2)
+                    decision = state.final_decision
+                    comment = state.otsus_comment
                 
-                sql_update = """
-                    UPDATE applied_qualifications 
-                    SET eval_decision = ?, eval_comment = ? 
-                    WHERE user_email = ? AND level = ? AND qualification_name = ?
-                """
-                self.db.execute(sql_update, (decision, comment, user_email, level, activity))
-                print(f"--- [DEBUG] Synced decision '{decision}' to applied_qualifications for {qual_id}")
-            except Exception as sync_err:
-                print(f"--- [WARN] Failed to sync to applied_qualifications: {sync_err}")
+                    sql_update = """
+                        UPDATE applied_qualifications 
+                        SET eval_decision = ?, eval_comment = ? 
+                        WHERE user_email = ? AND level = ? AND qualification_name = ?
+                    """
+                    self.db.execute(sql_update, (decision, comment, user_email, level, activity))
+                    print(f"--- [DEBUG] Synced decision '{decision}' to applied_qualifications for {qual_id}")
+                except Exception as sync_err:
+                    print(f"--- [WARN] Failed to sync to applied_qualifications: {sync_err}")
+
+                # 3. Keep the sidebar index in step with the saved precheck/decision
+                try:
+                    self.index.refresh_application(qual_id)
+                except Exception as index_err:
+                    print(f"--- [WARN] Failed to refresh application_index for {qual_id}: {index_err}")
+
+            # Write through, so the next click on this application skips the load
+            self.main_controller.state_cache.put(qual_id, state, revision)
+            # The rendered panel is stale now; drop it rather than wait for the version check
+            self.main_controller.fragment_cache.invalidate(qual_id)
 
         except Exception as db_error:
-            print(f"--- [ERROR] Failed to save evaluation state for {qual_id}: {db_error}")
\ No newline at end of file
+            print(f"--- [ERROR] Failed to save evaluation state for {qual_id}: {db_error}")
+            raise # The write queue counts it as failed and the caller reports it
\ No newline at end of file
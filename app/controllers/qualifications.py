@@ -10,10 +10,16 @@ from config.qualification_data import kt
 from monsterui.all import *
 from monsterui.daisy import Toast, AlertT, ToastHT, ToastVT
 from .utils import get_badge_counts
+from services.application_index import ApplicationIndex
+from database import transaction
 from utils.log import log, debug, error
+from utils.write_queue import run_write
 
 class QualificationController:
-    def __init__(self, db): self.db, self.tbl = db, db.t.applied_qualifications
+    def __init__(self, db, index=None, write_queue=None):
+        self.db, self.tbl = db, db.t.applied_qualifications
+        self.index = index or ApplicationIndex(db)
+        self.write_queue = write_queue
 
     def _prepare_data(self, uid: str):
         """Prepare form data efficiently using set lookups."""
@@ -75,6 +81,13 @@ class QualificationController:
             error(f"Toggle error: {e}")
             return Div("Tehniline viga", cls="text-red-500")
 
+    def _replace_qualifications(self, uid: str, rows: list):
+        # Atomic replacement
+        with transaction(self.db):
+            self.tbl.delete_where('user_email=?', [uid])
+            if rows: self.tbl.insert_all(rows)
+            self.index.refresh_user(uid)
+
     async def submit_qualifications(self, req: Request):
         uid = req.session.get("user_email")
         if not uid: return Alert("Sisselogimine vajalik", cls="text-red-500", id="msg", hx_swap_oob="innerHTML")
@@ -98,9 +111,7 @@ class QualificationController:
                         })
                 except Exception as e: error(f"Parse key error {k}: {e}")
 
-            # Atomic replacement (ideally use transaction, but here explicit steps)
-            self.tbl.delete_where('user_email=?', [uid])
-            if rows: self.tbl.insert_all(rows)
+            await run_write(self.write_queue, self._replace_qualifications, uid, rows)
             
             return self.show_qualifications_tab(req)
         except Exception as e:
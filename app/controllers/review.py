@@ -6,12 +6,14 @@ from starlette.requests import Request
 from starlette.responses import Response
 from fastlite import NotFoundError
 from collections import defaultdict
+from typing import Optional
 
 # Import layouts and nav components
 from ui.layouts import app_layout
 from ui.nav_components import tab_nav
 from ui.review_view import render_review_page
 from .utils import get_badge_counts
+from utils.identity_map import IdentityMap, identity_map
 from config.qualification_data import kt # <-- Import qualification master data
 
 class ReviewController:
@@ -84,23 +86,18 @@ class ReviewController:
         return processed_list
 
 
-    def _get_all_application_data(self, user_email: str) -> dict:
+    def _get_all_application_data(self, user_email: str, identities: Optional[IdentityMap] = None) -> dict:
         """Fetches and processes all application data for the review page."""
         print(f"--- DEBUG [ReviewController]: Fetching all data for {user_email} ---")
+        identities = identities or IdentityMap(self.db)
         data = {}
 
-        try:
-            data['user'] = self.users_table[user_email]
-        except NotFoundError:
-             data['user'] = {}
-        
-        try:
-            data['profile'] = self.profile_table[user_email]
-        except NotFoundError:
-             data['profile'] = {}
+        # User, profile and qualifications are shared with the guard and navbar of this request
+        data['user'] = identities.user(user_email) or {}
+        data['profile'] = identities.profile(user_email) or {}
 
         # Fetch and then process qualifications
-        raw_qualifications = self._fetch_data_for_user(self.qual_table, user_email, is_list=True)
+        raw_qualifications = identities.qualifications(user_email)
         data['qualifications'] = self._process_qualifications(raw_qualifications)
         
         data['experience'] = self._fetch_data_for_user(self.exp_table, user_email, is_list=True)
@@ -128,7 +125,7 @@ class ReviewController:
 
         page_title = "Taotluse esitamine | Ehitamise kutsed"
 
-        application_data = self._get_all_application_data(user_email)
+        application_data = self._get_all_application_data(user_email, identity_map(request, self.db))
         review_content = render_review_page(application_data)
 
         # Fetch badge counts
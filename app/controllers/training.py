@@ -7,15 +7,19 @@ from ui.nav_components import tab_nav
 from ui.training_form import render_training_form
 from .utils import get_badge_counts
 from utils.log import log, error
-from pathlib import Path
-import datetime, uuid
-
-UPLOAD_DIR = Path(__file__).parents[2] / 'uploads'
+from utils.write_queue import run_write
+from services.storage import run_storage
+from services.file_storage import legacy_backend
+from utils.streaming_upload import UploadTooLarge, receive_upload
+import datetime, functools
 
 class TrainingController:
-    def __init__(self, db):
+    def __init__(self, db, write_queue=None, storage=None, backend=None):
         self.db = db
         self.tbl = db.t.training_files
+        self.write_queue = write_queue
+        self.storage = storage
+        self.backend = backend or legacy_backend() # Shared with the documents tab; uploads/ when none is configured
 
     def show_training_tab(self, req: Request):
         uid = req.session.get("user_email")
@@ -34,30 +38,29 @@ class TrainingController:
         if not uid: return ToastAlert("Autentimine vajalik", alert_type="error")
 
         try:
-            form = await req.form()
-            files = form.getlist("training_files")
+            # Streamed straight to storage; a file over the limit aborts the whole request
+            try:
+                form = await receive_upload(req, self.backend.opener("training_files", uid, "training"),
+                                            run=functools.partial(run_storage, self.storage, "upload"))
+            except UploadTooLarge as e:
+                return ToastAlert(f"Fail liiga suur: {e.filename}", alert_type="error")
             desc = form.get("file_description", "")
 
-            if not files: return ToastAlert("Faile ei leitud", alert_type="error")
-
-            UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-            
-            for f in files:
-                if not f.filename: continue
-                # if f.content_type != "application/pdf": return ToastAlert(f"Vale failitüüp: {f.filename} (Ainult PDF)", alert_type="error")
-                
-                content = await f.read()
-                if len(content) > 10*1024*1024: return ToastAlert(f"Fail liiga suur: {f.filename}", alert_type="error")
-                
-                sname = f"{uid}_{uuid.uuid4().hex}_{f.filename}"
-                (UPLOAD_DIR / sname).write_bytes(content)
-
-                self.tbl.insert({
-                    "user_email": uid, "file_description": desc, "original_filename": f.filename,
-                    "storage_identifier": sname, "upload_timestamp": str(datetime.datetime.now())
-                })
+            if not form.files: return ToastAlert("Faile ei leitud", alert_type="error")
+
+            rows = [{
+                "user_email": uid, "file_description": desc, "original_filename": f.filename,
+                "storage_identifier": f.storage_identifier, "upload_timestamp": str(datetime.datetime.now()),
+                "file_size": f.size, "sha256": f.sha256
+            } for f in form.files]
+
+            try:
+                await run_write(self.write_queue, self.tbl.insert_all, rows)
+            except Exception:
+                await run_storage(self.storage, "discard", form.discard)
+                raise
 
             return Response(headers={'HX-Redirect': '/app/taiendkoolitus'})
         except Exception as e:
             error(f"Training upload error {uid}: {e}")
-            return ToastAlert(f"Viga: {e}", alert_type="error")
\ No newline at end of file
+            return ToastAlert(f"Viga: {e}", alert_type="error")
\ No newline at end of file
@@ -9,11 +9,14 @@ from .utils import get_badge_counts
 from monsterui.all import *
 from ui.work_experience_view_v2 import render_work_experience_form_v2
 from models import WorkExperience
+from database import transaction
 from utils.log import log, error
+from utils.write_queue import run_write
 
 class WorkExperienceController:
-    def __init__(self, db): 
+    def __init__(self, db, write_queue=None): 
         self.db = db
+        self.write_queue = write_queue
         self.exp_tbl = db.t.work_experience
         self.qual_tbl = db.t.applied_qualifications
 
@@ -97,22 +100,26 @@ class WorkExperienceController:
 
             if is_edit:
                 if self.exp_tbl[eid]['user_email'] != uid: return Response("Forbidden", 403)
-                self.exp_tbl.update(data, id=eid)
             else:
                 data.pop('id', None)
-                self.exp_tbl.insert(data)
+            await run_write(self.write_queue, self._save_experience, eid, data)
                 
             return self.show_workex_tab(req)
         except Exception as e:
             error(f"Workex save error {uid}: {e}")
             return RedirectResponse("/app/workex?error=save_failed", 303)
 
+    def _save_experience(self, eid: int | None, data: dict):
+        with transaction(self.db):
+            if eid is None: self.exp_tbl.insert(data)
+            else: self.exp_tbl.update(data, id=eid)
+
     def delete_workex_experience(self, req: Request, eid: int):
         uid = req.session.get("user_email")
         if not uid: return ToastAlert("Autentimine vajalik", alert_type="error")
         try:
             if self.exp_tbl[eid]['user_email'] != uid: return ToastAlert("Ligipääs puudub", alert_type="error")
-            self.exp_tbl.delete(eid)
+            with transaction(self.db): self.exp_tbl.delete(eid)
             return self.show_workex_tab(req)
         except Exception as e:
             error(f"Workex del error {uid}: {e}")
@@ -1,9 +1,17 @@
 # app/database.py
 
+import itertools
 import os
 import sqlite3
+import threading
+import time
 import traceback
+import weakref
+from contextlib import closing, contextmanager
+from contextvars import ContextVar
 from pathlib import Path
+
+import apsw
 from fastlite import database
 from utils.migrations import run_pending_migrations
 
@@ -40,6 +48,82 @@ def _configure_connection(connection: sqlite3.Connection) -> None:
     connection.execute("PRAGMA busy_timeout=10000;")
 
 
+_savepoint_ids = itertools.count()
+# Connections the current thread or task has a transaction open on (ids; nesting is per context)
+_open_transactions: ContextVar[frozenset] = ContextVar("open_transactions", default=frozenset())
+_writer_locks: "weakref.WeakKeyDictionary[apsw.Connection, threading.Lock]" = weakref.WeakKeyDictionary()
+_writer_locks_guard = threading.Lock()
+
+
+def writer_lock(conn) -> threading.Lock:
+    """The lock every ``transaction`` on ``conn`` holds from BEGIN to COMMIT/ROLLBACK."""
+    with _writer_locks_guard:
+        lock = _writer_locks.get(conn)
+        if lock is None:
+            lock = _writer_locks[conn] = threading.Lock()
+        return lock
+
+
+def _with_busy_retry(statement, retries: int, backoff: float) -> None:
+    for attempt in range(retries + 1):
+        try:
+            return statement()
+        except apsw.BusyError:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+
+@contextmanager
+def transaction(db, retries: int = 5, backoff: float = 0.05):
+    """
+    Runs the block as one atomic write on ``db`` (a FastLite handle).
+
+    The outermost call starts with BEGIN IMMEDIATE, so the write lock is taken up
+    front and SQLITE_BUSY is retried here with exponential backoff instead of
+    surfacing part-way through the block; the block then commits (and syncs)
+    once. Calls nested inside an open transaction become savepoints, so an inner
+    failure only rolls back its own statements.
+
+    The connection is shared by threadpool handlers, the event loop and the
+    write queue's worker, so nesting is tracked per thread/task rather than by
+    ``conn.in_transaction``, and outermost transactions on one connection take
+    turns on ``writer_lock``: another thread's write never becomes a savepoint
+    inside (and is never rolled back with) a transaction it did not open. Do
+    not await inside the block.
+    """
+    conn = db.conn
+    key = id(conn)
+    open_here = _open_transactions.get()
+    if key in open_here:
+        name = f"sp_{next(_savepoint_ids)}"
+        conn.execute(f"SAVEPOINT {name}")
+        try:
+            yield db
+        except BaseException:
+            conn.execute(f"ROLLBACK TO {name}")
+            conn.execute(f"RELEASE {name}")
+            raise
+        conn.execute(f"RELEASE {name}")
+        return
+
+    with writer_lock(conn):
+        _with_busy_retry(lambda: conn.execute("BEGIN IMMEDIATE"), retries, backoff)
+        token = _open_transactions.set(open_here | {key})
+        try:
+            yield db
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            _open_transactions.reset(token)
+        try:
+            _with_busy_retry(lambda: conn.execute("COMMIT"), retries, backoff)
+        except apsw.BusyError:
+            conn.execute("ROLLBACK")
+            raise
+
+
 def setup_database():
     """Initialise the SQLite database file, run migrations, and return a FastLite handle."""
     try:
@@ -54,7 +138,9 @@ def setup_database():
     print(f"--- Setting up database at: {DB_FILE} ---")
 
     try:
-        with sqlite3.connect(DB_FILE) as connection:
+        # Closed right away: a stdlib sqlite3 handle still open when it is garbage collected
+        # (after apsw has opened the file) would take the WAL and -shm files with it
+        with closing(sqlite3.connect(DB_FILE)) as connection, connection:
             _configure_connection(connection)
     except Exception as e:
         print(f"--- FATAL ERROR: Could not prepare SQLite pragmas for '{DB_FILE}': {e} ---")
@@ -354,6 +440,24 @@ def setup_database():
         db.execute("CREATE INDEX IF NOT EXISTS ix_documents_user_email ON documents (user_email)")
         print("--- 'documents' table created ---")
 
+    # === Upload size and SHA-256 (recorded while the file streams in) ===
+    for table_name in ("training_files", "employment_proof", "documents"):
+        existing_cols = [col[1] for col in db.execute(f"PRAGMA table_info({table_name})").fetchall()]
+        for col_name, col_type in {"file_size": "INTEGER", "sha256": "TEXT"}.items():
+            if col_name not in existing_cols:
+                try:
+                    print(f"    Adding column {table_name}.{col_name}")
+                    db.execute(f"ALTER TABLE {table_name} ADD COLUMN {col_name} {col_type}")
+                except Exception as e:
+                    print(f"    Error adding column {table_name}.{col_name}: {e}")
+
+    # === Legacy upload names (bare files under uploads/, see services.file_storage.legacy_backend) ===
+    for table_name in ("training_files", "employment_proof"):
+        existing_cols = [col[1] for col in db.execute(f"PRAGMA table_info({table_name})").fetchall()]
+        if "storage_identifier" in existing_cols:
+            db.execute(f"UPDATE {table_name} SET storage_identifier = 'uploads:' || storage_identifier "
+                       "WHERE storage_identifier NOT LIKE '%:%' AND storage_identifier NOT LIKE '%/%'")
+
     # === Create Allowed Evaluators Table ===
     allowed_evaluators = db.t.allowed_evaluators
     if allowed_evaluators not in db.t:
@@ -0,0 +1,250 @@
+# app/logic/compiled_rules.py
+"""
+Compiles eligibility packages into evaluation plans.
+
+``compile_package`` runs once per package when the rules are loaded: it reads
+every field the package sets, pre-parses the ``conditional_rules`` and builds
+the list of checks that apply. Evaluating an applicant is then a loop over that
+list. A field the compiler does not know raises at load time instead of being
+skipped silently on every evaluation.
+"""
+import operator
+import re
+import unicodedata
+from dataclasses import fields
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from .models import ApplicantData, ComplianceDashboardState, EligibilityPackage
+
+EDUCATION_HIERARCHY = {
+    "any": 0, "keskharidus": 1, "ehitustehniline_keskeriharidus": 2,
+    "mittevastav_kõrgharidus_180_eap": 3, "vastav_kõrgharidus_180_eap": 4,
+    "mittevastav_kõrgharidus_240_eap": 5, "vastav_kõrgharidus_240_eap": 6,
+    "tehniline_kõrgharidus_300_eap": 7, "mittevastav_kõrgharidus_300_eap": 8,
+    "vastav_kõrgharidus_300_eap": 9,
+}
+
+# Requirements in rules.toml that name a group of categories: the lowest category that satisfies them
+EDUCATION_REQUIREMENT_ALIASES = {
+    "kõrgharidus_vähemalt_240_eap": "mittevastav_kõrgharidus_240_eap",
+    "ehitustehniline_keskeriharidus_või_muu_vastav_keskeriharidus_või_vähemalt_180_eap": "ehitustehniline_keskeriharidus",
+}
+
+INITIAL_ROUTE = "esmatõendamine"
+
+# Conditional training triggers -> the applicant flag that switches them on
+CONDITIONAL_TRAINING_TRIGGERS = {
+    "haridus_vanem_kui_10a_või_välisriik": lambda a: a.is_education_old_or_foreign,
+}
+
+# Package fields that are descriptive or left to the evaluator: there is no applicant data to check them against
+MANUAL_FIELDS = {
+    "id", "description_et", "citation", "role_requirement", "higher_ed_field",
+    "requires_specialization_base_courses", "specialization_exams_required",
+    # Training records carry no dates, so training windows are not checked
+    "base_training_window_years", "manager_base_training_window_years", "cpd_training_window_years",
+}
+
+# Numeric thresholds a check reads from the (possibly overridden) package parameters
+THRESHOLD_FIELDS = (
+    "total_experience_years", "total_experience_window_years",
+    "matching_experience_years", "matching_experience_window_years",
+    "base_training_hours", "manager_base_training_hours", "cpd_training_hours",
+)
+
+_normalize = lambda value: unicodedata.normalize("NFC", value)
+_NORMALIZED_HIERARCHY = {_normalize(k): v for k, v in EDUCATION_HIERARCHY.items()}
+_NORMALIZED_ALIASES = {_normalize(k): _normalize(v) for k, v in EDUCATION_REQUIREMENT_ALIASES.items()}
+
+_CONDITION = re.compile(r"^\s*(\w+)\s*(==|!=)\s*'([^']*)'\s*$")
+_OPERATORS = {"==": operator.eq, "!=": operator.ne}
+_APPLICANT_FIELDS = {f.name for f in fields(ApplicantData)}
+
+Check = Callable[[ApplicantData, ComplianceDashboardState, Mapping[str, Any]], bool]
+
+
+@lru_cache(maxsize=256)
+def education_rank(education: Optional[str]) -> int:
+    """Rank of an applicant's education category; unknown categories rank as "any"."""
+    return _NORMALIZED_HIERARCHY.get(_normalize(education), 0) if education else 0
+
+
+def _requirement_rank(requirement: str) -> int:
+    key = _normalize(requirement)
+    key = _NORMALIZED_ALIASES.get(key, key)
+    if key not in _NORMALIZED_HIERARCHY:
+        raise ValueError(f"Education requirement '{requirement}' is not in EDUCATION_HIERARCHY.")
+    return _NORMALIZED_HIERARCHY[key]
+
+
+def _parse_condition(package_id: str, rule: Mapping) -> Tuple[Callable[[ApplicantData], bool], Dict[str, Any]]:
+    match = _CONDITION.match(rule.get("when", ""))
+    if not match or match.group(1) not in _APPLICANT_FIELDS:
+        raise ValueError(f"{package_id}: cannot evaluate conditional rule {rule.get('when')!r}.")
+    overrides = dict(rule.get("set", {}))
+    unknown = set(overrides) - set(THRESHOLD_FIELDS)
+    if unknown:
+        raise ValueError(f"{package_id}: conditional rule sets unsupported fields {sorted(unknown)}.")
+    name, compare, value = match.group(1), _OPERATORS[match.group(2)], match.group(3)
+    return (lambda applicant: compare(getattr(applicant, name), value)), overrides
+
+
+def _years_check(slot: str, field_name: str, provided: Callable[[ApplicantData, Optional[int]], float]) -> Check:
+    window_field = field_name.replace("_years", "_window_years")
+
+    def check(applicant, state, params):
+        required = params.get(field_name)
+        if required is None:
+            return True
+        value = provided(applicant, params.get(window_field))
+        result = getattr(state, slot)
+        result.is_relevant, result.required, result.provided = True, f"{required}a", f"{value}a"
+        result.is_met = value >= required
+        return result.is_met
+    return check
+
+
+def _hours_check(slot: str, field_name: str, provided: Callable[[ApplicantData], int]) -> Check:
+    def check(applicant, state, params):
+        required = params.get(field_name)
+        if not required:
+            return True
+        value = provided(applicant)
+        result = getattr(state, slot)
+        result.is_relevant, result.required, result.provided = True, f"{required}h", f"{value}h"
+        result.is_met = value >= required
+        return result.is_met
+    return check
+
+
+def _education_check(requirement: str) -> Check:
+    required_rank = _requirement_rank(requirement)
+
+    def check(applicant, state, params):
+        result = state.education
+        result.is_relevant, result.required, result.provided = True, requirement, applicant.education
+        result.is_met = education_rank(applicant.education) >= required_rank
+        return result.is_met
+    return check
+
+
+def _conditional_training_check(package: EligibilityPackage) -> Check:
+    spec = dict(package.conditional_training)
+    trigger = CONDITIONAL_TRAINING_TRIGGERS.get(spec.pop("trigger", None))
+    if trigger is None:
+        raise ValueError(f"{package.id}: unknown conditional training trigger {package.conditional_training.get('trigger')!r}.")
+    hours = {"base_training_hours": lambda a: a.base_training_hours,
+             "manager_base_training_hours": lambda a: a.manager_training_hours}
+    requirements = [(spec.pop(key), provided) for key, provided in hours.items() if key in spec]
+    if not requirements or set(spec) - MANUAL_FIELDS:
+        raise ValueError(f"{package.id}: unsupported conditional training {package.conditional_training!r}.")
+
+    def check(applicant, state, params):
+        if not trigger(applicant):
+            return True
+        result = state.conditional_training
+        result.is_relevant = True
+        result.required = " + ".join(f"{required}h" for required, _ in requirements)
+        result.provided = " + ".join(f"{provided(applicant)}h" for _, provided in requirements)
+        result.is_met = all(provided(applicant) >= required for required, provided in requirements)
+        return result.is_met
+    return check
+
+
+def _prior_qualification_check(package: EligibilityPackage) -> Optional[Check]:
+    """Prior certificates share the prior_level_4 slot: a package asks for at most one of them."""
+    if package.requires_prior_same_level_within_years is not None:
+        required, has_prior = f"sama tase ({package.requires_prior_same_level_within_years}a)", lambda a: a.has_prior_same_level
+    elif package.requires_prior_ej6_within_years is not None:
+        required, has_prior = f"EJ6 ({package.requires_prior_ej6_within_years}a)", lambda a: a.has_prior_level_6
+    elif package.requires_prior_level_4_or_specialization_exam:
+        required, has_prior = "tase 4 või eksam", lambda a: a.has_prior_level_4
+    elif package.requires_prior_level_4:
+        required, has_prior = f"tase 4 ({package.requires_prior_level_4})", lambda a: a.has_prior_level_4
+    else:
+        return None
+
+    def check(applicant, state, params):
+        held = has_prior(applicant)
+        if held is None: # No certificate data behind it: a manual check, like MANUAL_FIELDS
+            return True
+        result = state.prior_level_4
+        result.is_met = held
+        result.is_relevant, result.required, result.provided = True, required, "jah" if result.is_met else "ei"
+        return result.is_met
+    return check
+
+
+class CompiledPackage:
+    """An eligibility package reduced to its parameters and the checks that apply to it."""
+    __slots__ = ("package", "id", "route", "params", "conditional_rules", "checks")
+
+    def __init__(self, package: EligibilityPackage, route: str, params: Dict[str, Any],
+                 conditional_rules: List[Tuple[Callable[[ApplicantData], bool], Dict[str, Any]]], checks: List[Check]):
+        self.package = package
+        self.id = package.id
+        self.route = route
+        self.params = params
+        self.conditional_rules = conditional_rules
+        self.checks = checks
+
+    def __reduce__(self):
+        # The checks are closures: ship the package to worker processes and compile it there
+        return compile_package, (self.package,)
+
+    def evaluate(self, applicant: ApplicantData) -> ComplianceDashboardState:
+        params = self.params
+        for applies, overrides in self.conditional_rules:
+            if applies(applicant):
+                params = {**params, **overrides}
+        state = ComplianceDashboardState(package_id=self.id, overall_met=applicant.certification_type == self.route)
+        for check in self.checks:
+            if not check(applicant, state, params):
+                state.overall_met = False
+        state.education_old_or_foreign = applicant.is_education_old_or_foreign
+        return state
+
+
+def compile_package(package: EligibilityPackage) -> CompiledPackage:
+    """Builds the evaluation plan for one package; raises ValueError for rules it cannot evaluate."""
+    conditional_rules = [_parse_condition(package.id, rule) for rule in package.conditional_rules]
+    params = {name: getattr(package, name) for name in THRESHOLD_FIELDS}
+    if package.recert_training:
+        if package.cpd_training_hours or set(package.recert_training) - {"manager_hours", "per_activity_hours"}:
+            raise ValueError(f"{package.id}: unsupported recert training {package.recert_training!r}.")
+        # Ehitusjuhi and per-activity CPD hours are not told apart in the applicant data yet
+        params["cpd_training_hours"] = sum(package.recert_training.values())
+    # A threshold check belongs in the plan if the package or one of its conditional rules sets it
+    settable = {name for name, value in params.items() if value is not None} | {k for _, o in conditional_rules for k in o}
+
+    checks: List[Check] = []
+    if package.education_requirement:
+        checks.append(_education_check(package.education_requirement))
+    if "total_experience_years" in settable:
+        checks.append(_years_check("total_experience", "total_experience_years",
+                                   lambda a, window: a.work_experience_years_by_window.get(window, a.work_experience_years)))
+    if "matching_experience_years" in settable:
+        checks.append(_years_check("matching_experience", "matching_experience_years",
+                                   lambda a, window: a.matching_experience_years_by_window.get(window, a.matching_experience_years)))
+    if "base_training_hours" in settable:
+        checks.append(_hours_check("base_training", "base_training_hours", lambda a: a.base_training_hours))
+    if package.conditional_training:
+        checks.append(_conditional_training_check(package))
+    if "manager_base_training_hours" in settable:
+        checks.append(_hours_check("manager_training", "manager_base_training_hours", lambda a: a.manager_training_hours))
+    if "cpd_training_hours" in settable:
+        checks.append(_hours_check("cpd_training", "cpd_training_hours", lambda a: a.cpd_training_hours))
+    prior = _prior_qualification_check(package)
+    if prior:
+        checks.append(prior)
+
+    handled = set(THRESHOLD_FIELDS) | MANUAL_FIELDS | {
+        "route", "conditional_rules", "education_requirement", "conditional_training", "recert_training",
+        "requires_prior_level_4", "requires_prior_level_4_or_specialization_exam",
+        "requires_prior_ej6_within_years", "requires_prior_same_level_within_years",
+    }
+    unhandled = [f.name for f in fields(EligibilityPackage) if f.name not in handled and getattr(package, f.name)]
+    if unhandled:
+        raise ValueError(f"{package.id}: no check for {unhandled}.")
+    return CompiledPackage(package, package.route or INITIAL_ROUTE, params, conditional_rules, checks)
@@ -1,6 +1,6 @@
 # app/logic/models.py
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 @dataclass
 class ApplicantData:
@@ -13,6 +13,14 @@ class ApplicantData:
     base_training_hours: int = 0
     manager_training_hours: int = 0
     cpd_training_hours: int = 0
+    # Experience within the trailing windows rules ask for, {window_years: years}; a missing window falls back to the totals
+    work_experience_years_by_window: Dict[int, float] = field(default_factory=dict)
+    matching_experience_years_by_window: Dict[int, float] = field(default_factory=dict)
+    higher_ed_field: Optional[str] = None # "vastav" | "mittevastav"
+    certification_type: str = "esmatõendamine" # Packages with another route do not apply
+    # Prior certificates for recertification and tj5_variant_3; None = no data, left to the evaluator
+    has_prior_same_level: Optional[bool] = None
+    has_prior_level_6: Optional[bool] = None
 
 @dataclass
 class ComplianceCheck:
@@ -53,6 +61,7 @@ class ComplianceDashboardState:
     education_foreign: bool = False
     
     final_decision: Optional[str] = None
+    rule_set_hash: Optional[str] = None # rules.toml version the checks were computed with
     accepted_work_experience_ids: List[int] = field(default_factory=list)
 
 
@@ -4,27 +4,56 @@ from .models import (
     ApplicantData, Qualification, EligibilityPackage,
     ComplianceCheck, ComplianceDashboardState
 )
-from typing import List, Dict, Tuple
-import unicodedata
+from .compiled_rules import EDUCATION_HIERARCHY, CompiledPackage, compile_package
+from typing import List, Dict, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import gc
+import hashlib
+from itertools import repeat
 
 try:
     import tomllib
 except ImportError:
     import tomli as tomllib
 
-EDUCATION_HIERARCHY = {
-    "any": 0, "keskharidus": 1, "ehitustehniline_keskeriharidus": 2,
-    "mittevastav_kõrgharidus_180_eap": 3, "vastav_kõrgharidus_180_eap": 4,
-    "mittevastav_kõrgharidus_240_eap": 5, "vastav_kõrgharidus_240_eap": 6,
-    "tehniline_kõrgharidus_300_eap": 7, "mittevastav_kõrgharidus_300_eap": 8,
-    "vastav_kõrgharidus_300_eap": 9,
-}
+VALIDATE_MANY_CHUNK = 2000 # Applicants per worker task in validate_many
+
+def rule_set_hash(rules_bytes: bytes) -> str:
+    """Identifies a version of rules.toml; saved with every evaluation."""
+    return hashlib.sha256(rules_bytes).hexdigest()[:16]
 
 class ValidationEngine:
     def __init__(self, rules_path: Path):
         self.qualifications = self._load_rules(rules_path)
+        self._index_rules()
         print(f"✅ Validation engine initialized with {len(self.qualifications)} qualifications.")
 
+    def _index_rules(self):
+        self.qualifications_by_id = {q.id: q for q in self.qualifications}
+        self.packages_by_id = {q.id: {p.id: p for p in q.eligibility_packages} for q in self.qualifications}
+        # Evaluation plans, compiled once here; a rule the compiler cannot evaluate fails the load
+        self.compiled_packages = {q.id: [compile_package(p) for p in q.eligibility_packages] for q in self.qualifications}
+
+    def get_qualification(self, qualification_id: str) -> Qualification:
+        qualification = self.qualifications_by_id.get(qualification_id)
+        if not qualification:
+            raise ValueError(f"Qualification '{qualification_id}' not found in rules.")
+        return qualification
+
+    def get_compiled_packages(self, qualification_id: str) -> List[CompiledPackage]:
+        return self.compiled_packages[self.get_qualification(qualification_id).id]
+
+    def changed_packages(self, other: "ValidationEngine") -> Dict[str, set]:
+        """{qualification_id: package ids added, removed or changed in ``other``}, for qualifications with changes."""
+        changed = {}
+        for qualification_id in self.packages_by_id.keys() | other.packages_by_id.keys():
+            old = self.packages_by_id.get(qualification_id, {})
+            new = other.packages_by_id.get(qualification_id, {})
+            ids = {pid for pid in old.keys() | new.keys() if old.get(pid) != new.get(pid)}
+            if ids:
+                changed[qualification_id] = ids
+        return changed
+
     def dict_to_state(self, state_dict: Dict) -> ComplianceDashboardState:
         """
         Recursively converts a dictionary back into a ComplianceDashboardState object.
@@ -65,7 +94,9 @@ class ValidationEngine:
 
     def _load_rules(self, rules_path: Path) -> List[Qualification]:
         with open(rules_path, 'rb') as f:
-            rules_data = tomllib.load(f)
+            rules_bytes = f.read()
+        self.rule_set_hash = rule_set_hash(rules_bytes)
+        rules_data = tomllib.loads(rules_bytes.decode('utf-8'))
         
         return [
             Qualification(
@@ -76,87 +107,49 @@ class ValidationEngine:
             ) for q_data in rules_data.get('qualifications', [])
         ]
 
-    def _build_state_for_package(self, applicant: ApplicantData, package: EligibilityPackage) -> ComplianceDashboardState:
-        """Builds the complete compliance state for a single package."""
-        state = ComplianceDashboardState(package_id=package.id, overall_met=True)
-        
-        # Education
-        if package.education_requirement:
-            state.education.is_relevant = True
-            state.education.required = package.education_requirement
-            state.education.provided = applicant.education
-            
-            # Normalize strings to NFC to handle 'õ' and other chars consistently
-            req_key = unicodedata.normalize('NFC', package.education_requirement)
-            prov_key = unicodedata.normalize('NFC', applicant.education) if applicant.education else "any"
-            
-            # Debug check: verify if key exists
-            if req_key not in EDUCATION_HIERARCHY:
-                print(f"--- [WARNING] Education requirement '{req_key}' (raw: {package.education_requirement!r}) not found in hierarchy!")
-
-            required_rank = EDUCATION_HIERARCHY.get(req_key, 0)
-            provided_rank = EDUCATION_HIERARCHY.get(prov_key, 0)
-            
-            state.education.is_met = provided_rank >= required_rank
-            if not state.education.is_met: state.overall_met = False
-
-        # Total Experience
-        if package.total_experience_years is not None:
-            state.total_experience.is_relevant = True
-            state.total_experience.required = f"{package.total_experience_years}a"
-            print(f"[DEBUG] Validating Exp: {applicant.work_experience_years}")
-            state.total_experience.provided = f"{applicant.work_experience_years}a"
-            state.total_experience.is_met = applicant.work_experience_years >= package.total_experience_years
-            if not state.total_experience.is_met: state.overall_met = False
-            
-        # Matching Experience
-        if package.matching_experience_years is not None:
-            state.matching_experience.is_relevant = True
-            state.matching_experience.required = f"{package.matching_experience_years}a"
-            state.matching_experience.provided = f"{applicant.matching_experience_years}a"
-            state.matching_experience.is_met = applicant.matching_experience_years >= package.matching_experience_years
-            if not state.matching_experience.is_met: state.overall_met = False
-
-        # Base Training
-        if package.base_training_hours > 0:
-            state.base_training.is_relevant = True
-            state.base_training.required = f"{package.base_training_hours}h"
-            state.base_training.provided = f"{applicant.base_training_hours}h"
-            state.base_training.is_met = applicant.base_training_hours >= package.base_training_hours
-            if not state.base_training.is_met: state.overall_met = False
-
-        # Conditional Training
-        if package.conditional_training:
-            trigger = package.conditional_training.get("trigger")
-            if trigger == "haridus_vanem_kui_10a_või_välisriik" and applicant.is_education_old_or_foreign:
-                state.conditional_training.is_relevant = True
-                required_hours = package.conditional_training.get("base_training_hours", 0)
-                state.conditional_training.required = f"{required_hours}h"
-                state.conditional_training.provided = f"{applicant.base_training_hours}h"
-                state.conditional_training.is_met = applicant.base_training_hours >= required_hours
-                if not state.conditional_training.is_met: state.overall_met = False
-
-        # Manager Training
-        if package.manager_base_training_hours is not None and package.manager_base_training_hours > 0:
-            state.manager_training.is_relevant = True
-            state.manager_training.required = f"{package.manager_base_training_hours}h"
-            state.manager_training.provided = f"{applicant.manager_training_hours}h"
-            state.manager_training.is_met = applicant.manager_training_hours >= package.manager_base_training_hours
-            if not state.manager_training.is_met: state.overall_met = False
-
-        # ... other checks like CPD training can be added here ...
-
-        state.education_old_or_foreign = applicant.is_education_old_or_foreign
-
-        return state
-
     def validate(self, applicant: ApplicantData, qualification_id: str) -> List[ComplianceDashboardState]:
         """
         Validates an applicant against all packages and returns a list of state objects.
         """
-        qualification = next((q for q in self.qualifications if q.id == qualification_id), None)
-        if not qualification:
-            raise ValueError(f"Qualification '{qualification_id}' not found in rules.")
+        states = [package.evaluate(applicant) for package in self.get_compiled_packages(qualification_id)]
+        for state in states:
+            state.rule_set_hash = self.rule_set_hash
+        return states
 
-        all_states = [self._build_state_for_package(applicant, pkg) for pkg in qualification.eligibility_packages]
-        return all_states
\ No newline at end of file
+    def validate_many(self, applicants: Sequence[ApplicantData], qualification_id: str, workers: int = 1,
+                      chunk_size: int = VALIDATE_MANY_CHUNK, best_only: bool = False) -> List:
+        """
+        Validates a cohort against one qualification in one pass. Returns, in input
+        order, each applicant's per-package states (or only ``best_state`` of them
+        with ``best_only``). With ``workers`` > 1 and more than one chunk of
+        applicants, chunks are spread over a process pool.
+        """
+        packages = self.get_compiled_packages(qualification_id)
+        applicants = list(applicants)
+        # The states are acyclic; pausing the cyclic GC avoids repeated full scans as they pile up
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            if workers <= 1 or len(applicants) <= chunk_size:
+                return self._validate_chunk(applicants, packages, best_only)
+            chunks = [applicants[i:i + chunk_size] for i in range(0, len(applicants), chunk_size)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                return [result for chunk in pool.map(self._validate_chunk, chunks, repeat(packages), repeat(best_only))
+                        for result in chunk]
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def _validate_chunk(self, applicants: List[ApplicantData], packages: List[CompiledPackage], best_only: bool = False) -> List:
+        results = []
+        for applicant in applicants:
+            states = [package.evaluate(applicant) for package in packages]
+            for state in states:
+                state.rule_set_hash = self.rule_set_hash
+            results.append(self.best_state(states) if best_only else states)
+        return results
+
+    @staticmethod
+    def best_state(states: List[ComplianceDashboardState]) -> ComplianceDashboardState:
+        """The first package the applicant meets, else the first package."""
+        return next((s for s in states if s.overall_met), states[0])
\ No newline at end of file
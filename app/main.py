@@ -1,5 +1,7 @@
 # app/main.py
-import sys, os, json, datetime, traceback
+import sys, os, json, datetime, traceback, asyncio, mimetypes
+from urllib.parse import quote
+from contextlib import asynccontextmanager
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -12,7 +14,7 @@ from starlette.middleware.sessions import SessionMiddleware
 from starlette.routing import Mount
 from starlette.staticfiles import StaticFiles
 from starlette.requests import Request
-from starlette.responses import FileResponse, Response, RedirectResponse
+from starlette.responses import FileResponse, JSONResponse, Response, RedirectResponse, StreamingResponse
 from fastlite import NotFoundError
 
 # Core & UI
@@ -22,13 +24,25 @@ from ui.landing.page import render_landing_page
 from ui.layouts import public_layout
 
 # Logic & Auth
-from database import setup_database
+from database import setup_database, DB_FILE
 from auth.bootstrap import ensure_default_users
 from auth.guards import require_role
 from auth.middleware import AuthMiddleware
+from auth.user_cache import user_cache
 from auth.roles import ADMIN, APPLICANT, EVALUATOR, ALL_ROLES, normalize_role
-from logic.validator import ValidationEngine
+from services.application_index import ApplicationIndex
+from services.data_versions import application_version
+from services.prechecks import recheck_prechecks
+from services.rule_registry import RuleRegistry
+from services import smart_id_service
+from services.smart_id_watcher import SessionWatcher
+from services.file_storage import SIGNED_URL_TTL, SignedUrlCache, create_backend
+from services.storage import StorageService, StorageTimeout, iterate_storage, run_storage
 from utils.log import log, debug, error
+from utils.conditional_get import ConditionalGet, ConditionalGetMiddleware
+from utils.identity_map import metrics as identity_map_metrics
+from utils.db_pool import ConnectionPool, DEFAULT_READERS
+from utils.write_queue import WriteQueue
 
 # Controllers
 from controllers.auth import AuthController
@@ -53,29 +67,65 @@ debug(f"Static: {STATIC_DIR}, Uploads: {UPLOAD_DIR}")
 db = setup_database()
 if not db: raise RuntimeError("Database setup failed")
 ensure_default_users(db)
+db_pool = ConnectionPool(db, DB_FILE, readers=int(os.environ.get("DB_READERS", DEFAULT_READERS)))
+write_queue = WriteQueue(db_pool.writer)
+storage = StorageService(workers=int(os.environ.get("STORAGE_WORKERS", 8)))
+file_backend = create_backend()
+signed_urls = SignedUrlCache()
+app_index = ApplicationIndex(db) # Creates/backfills application_index once; shared by the controllers
+smart_id_watcher = SessionWatcher()
 
 # Wiring
 try:
-    val_eng = ValidationEngine(APP_DIR/'config'/'rules.toml')
-    auth_ctrl = AuthController(db)
-    qual_ctrl = QualificationController(db)
+    # Stands in for the ValidationEngine; swapped in place when rules.toml changes
+    val_eng = RuleRegistry(APP_DIR/'config'/'rules.toml')
+    auth_ctrl = AuthController(db, smart_id_watcher, app_index, write_queue)
+    qual_ctrl = QualificationController(db, app_index, write_queue)
     appl_ctrl = ApplicantController(db)
-    work_ctrl = WorkExperienceController(db)
-    train_ctrl = TrainingController(db)
-    emp_ctrl = EmploymentProofController(db)
-    doc_ctrl = DocumentsController(db)
+    work_ctrl = WorkExperienceController(db, write_queue)
+    train_ctrl = TrainingController(db, write_queue, storage, file_backend)
+    emp_ctrl = EmploymentProofController(db, write_queue, storage, file_backend)
+    doc_ctrl = DocumentsController(db, write_queue, storage, file_backend)
     rev_ctrl = ReviewController(db)
     
     # Cyclic dependencies in Evaluator controllers handled by manual linking
-    eval_search = EvaluatorSearchController(db, val_eng)
+    eval_search = EvaluatorSearchController(db, val_eng, app_index)
     eval_main = EvaluatorController(db, eval_search, None, val_eng)
-    eval_bench = EvaluatorWorkbenchController(db, val_eng, eval_main, eval_search)
+    eval_bench = EvaluatorWorkbenchController(db, val_eng, eval_main, eval_search, write_queue, app_index)
     eval_main.workbench_controller = eval_bench
     eval_main.search_controller = eval_search
     
-    dash_ctrl = DashboardController(db, appl_ctrl, eval_main)
+    dash_ctrl = DashboardController(db, appl_ctrl, eval_main, write_queue)
 except AttributeError as e: raise RuntimeError(f"Controller init failed: {e}")
 
+# Rules hot reload: prechecks of the changed qualifications are redone in the background
+@val_eng.on_change
+async def recheck_changed_rules(engine, changed):
+    with db_pool.reader() as rdb:
+        written = await recheck_prechecks(rdb, engine, changed.keys(), eval_bench.evaluation_store, eval_bench.index, write_queue)
+    log(f"Rules {engine.rule_set_hash}: {written} prechecks redone for {sorted(changed)}")
+
+@asynccontextmanager
+async def rules_watch_lifespan(app):
+    stop = asyncio.Event()
+    watch = asyncio.create_task(val_eng.watch(stop)) if os.environ.get("RULES_WATCH", "1") != "0" else None
+    await smart_id_service.open_client()
+    try: yield
+    finally:
+        stop.set()
+        if watch: await watch
+        await smart_id_watcher.close()
+        await smart_id_service.close_client()
+
+# Conditional GET: tabs and the detail panel answer 304 while their data is unchanged
+conditional_get = ConditionalGet()
+
+@conditional_get.route(r"/app/(?:taotleja|kutsed|workex|taiendkoolitus|tootamise_toend|dokumendid|ulevaatamine)")
+def applicant_tab_version(req, rdb): return () # The requester's own data version is always part of the tag
+
+@conditional_get.route(r"/evaluator/d/application/(?P<qual_id>[^/]+)")
+def application_detail_version(req, rdb, qual_id): return (*application_version(rdb, qual_id), val_eng.rule_set_hash)
+
 # App Init
 routes = []
 if STATIC_DIR.is_dir(): routes.append(Mount('/static', app=StaticFiles(directory=STATIC_DIR, html=True), name='static'))
@@ -86,9 +136,11 @@ app, rt = fast_app(
     hdrs=Theme.blue.headers(),
     middleware=[
         Middleware(SessionMiddleware, secret_key=SESSION_SECRET_KEY, max_age=14*86400),
-        Middleware(AuthMiddleware, db=db, session_secret=SESSION_SECRET_KEY),
+        Middleware(AuthMiddleware, db=db, session_secret=SESSION_SECRET_KEY, pool=db_pool, user_cache=user_cache),
+        Middleware(ConditionalGetMiddleware, conditional=conditional_get),
     ],
     routes=routes,
+    lifespan=rules_watch_lifespan,
     debug=True
 )
 
@@ -112,6 +164,9 @@ def get_smart_id_form(req): return auth_ctrl.get_login_form()
 @rt("/auth/smart-id/initiate", methods=["POST"])
 async def post_smart_id(req, national_id: str): return await auth_ctrl.initiate_smart_id(national_id)
 
+@rt("/auth/smart-id/events/{session_id:str}")
+async def get_smart_id_events(req, session_id: str): return await auth_ctrl.stream_smart_id_status(session_id)
+
 @rt("/auth/smart-id/status/{session_id:str}")
 async def get_smart_id_status(req, session_id: str): return await auth_ctrl.check_smart_id_status(req, session_id)
 
@@ -131,6 +186,16 @@ async def post_dashboard_eval(req): return await dash_ctrl.add_evaluator(req)
 @require_role(ADMIN)
 def delete_dashboard_eval(req, id_code: str): return dash_ctrl.delete_evaluator(req, id_code)
 
+@rt("/admin/metrics/db")
+@require_role(ADMIN)
+def get_db_metrics(req): return JSONResponse({"pool": db_pool.metrics(), "write_queue": write_queue.metrics(), "rules": val_eng.metrics(),
+                         "state_cache": eval_main.state_cache.metrics(),
+                         "fragment_cache": eval_main.fragment_cache.metrics(), "etag": conditional_get.metrics(),
+                         "storage": storage.metrics(), "signed_urls": signed_urls.metrics(),
+                         "identity_map": identity_map_metrics(),
+                         "user_cache": user_cache.metrics(), "smart_id": smart_id_service.metrics(),
+                         "smart_id_watcher": smart_id_watcher.metrics()})
+
 @rt("/app")
 @require_role(*G_APP)
 def get_app_root(req): return RedirectResponse("/dashboard", status_code=303)
@@ -226,7 +291,12 @@ def get_eval_app_v2(req, qual_id: str): return eval_main.show_v2_application_det
 @require_role(*G_EVAL)
 async def post_eval_search(req):
     form = await req.form()
-    return eval_search.search_applications(req, form.get("search", ""))
+    filters = {k: form.get(k) for k in ("level", "decision", "precheck")}
+    return eval_search.search_applications(req, form.get("search", ""), filters, form.get("suffix", ""))
+
+@rt("/evaluator/d/applications")
+@require_role(*G_EVAL)
+def get_eval_applications(req): return eval_search.list_applications(req)
 
 @rt("/evaluator/d/re-evaluate/{qual_id:str}", methods=["POST"])
 @require_role(*G_EVAL)
@@ -247,34 +317,43 @@ def post_eval_test_search(req, search: str = ""): return eval_main.handle_test_s
 # --- File Security ---
 @rt("/files/view/{doc_id:int}")
 @require_role(*G_APP)
-def view_secure_file(req, doc_id: int):
+async def view_secure_file(req, doc_id: int):
     # This complex logic is preserved but logging reduced and style tightened
     user = req.state.current_user
     email = user["email"]
     try:
-        doc = doc_ctrl.documents_table[doc_id]
+        rdb = getattr(req.state, "read_db", None) or db # The request's pooled reader (AuthMiddleware)
+        doc = await asyncio.to_thread(lambda: rdb.t.documents[doc_id]) # Off the event loop, like the storage calls
         if doc.get('user_email') != email and user["role"] not in {ADMIN, EVALUATOR}:
             error(f"Access denied: {email} -> {doc.get('user_email')}")
             return Response("Access Denied", 403)
         
         sid = doc.get('storage_identifier')
         if not sid: return Response("Incomplete record", 500)
-        
-        if sid.startswith("local:"):
-            if not doc_ctrl.local_storage_dir: return Response("Local storage config error", 500)
-            path = (doc_ctrl.local_storage_dir / sid.split("local:", 1)[1]).resolve()
-            # Path traversal check omitted for brevity but should be implied by `resolve` comparison in original code
-            # Re-adding simple check:
-            if doc_ctrl.local_storage_dir.resolve() not in path.parents: return Response("Invalid path", 400)
-            if not path.exists(): return Response("File not found", 404)
-            return FileResponse(path, filename=doc.get('original_filename') or path.name)
-            
-        # GCS
-        if not doc_ctrl.bucket: return Response("Cloud config error", 500)
-        blob = doc_ctrl.bucket.blob(sid)
-        if not blob.exists(): return Response("File not found", 404)
-        url = blob.generate_signed_url(version="v4", expiration=datetime.timedelta(minutes=10), method="GET")
-        return RedirectResponse(url, 307)
+        backend = doc_ctrl.backend
+        if not backend: return Response("Storage config error", 500)
+        key = backend.key(sid)
+        if key is None: return Response("File not found", 404) # Stored on a backend this deployment does not use
+        if url := signed_urls.get(sid): return RedirectResponse(url, 307)
+
+        # The row records size and hash once the upload completed; only older rows need the round trip
+        if doc.get('file_size') is None and not await run_storage(storage, "exists", backend.exists, key):
+            return Response("File not found", 404)
+        if url := await run_storage(storage, "sign", backend.sign, key, SIGNED_URL_TTL):
+            signed_urls.put(sid, url, SIGNED_URL_TTL)
+            return RedirectResponse(url, 307)
+        # No signed URLs (local disk): the app serves the file, chunk by chunk on the storage pool
+        try: chunks = await run_storage(storage, "read", backend.stream, key)
+        except FileNotFoundError: return Response("File not found", 404)
+        filename = doc.get('original_filename') or key.rsplit("/", 1)[-1]
+        return StreamingResponse(iterate_storage(storage, chunks),
+                                 media_type=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+                                 headers={"Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}"})
+    except ValueError: # Key outside the storage root
+        return Response("Invalid path", 400)
+    except StorageTimeout as e:
+        error(f"File view timeout: {e}")
+        return Response("Storage timeout", 504)
     except Exception as e:
         error(f"File view error: {e}")
         return Response("Error", 500)
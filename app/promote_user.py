@@ -4,6 +4,9 @@ The original deployment workflow executed this script to create evaluator
 accounts.  The logic now lives in :mod:`auth.bootstrap` so that it can be shared
 between the application start-up and this script.  Keeping the file means we do
 not have to update any external automation immediately.
+
+Run against a live server, role changes made here reach its user cache
+(``auth.user_cache``) once the cached entries expire (``USER_CACHE_TTL``).
 """
 
 import sys
@@ -0,0 +1,63 @@
+# app/services/applicant_data.py
+"""Builds ``ApplicantData`` (the validator's input) from the database.
+
+``load_applicant_data`` serves the evaluator views one application at a time;
+``load_cohort`` does the same for many applications with one query per table.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from logic.models import ApplicantData
+from logic.validator import EDUCATION_HIERARCHY
+from services.experience_summary import ALL_TIME, ExperienceSummary, windows_for
+
+
+def best_education(categories: Iterable[Optional[str]]) -> str:
+    """The highest-ranked education category, or "any"."""
+    return max((c or "any" for c in categories), key=lambda c: EDUCATION_HIERARCHY.get(c, 0), default="any")
+
+
+def higher_ed_field(education: str) -> Optional[str]:
+    """Whether a higher-education category is in the field ("vastav") or not ("mittevastav")."""
+    for field_match in ("mittevastav", "vastav"):
+        if education.startswith(f"{field_match}_kõrgharidus"):
+            return field_match
+    return None
+
+
+def build_applicant_data(education: str, windows: Dict[int, Tuple[float, float]]) -> ApplicantData:
+    """``windows`` as from ExperienceSummary.get_windows: {window_years: (total, matching)}."""
+    total_years, matching_years = windows[ALL_TIME]
+    # Training hours and prior level are not captured yet; these are the evaluator defaults.
+    # Prior EJ6/same-level certificates stay None (checked by the evaluator).
+    return ApplicantData(
+        education=education,
+        higher_ed_field=higher_ed_field(education),
+        work_experience_years=total_years,
+        matching_experience_years=matching_years,
+        work_experience_years_by_window={w: t for w, (t, _) in windows.items() if w != ALL_TIME},
+        matching_experience_years_by_window={w: m for w, (_, m) in windows.items() if w != ALL_TIME},
+        has_prior_level_4=True, base_training_hours=40, manager_training_hours=30,
+        cpd_training_hours=16, is_education_old_or_foreign=False
+    )
+
+
+def load_applicant_data(db, experience: ExperienceSummary, user_email: str, activity: str = None) -> ApplicantData:
+    education = best_education(r.get("education_category") for r in db.t.education("user_email=?", [user_email]))
+    return build_applicant_data(education, experience.get_windows(user_email, activity))
+
+
+def load_cohort(db, experience: ExperienceSummary, applications: List[Tuple[str, Optional[str]]]) -> List[ApplicantData]:
+    """ApplicantData for each (user_email, activity) pair, in order."""
+    emails = {email for email, _ in applications}
+    categories: Dict[str, List[str]] = {}
+    if "education_category" in {row[1] for row in db.execute("PRAGMA table_info(education)")}:
+        for email, category in db.execute("SELECT user_email, education_category FROM education"):
+            if email in emails:
+                categories.setdefault(email, []).append(category)
+    summaries = experience.get_many(emails)
+
+    cohort = []
+    for email, activity in applications:
+        windows = windows_for(summaries[email], activity)
+        cohort.append(build_applicant_data(best_education(categories.get(email, ())), windows))
+    return cohort
@@ -0,0 +1,260 @@
+# app/services/application_index.py
+"""Materialised per-application index backing the evaluator sidebar.
+
+One row per ``user_email:::level:::activity`` holds everything the application
+list needs (applicant name, specialisation count, precheck flag and final
+decision), so listing is a single indexed SELECT instead of a scan over
+``users``, ``applied_qualifications`` and ``evaluations``.  Rows are refreshed
+from the source tables by the write paths that change them.
+"""
+import base64
+import copy
+import datetime
+import json
+from typing import Dict, List, Optional, Tuple
+
+from config.qualification_data import kt
+
+QUAL_ID_SEPARATOR = ":::"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+PENDING = "none" # Filter value selecting rows without a decision / precheck
+
+_CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS application_index (
+    qual_id TEXT PRIMARY KEY,
+    user_email TEXT NOT NULL,
+    level TEXT NOT NULL,
+    qualification_name TEXT NOT NULL,
+    applicant_name TEXT,
+    specialisations TEXT,
+    specialisation_count INTEGER NOT NULL DEFAULT 0,
+    precheck_met INTEGER,
+    final_decision TEXT,
+    updated_at TEXT
+)
+"""
+
+_INDEXES_SQL = (
+    "CREATE INDEX IF NOT EXISTS ix_application_index_user_email ON application_index (user_email)",
+    "CREATE INDEX IF NOT EXISTS ix_application_index_applicant_name ON application_index (applicant_name, qual_id)",
+)
+
+# List version: a single counter bumped by every row change, so a client can tell
+# whether the list it rendered is still current.
+_VERSION_SQL = (
+    "CREATE TABLE IF NOT EXISTS application_index_version (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO application_index_version (id, version) VALUES (1, 0)",
+    *(f"CREATE TRIGGER IF NOT EXISTS trg_application_index_version_{op[:3].lower()} AFTER {op} ON application_index "
+      "BEGIN UPDATE application_index_version SET version = version + 1 WHERE id = 1; END"
+      for op in ("INSERT", "UPDATE", "DELETE")),
+)
+
+# Aggregates the source tables into index rows. The representative qualification
+# (lowest id) supplies the legacy eval_decision fallback, mirroring the old
+# in-Python flattening. Typed evaluation columns are read directly; the JSON
+# blob is only consulted for rows still in the pre-005 format.
+_SOURCE_SELECT = """
+SELECT
+    aq.user_email || ':::' || aq.level || ':::' || aq.qualification_name AS qual_id,
+    aq.user_email,
+    aq.level,
+    aq.qualification_name,
+    COALESCE(u.full_name, aq.user_email) AS applicant_name,
+    json_group_array({specialisation}) AS specialisations,
+    COUNT(*) AS specialisation_count,
+    {precheck_met} AS precheck_met,
+    COALESCE(
+        {final_decision},
+        (SELECT NULLIF({eval_decision}, '') FROM applied_qualifications r
+          WHERE r.user_email = aq.user_email AND r.level = aq.level
+            AND r.qualification_name = aq.qualification_name
+          ORDER BY r.id LIMIT 1)
+    ) AS final_decision,
+    ? AS updated_at
+FROM applied_qualifications aq
+LEFT JOIN users u ON u.email = aq.user_email
+LEFT JOIN evaluations ev
+       ON ev.qual_id = aq.user_email || ':::' || aq.level || ':::' || aq.qualification_name
+WHERE aq.level IS NOT NULL AND aq.level != ''
+  AND aq.qualification_name IS NOT NULL AND aq.qualification_name != ''
+  {where}
+GROUP BY aq.user_email, aq.level, aq.qualification_name
+"""
+
+_COLUMNS = (
+    "qual_id, user_email, level, qualification_name, applicant_name, specialisations, "
+    "specialisation_count, precheck_met, final_decision, updated_at"
+)
+
+
+def split_qual_id(qual_id: str):
+    """Returns (user_email, level, activity) for a composite qual_id."""
+    return qual_id.split(QUAL_ID_SEPARATOR, 2)
+
+
+def encode_cursor(applicant_name: str, qual_id: str) -> str:
+    raw = json.dumps([applicant_name, qual_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[str, str]]:
+    """Returns the (applicant_name, qual_id) keyset position, or None for a malformed cursor."""
+    try:
+        name, qual_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(name), str(qual_id)
+    except (ValueError, TypeError, UnicodeError):
+        return None
+
+
+class ApplicationIndex:
+    """Keeps ``application_index`` in sync with the tables it summarises."""
+
+    def __init__(self, db):
+        self.db = db
+        self.ensure()
+
+    def ensure(self) -> None:
+        """Creates the index table if needed and backfills it on first creation."""
+        is_new = "application_index" not in self.db.t
+        self.db.execute(_CREATE_SQL)
+        for sql in (*_INDEXES_SQL, *_VERSION_SQL):
+            self.db.execute(sql)
+        self.resolve_source()
+        if is_new:
+            self.rebuild()
+
+    def using(self, db) -> "ApplicationIndex":
+        """A view of this index that reads through ``db`` (e.g. a pooled read-only connection)."""
+        view = copy.copy(self)
+        view.db = db
+        return view
+
+    def rebuild(self) -> int:
+        """Recomputes every row from the source tables. Returns the row count."""
+        self.db.execute("DELETE FROM application_index")
+        self._insert_from_source("", ())
+        return self.count()
+
+    def refresh_user(self, user_email: str) -> None:
+        """Recomputes all rows of one applicant (qualifications added/removed, name change)."""
+        self.db.execute("DELETE FROM application_index WHERE user_email = ?", (user_email,))
+        self._insert_from_source("AND aq.user_email = ?", (user_email,))
+
+    def refresh_application(self, qual_id: str) -> None:
+        """Recomputes a single row (evaluation saved, decision synced)."""
+        user_email, level, activity = split_qual_id(qual_id)
+        self.db.execute("DELETE FROM application_index WHERE qual_id = ?", (qual_id,))
+        self._insert_from_source(
+            "AND aq.user_email = ? AND aq.level = ? AND aq.qualification_name = ?",
+            (user_email, level, activity),
+        )
+
+    def _insert_from_source(self, where: str, params: tuple) -> None:
+        now = str(datetime.datetime.now())
+        self.db.execute(self._insert_sql.replace("{where}", where), (now, *params))
+
+    def resolve_source(self) -> None:
+        """
+        Works out the source query for the current schema: NULL stands in for optional
+        columns an older schema lacks. Runs when the index is built; call it again after
+        adding columns to the source tables (``EvaluationStore.ensure`` on an old database).
+        """
+        cols = {row[1] for row in self.db.execute("PRAGMA table_info(applied_qualifications)")}
+        eval_cols = {row[1] for row in self.db.execute("PRAGMA table_info(evaluations)")}
+        legacy = lambda path: (f"CASE WHEN json_valid(ev.evaluation_state_json) "
+                               f"THEN json_extract(ev.evaluation_state_json, '{path}') END")
+        precheck_met, final_decision = legacy("$.overall_met"), legacy("$.final_decision")
+        if "state_format" in eval_cols:
+            precheck_met = f"CASE WHEN ev.state_format >= 2 THEN ev.overall_met ELSE {precheck_met} END"
+            final_decision = f"CASE WHEN ev.state_format >= 2 THEN ev.final_decision ELSE {final_decision} END"
+        self._insert_sql = (f"INSERT INTO application_index ({_COLUMNS}) " + _SOURCE_SELECT
+            .replace("{specialisation}", "aq.specialisation" if "specialisation" in cols else "NULL")
+            .replace("{eval_decision}", "r.eval_decision" if "eval_decision" in cols else "NULL")
+            .replace("{precheck_met}", precheck_met)
+            .replace("{final_decision}", f"NULLIF({final_decision}, '')"))
+
+    def version(self) -> int:
+        """Monotonic list version; changes whenever any index row does."""
+        return self.db.execute("SELECT version FROM application_index_version WHERE id = 1").fetchone()[0]
+
+    def count(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM application_index").fetchone()[0]
+
+    def get(self, qual_id: str) -> Optional[Dict]:
+        rows = self._select("WHERE qual_id = ?", (qual_id,))
+        return rows[0] if rows else None
+
+    def list_all(self, level: Optional[str] = None, decision: Optional[str] = None,
+                 precheck: Optional[str] = None) -> List[Dict]:
+        """All (optionally filtered) applications ordered for the sidebar (applicant name, then qual_id)."""
+        clauses, params = self._filter_clauses(level, decision, precheck)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._select(f"{where} ORDER BY applicant_name, qual_id", tuple(params))
+
+    def page(self, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, level: Optional[str] = None,
+             decision: Optional[str] = None, precheck: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Keyset-paginated slice of the sidebar ordering (applicant_name, qual_id).
+        Returns (applications, next_cursor); next_cursor is None on the last page.
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        clauses, params = self._filter_clauses(level, decision, precheck)
+        after = decode_cursor(cursor) if cursor else None
+        if after:
+            clauses.append("(applicant_name, qual_id) > (?, ?)")
+            params.extend(after)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        # Fetch one extra row to learn whether another page exists
+        rows = self._select(f"{where} ORDER BY applicant_name, qual_id LIMIT ?", (*params, limit + 1))
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1]["applicant_name"], rows[-1]["qual_id"])
+
+    @staticmethod
+    def _filter_clauses(level, decision, precheck) -> Tuple[List[str], list]:
+        """Filters: exact level, decision text or PENDING, precheck "1"/"0" or PENDING."""
+        clauses, params = [], []
+        if level:
+            clauses.append("level = ?")
+            params.append(level)
+        if decision == PENDING:
+            clauses.append("final_decision IS NULL")
+        elif decision:
+            clauses.append("final_decision = ?")
+            params.append(decision)
+        if precheck == PENDING:
+            clauses.append("precheck_met IS NULL")
+        elif precheck in ("0", "1"):
+            clauses.append("precheck_met = ?")
+            params.append(int(precheck))
+        return clauses, params
+
+    def _select(self, tail: str, params: tuple) -> List[Dict]:
+        cursor = self.db.execute(f"SELECT {_COLUMNS} FROM application_index {tail}", params)
+        return [self._to_app(dict(zip(_COLUMNS.split(", "), row))) for row in cursor]
+
+    @staticmethod
+    def _to_app(row: Dict) -> Dict:
+        """Shapes an index row into the dict consumed by the evaluator UI."""
+        level, activity = row["level"], row["qualification_name"]
+        try:
+            specialisations = json.loads(row["specialisations"] or "[]")
+        except ValueError:
+            specialisations = []
+        precheck_met = row["precheck_met"]
+        return {
+            "qual_id": row["qual_id"],
+            "user_email": row["user_email"],
+            "applicant_name": row["applicant_name"],
+            "qualification_name": activity,
+            "level": level,
+            "submission_date": "2025-10-20", # Placeholder
+            "selected_specialisations_count": row["specialisation_count"],
+            "total_specialisations": len(kt.get(level, {}).get(activity, [])),
+            "specialisations": specialisations,
+            "precheck_met": None if precheck_met is None else bool(precheck_met),
+            "final_decision": row["final_decision"],
+        }
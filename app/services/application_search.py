@@ -0,0 +1,229 @@
+# app/services/application_search.py
+"""FTS5 full-text search over the evaluator application list.
+
+``application_search`` holds one document per ``application_index`` row (same
+rowid) with the applicant name, national ID, qualification, level,
+specialisations and the applicant's work-experience companies and objects.
+Triggers on ``application_index``, ``work_experience`` and ``users`` keep it
+current, so searches never touch the source tables.
+"""
+import copy
+import json
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from services.application_index import ApplicationIndex, _COLUMNS
+
+HIGHLIGHT_START, HIGHLIGHT_END = "\x02", "\x03" # Sentinels; cannot appear in user-entered text
+DEFAULT_LIMIT = 50 # Live search shows one page; refine the query to narrow further
+
+_CREATE_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS application_search USING fts5(
+    qual_id UNINDEXED, applicant_name, national_id, qualification, level,
+    specialisations, companies, objects,
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4'
+)
+"""
+
+# Relevance weights per FTS column (name and national ID dominate): bm25() uses
+# them to pick the best candidates from the whole match set, and the Python-side
+# highlight score uses them to order those candidates.
+COLUMN_WEIGHTS = {
+    "applicant_name": 10, "national_id": 10, "qualification": 5, "level": 2,
+    "specialisations": 3, "companies": 1, "objects": 1,
+}
+_TEXT_COLUMNS = tuple(COLUMN_WEIGHTS)
+_BM25 = f"bm25(application_search, 0, {', '.join(str(w) for w in COLUMN_WEIGHTS.values())})" # 0: qual_id
+
+# Builds search documents from index rows (alias ai). Placeholders are filled
+# with NULL when an older schema lacks the source table/column.
+_DOCUMENT_SELECT = """
+SELECT ai.rowid, ai.qual_id, ai.applicant_name, {national_id}, ai.qualification_name, ai.level,
+    (SELECT group_concat(value, ' ') FROM json_each(ai.specialisations) WHERE value IS NOT NULL),
+    {companies},
+    {objects}
+FROM application_index ai
+"""
+
+_INSERT_PREFIX = ("INSERT INTO application_search (rowid, qual_id, applicant_name, national_id, qualification, "
+                  "level, specialisations, companies, objects) ")
+
+
+def to_match_query(search: str) -> Optional[str]:
+    """Turns free text into an FTS5 query: every word must match as a prefix."""
+    tokens = re.findall(r"\w+", search or "")
+    return " ".join(f'"{t}"*' for t in tokens) or None
+
+
+def fold(text: str) -> str:
+    """Case- and diacritic-folds text the way the unicode61 tokenizer does."""
+    if text.isascii():
+        return text.casefold()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def highlight(text: Optional[str], prefixes: List[str]) -> Tuple[str, int]:
+    """
+    Wraps words starting with any of the folded query prefixes in the highlight
+    sentinels. Returns (highlighted_text, number_of_prefixes_matched).
+    """
+    if not text:
+        return "", 0
+    folded = fold(text)
+    if not any(p in folded for p in prefixes): # Cheap reject for columns without a match
+        return text, 0
+    matched = set()
+    def mark(m):
+        word = fold(m.group(0))
+        hits = [p for p in prefixes if word.startswith(p)]
+        if not hits:
+            return m.group(0)
+        matched.update(hits)
+        return f"{HIGHLIGHT_START}{m.group(0)}{HIGHLIGHT_END}"
+    return re.sub(r"\w+", mark, text), len(matched)
+
+
+def split_highlight(text: Optional[str]) -> List[tuple]:
+    """Splits highlighted text into (fragment, is_match) pairs for rendering."""
+    parts = []
+    for i, chunk in enumerate(re.split(f"[{HIGHLIGHT_START}{HIGHLIGHT_END}]", text or "")):
+        if chunk:
+            parts.append((chunk, i % 2 == 1))
+    return parts
+
+
+class ApplicationSearch:
+    """Owns the ``application_search`` FTS5 table and its sync triggers."""
+
+    def __init__(self, db, index: ApplicationIndex = None):
+        self.db = db
+        self.index = index or ApplicationIndex(db)
+        self.available = True
+        self.ensure()
+
+    def ensure(self) -> None:
+        """Creates the FTS table and triggers if needed and backfills on first creation."""
+        is_new = "application_search" not in self.db.t
+        try:
+            self.db.execute(_CREATE_SQL)
+        except Exception as e: # SQLite built without FTS5
+            print(f"--- [WARN] FTS5 unavailable, falling back to substring search: {e}")
+            self.available = False
+            return
+        self._create_triggers()
+        if is_new:
+            self.rebuild()
+
+    def using(self, db) -> "ApplicationSearch":
+        """A view of this search that reads through ``db`` (e.g. a pooled read-only connection)."""
+        view = copy.copy(self)
+        view.db, view.index = db, self.index.using(db)
+        return view
+
+    def rebuild(self) -> None:
+        self.db.execute("DELETE FROM application_search")
+        self.db.execute(_INSERT_PREFIX + self._document_select())
+
+    def _columns(self, table: str) -> set:
+        return {row[1] for row in self.db.execute(f"PRAGMA table_info({table})")}
+
+    def _document_select(self) -> str:
+        user_cols, exp_cols = self._columns("users"), self._columns("work_experience")
+        national_id = ("(SELECT u.national_id_number FROM users u WHERE u.email = ai.user_email)"
+                       if "national_id_number" in user_cols else "NULL")
+        companies = objects = "NULL"
+        if "company_name" in exp_cols:
+            companies = ("(SELECT group_concat(w.company_name, ' ') FROM work_experience w "
+                         "WHERE w.user_email = ai.user_email)")
+        if {"object_address", "object_purpose"} <= exp_cols:
+            objects = ("(SELECT group_concat(COALESCE(w.object_address, '') || ' ' || COALESCE(w.object_purpose, ''), ' ') "
+                       "FROM work_experience w WHERE w.user_email = ai.user_email)")
+        return (_DOCUMENT_SELECT.replace("{national_id}", national_id)
+                .replace("{companies}", companies).replace("{objects}", objects))
+
+    def _create_triggers(self) -> None:
+        select = self._document_select()
+        refresh_user = lambda ref: (
+            f"DELETE FROM application_search WHERE rowid IN "
+            f"(SELECT rowid FROM application_index WHERE user_email = {ref}); "
+            f"{_INSERT_PREFIX}{select} WHERE ai.user_email = {ref};"
+        )
+        triggers = {
+            "trg_application_search_ai": f"AFTER INSERT ON application_index BEGIN {_INSERT_PREFIX}{select} WHERE ai.rowid = new.rowid; END",
+            "trg_application_search_ad": "AFTER DELETE ON application_index BEGIN DELETE FROM application_search WHERE rowid = old.rowid; END",
+            "trg_application_search_au": (f"AFTER UPDATE ON application_index BEGIN DELETE FROM application_search WHERE rowid = old.rowid; "
+                                          f"{_INSERT_PREFIX}{select} WHERE ai.rowid = new.rowid; END"),
+        }
+        if "work_experience" in self.db.t:
+            triggers.update({
+                "trg_application_search_we_ai": f"AFTER INSERT ON work_experience BEGIN {refresh_user('new.user_email')} END",
+                "trg_application_search_we_ad": f"AFTER DELETE ON work_experience BEGIN {refresh_user('old.user_email')} END",
+                "trg_application_search_we_au": (f"AFTER UPDATE ON work_experience BEGIN {refresh_user('old.user_email')} "
+                                                 f"{refresh_user('new.user_email')} END"),
+            })
+        if "national_id_number" in self._columns("users"):
+            triggers["trg_application_search_users_au"] = (
+                f"AFTER UPDATE OF national_id_number ON users BEGIN {refresh_user('new.email')} END")
+        for name, body in triggers.items():
+            self.db.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+    def search(self, text: str, limit: int = DEFAULT_LIMIT, **filters) -> List[Dict]:
+        """
+        Ranked matches for free text, best first. Each application carries a
+        ``highlights`` dict (applicant_name, qualification_name, snippet) with
+        HIGHLIGHT_START/END around matched words. Filters as in ApplicationIndex.page.
+        """
+        query = to_match_query(text)
+        if not query:
+            return []
+        if not self.available:
+            return self._substring_search(text, limit, **filters)
+
+        clauses, params = self.index._filter_clauses(filters.get("level"), filters.get("decision"), filters.get("precheck"))
+        filter_sql = "".join(f" AND ai.{c}" for c in clauses)
+        # Candidates: the best ``limit`` of the whole match set by weighted bm25
+        candidates = [rowid for (rowid,) in self.db.execute(
+            "SELECT s.rowid FROM application_search s JOIN application_index ai ON ai.rowid = s.rowid "
+            f"WHERE application_search MATCH ?{filter_sql} ORDER BY {_BM25} LIMIT ?", (query, *params, limit))]
+
+        rows = self.db.execute(
+            f"SELECT {', '.join('ai.' + c for c in _COLUMNS.split(', '))}, "
+            f"{', '.join('s.' + c for c in _TEXT_COLUMNS)} "
+            "FROM application_index ai JOIN application_search s ON s.rowid = ai.rowid "
+            "WHERE ai.rowid IN (SELECT value FROM json_each(?))", (json.dumps(candidates),))
+        prefixes = [fold(t) for t in re.findall(r"\w+", text)]
+        n_index = len(_COLUMNS.split(", "))
+        scored = []
+        for row in rows:
+            app = ApplicationIndex._to_app(dict(zip(_COLUMNS.split(", "), row[:n_index])))
+            app["highlights"], score = self._highlight_document(dict(zip(_TEXT_COLUMNS, row[n_index:])), prefixes)
+            scored.append((-score, app["applicant_name"] or "", app["qual_id"], app))
+        scored.sort(key=lambda item: item[:3])
+        return [app for *_, app in scored]
+
+    @staticmethod
+    def _highlight_document(document: Dict, prefixes: List[str]) -> Tuple[Dict, int]:
+        """Highlights every column; the score is the column-weighted count of matched query words."""
+        highlighted, score = {}, 0
+        for column, weight in COLUMN_WEIGHTS.items():
+            highlighted[column], matched = highlight(document.get(column), prefixes)
+            score += weight * matched
+        # Snippet: the highest-weighted other column that actually matched
+        snippet = next((highlighted[c] for c in _TEXT_COLUMNS
+                        if c not in ("applicant_name", "qualification") and HIGHLIGHT_START in highlighted[c]), "")
+        return {
+            "applicant_name": highlighted["applicant_name"],
+            "qualification_name": highlighted["qualification"],
+            "snippet": snippet,
+        }, score
+
+    def _substring_search(self, text: str, limit: int, **filters) -> List[Dict]:
+        text = text.lower()
+        return [
+            app for app in self.index.list_all(**filters) if
+            text in (app.get('applicant_name') or '').lower() or
+            text in app.get('qualification_name', '').lower() or
+            text in app.get('level', '').lower()
+        ][:limit]
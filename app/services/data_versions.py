@@ -0,0 +1,96 @@
+# app/services/data_versions.py
+"""Cheap "has anything changed" versions for an applicant's data and an application.
+
+``fragment_versions`` holds a counter per applicant that triggers bump on every
+write to the tables the applicant tabs and the evaluator's detail panel are
+built from. It catches edits that leave row counts unchanged (an updated row,
+a replaced document) as well as writes from other workers. Versions are read
+in one query and compared for equality only.
+"""
+import weakref
+from typing import Optional, Tuple
+
+# Tables rendered for an applicant, with the column naming the applicant
+SOURCE_TABLES = {
+    "users": "email",
+    "applicant_profile": "user_email",
+    "existing_qualifications": "user_email",
+    "applied_qualifications": "user_email",
+    "work_experience": "user_email",
+    "education": "user_email",
+    "training_files": "user_email",
+    "employment_proof": "user_email",
+    "documents": "user_email",
+}
+
+_CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS fragment_versions (
+    user_email TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+) WITHOUT ROWID
+"""
+
+# Per connection: the application_version query and whether fragment_versions
+# exists. Both depend on the schema, which only changes at start-up
+# (ensure_version_triggers resets them)
+_application_sql: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_has_counters: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _bump(ref: str) -> str:
+    return (f"INSERT INTO fragment_versions (user_email, version) VALUES ({ref}, 1) "
+            f"ON CONFLICT(user_email) DO UPDATE SET version = version + 1;")
+
+
+def ensure_version_triggers(db) -> None:
+    """Creates the counter table and the triggers on whichever source tables exist."""
+    db.execute(_CREATE_SQL)
+    for table, column in SOURCE_TABLES.items():
+        if table not in db.t:
+            continue
+        triggers = {
+            "ai": f"AFTER INSERT ON {table} BEGIN {_bump(f'new.{column}')} END",
+            "ad": f"AFTER DELETE ON {table} BEGIN {_bump(f'old.{column}')} END",
+            "au": f"AFTER UPDATE ON {table} BEGIN {_bump(f'old.{column}')} {_bump(f'new.{column}')} END",
+        }
+        for suffix, body in triggers.items():
+            db.execute(f"CREATE TRIGGER IF NOT EXISTS trg_fragment_versions_{table}_{suffix} {body}")
+    _application_sql.clear()
+    _has_counters.clear()
+
+
+def user_version(db, user_email: Optional[str]) -> Optional[int]:
+    """The applicant's write counter (None before their first write)."""
+    if not user_email:
+        return None
+    has_counters = _has_counters.get(db.conn)
+    if has_counters is None:
+        has_counters = _has_counters[db.conn] = "fragment_versions" in db.t
+    if not has_counters:
+        return None
+    row = db.execute("SELECT version FROM fragment_versions WHERE user_email = ?", (user_email,)).fetchone()
+    return row[0] if row else None
+
+
+def application_version(db, qual_id: str) -> Tuple:
+    """
+    (evaluation revision, evaluation updated_at, max work_experience rowid, document
+    count, applicant counter) for qual_id; tables missing in older schemas count as empty.
+    """
+    sql = _application_sql.get(db.conn)
+    if sql is None:
+        sql = _application_sql[db.conn] = _application_select(db)
+    row = db.execute(sql, {"qual_id": qual_id, "user_email": qual_id.split(":::", 1)[0]}).fetchone()
+    return tuple(row)
+
+
+def _application_select(db) -> str:
+    evaluation = "NULL, NULL"
+    if "evaluations" in db.t:
+        columns = {row[1] for row in db.execute("PRAGMA table_info(evaluations)")}
+        evaluation = ", ".join(f"(SELECT {c} FROM evaluations WHERE qual_id = :qual_id)" if c in columns else "NULL"
+                               for c in ("revision", "updated_at"))
+    max_rowid = "(SELECT MAX(rowid) FROM work_experience WHERE user_email = :user_email)" if "work_experience" in db.t else "NULL"
+    documents = "(SELECT COUNT(*) FROM documents WHERE user_email = :user_email)" if "documents" in db.t else "0"
+    counter = "(SELECT version FROM fragment_versions WHERE user_email = :user_email)" if "fragment_versions" in db.t else "NULL"
+    return f"SELECT {evaluation}, {max_rowid}, {documents}, {counter}"
@@ -0,0 +1,142 @@
+# app/services/evaluation_store.py
+"""Typed storage for evaluator ``ComplianceDashboardState``.
+
+Scalar state lives in columns on ``evaluations``; the compliance checks and the
+accepted work-experience IDs live in ``evaluation_checks`` and
+``evaluation_accepted_experience``. Rows written before migration 005 keep
+their JSON blob (``state_format`` 1) and are still readable.
+"""
+import dataclasses
+import datetime
+import json
+from typing import Dict, Iterable, Optional, Tuple
+
+from database import transaction
+from logic.models import ComplianceCheck, ComplianceDashboardState
+
+STATE_FORMAT = 2 # 1 = evaluation_state_json blob, 2 = typed columns
+
+CHECK_NAMES = tuple(f.name for f in dataclasses.fields(ComplianceDashboardState)
+                    if f.default_factory is ComplianceCheck)
+SCALAR_COLUMNS = (
+    "package_id", "overall_met", "final_decision", "certification_type",
+    "haridus_comment", "tookogemus_comment", "koolitus_comment", "otsus_comment",
+    "education_old_or_foreign", "education_10y_plus", "education_foreign", "rule_set_hash",
+)
+_CHECK_FIELDS = {f.name for f in dataclasses.fields(ComplianceCheck)}
+_BOOL_COLUMNS = {"overall_met", "education_old_or_foreign", "education_10y_plus", "education_foreign"}
+
+# Mirrors migrations/005-006 for databases (and test fixtures) created without it
+_EVALUATION_COLUMNS = {
+    "package_id": "TEXT", "overall_met": "INTEGER", "final_decision": "TEXT", "certification_type": "TEXT",
+    "haridus_comment": "TEXT", "tookogemus_comment": "TEXT", "koolitus_comment": "TEXT", "otsus_comment": "TEXT",
+    "education_old_or_foreign": "INTEGER", "education_10y_plus": "INTEGER NOT NULL DEFAULT 0",
+    "education_foreign": "INTEGER NOT NULL DEFAULT 0", "state_format": "INTEGER NOT NULL DEFAULT 1",
+    "revision": "INTEGER NOT NULL DEFAULT 0", "rule_set_hash": "TEXT",
+}
+_CHILD_TABLES_SQL = (
+    """CREATE TABLE IF NOT EXISTS evaluation_checks (
+        qual_id TEXT NOT NULL, check_name TEXT NOT NULL,
+        is_relevant INTEGER NOT NULL DEFAULT 0, is_met INTEGER NOT NULL DEFAULT 0,
+        required TEXT, provided TEXT, evaluator_comment TEXT,
+        PRIMARY KEY (qual_id, check_name)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS evaluation_accepted_experience (
+        qual_id TEXT NOT NULL, work_experience_id INTEGER NOT NULL,
+        PRIMARY KEY (qual_id, work_experience_id)
+    ) WITHOUT ROWID""",
+)
+
+
+class EvaluationStore:
+    """Loads and saves evaluation state for a ``user_email:::level:::activity`` qual_id."""
+
+    def __init__(self, db):
+        self.db = db
+        self.ensure()
+
+    def ensure(self) -> None:
+        """Adds the typed columns and child tables if the schema predates them."""
+        existing = {row[1] for row in self.db.execute("PRAGMA table_info(evaluations)")}
+        if existing:
+            for name, decl in _EVALUATION_COLUMNS.items():
+                if name not in existing:
+                    self.db.execute(f"ALTER TABLE evaluations ADD COLUMN {name} {decl}")
+        for sql in _CHILD_TABLES_SQL:
+            self.db.execute(sql)
+
+    def load(self, qual_id: str) -> Optional[Dict]:
+        """
+        Returns the saved state as a dict shaped like ``dataclasses.asdict(state)``
+        (ready for ``ValidationEngine.dict_to_state``), or None if nothing is saved.
+        """
+        row = self.db.execute(
+            f"SELECT {', '.join(SCALAR_COLUMNS)}, state_format, evaluation_state_json "
+            "FROM evaluations WHERE qual_id = ?", (qual_id,)).fetchone()
+        if row is None:
+            return None
+        *scalars, state_format, legacy_json = row
+        if state_format < STATE_FORMAT:
+            return json.loads(legacy_json) if legacy_json else None
+
+        state = {col: (None if val is None else bool(val)) if col in _BOOL_COLUMNS else val
+                 for col, val in zip(SCALAR_COLUMNS, scalars)}
+        checks = self.db.execute(
+            "SELECT check_name, is_relevant, is_met, required, provided, evaluator_comment "
+            "FROM evaluation_checks WHERE qual_id = ?", (qual_id,))
+        for name, is_relevant, is_met, required, provided, comment in checks:
+            state[name] = dict(is_relevant=bool(is_relevant), is_met=bool(is_met), required=required,
+                               provided=provided, evaluator_comment=comment)
+        state["accepted_work_experience_ids"] = [r[0] for r in self.db.execute(
+            "SELECT work_experience_id FROM evaluation_accepted_experience WHERE qual_id = ? "
+            "ORDER BY work_experience_id", (qual_id,))]
+        return state
+
+    def revision(self, qual_id: str) -> Optional[int]:
+        """The row's revision (bumped on every save), or None if nothing is saved."""
+        row = self.db.execute("SELECT revision FROM evaluations WHERE qual_id = ?", (qual_id,)).fetchone()
+        return row[0] if row else None
+
+    def save(self, qual_id: str, evaluator_email: str, state: ComplianceDashboardState) -> int:
+        """Upserts the state atomically, bumping the row's revision. Returns the new revision."""
+        with transaction(self.db):
+            return self._write(qual_id, evaluator_email, state)
+
+    def save_many(self, states: Iterable[Tuple[str, ComplianceDashboardState]], evaluator_email: str) -> int:
+        """Upserts (qual_id, state) pairs in a single transaction. Returns the number written."""
+        count = 0
+        with transaction(self.db):
+            for qual_id, state in states:
+                self._write(qual_id, evaluator_email, state)
+                count += 1
+        return count
+
+    def _write(self, qual_id: str, evaluator_email: str, state: ComplianceDashboardState) -> int:
+        values = [getattr(state, col, None) for col in SCALAR_COLUMNS]
+        values = [int(v) if isinstance(v, bool) else v for v in values]
+        assignments = ", ".join(f"{col} = excluded.{col}" for col in SCALAR_COLUMNS)
+        revision, = self.db.execute(
+            f"INSERT INTO evaluations (qual_id, evaluator_email, {', '.join(SCALAR_COLUMNS)}, "
+            "evaluation_state_json, state_format, revision, updated_at) "
+            f"VALUES (?, ?, {', '.join('?' * len(SCALAR_COLUMNS))}, NULL, ?, 1, ?) "
+            "ON CONFLICT (qual_id) DO UPDATE SET evaluator_email = excluded.evaluator_email, "
+            f"{assignments}, evaluation_state_json = NULL, state_format = excluded.state_format, "
+            "revision = evaluations.revision + 1, updated_at = excluded.updated_at RETURNING revision",
+            (qual_id, evaluator_email, *values, STATE_FORMAT, str(datetime.datetime.now()))).fetchone()
+
+        self.db.execute("DELETE FROM evaluation_checks WHERE qual_id = ?", (qual_id,))
+        for name in CHECK_NAMES:
+            check = getattr(state, name, None) or ComplianceCheck()
+            if isinstance(check, dict): # Partially hydrated state
+                check = ComplianceCheck(**{k: v for k, v in check.items() if k in _CHECK_FIELDS})
+            self.db.execute(
+                "INSERT INTO evaluation_checks (qual_id, check_name, is_relevant, is_met, required, provided, evaluator_comment) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (qual_id, name, int(bool(check.is_relevant)), int(bool(check.is_met)),
+                 check.required, check.provided, check.evaluator_comment))
+
+        self.db.execute("DELETE FROM evaluation_accepted_experience WHERE qual_id = ?", (qual_id,))
+        for exp_id in set(state.accepted_work_experience_ids or []):
+            self.db.execute("INSERT INTO evaluation_accepted_experience (qual_id, work_experience_id) VALUES (?, ?)",
+                            (qual_id, int(exp_id)))
+        return revision
@@ -0,0 +1,177 @@
+# app/services/experience_summary.py
+"""Cached work-experience totals per applicant.
+
+``applicant_experience_summary`` holds, per user, the merged-interval total over
+all work experience (``activity`` = '') and one row per associated activity,
+each for all time (``window_years`` = 0) and for the trailing windows the rules
+use ("2a viimase 5a jooksul"). Rows are computed on first lookup and dropped by
+triggers whenever the user's ``work_experience`` rows change. Windowed rows and
+the rows of users with an ongoing role (no end date) change as months pass, so
+they are only valid for the month they were computed in.
+
+On a read-only connection (a pool reader) use ``store=False``: missing rows
+are computed but not written, and the caller warms the cache on the writer
+first (``warm``) so that is the exception.
+"""
+import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from database import transaction
+from logic.helpers import calculate_total_experience_years
+
+ALL_ACTIVITIES = ""
+ALL_TIME = 0
+EXPERIENCE_WINDOWS = (5, 10) # The *_window_years used in config/rules.toml
+QUERY_CHUNK = 500 # Emails per IN (...) list when reading a cohort
+
+Summary = Dict[Tuple[str, int], float] # (activity, window_years) -> years
+
+_CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS applicant_experience_summary (
+    user_email TEXT NOT NULL,
+    activity TEXT NOT NULL,          -- '' = all work experience
+    window_years INTEGER NOT NULL,   -- 0 = all time, N = the last N years
+    years REAL NOT NULL,
+    valid_month TEXT,                -- YYYY-MM the row is valid for, NULL = until invalidated
+    computed_at TEXT NOT NULL,
+    PRIMARY KEY (user_email, activity, window_years)
+) WITHOUT ROWID
+"""
+
+
+def _month_start(value: str) -> datetime.date:
+    year, month = value.split("-")[:2]
+    return datetime.date(int(year), int(month), 1)
+
+
+def _window_start(today: datetime.date, years: int) -> datetime.date:
+    """First month of the trailing window of ``years`` years that ends with the current month."""
+    months = today.year * 12 + today.month - 1 - (years * 12 - 1)
+    return datetime.date(months // 12, months % 12 + 1, 1)
+
+
+def _chunks(items: List[str]) -> Iterable[List[str]]:
+    return (items[i:i + QUERY_CHUNK] for i in range(0, len(items), QUERY_CHUNK))
+
+
+def windows_for(summary: Summary, activity: Optional[str] = None) -> Dict[int, Tuple[float, float]]:
+    """{window_years: (total_years, matching_years)}; without an activity matching equals total."""
+    result = {}
+    for window in (ALL_TIME, *EXPERIENCE_WINDOWS):
+        total = summary.get((ALL_ACTIVITIES, window), 0.0)
+        result[window] = (total, summary.get((activity, window), 0.0) if activity else total)
+    return result
+
+
+class ExperienceSummary:
+    """Total and activity-matching experience years for an applicant, computed once per change."""
+
+    def __init__(self, db, store: bool = True):
+        self.db = db
+        self.store = store
+        if store:
+            self.ensure()
+
+    def ensure(self) -> None:
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(applicant_experience_summary)")}
+        if columns and "window_years" not in columns: # Cache table from before windows: just recreate it
+            self.db.execute("DROP TABLE applicant_experience_summary")
+        self.db.execute(_CREATE_SQL)
+        if "work_experience" not in self.db.t:
+            return
+        invalidate = lambda ref: f"DELETE FROM applicant_experience_summary WHERE user_email = {ref};"
+        triggers = {
+            "trg_experience_summary_ai": f"AFTER INSERT ON work_experience BEGIN {invalidate('new.user_email')} END",
+            "trg_experience_summary_ad": f"AFTER DELETE ON work_experience BEGIN {invalidate('old.user_email')} END",
+            "trg_experience_summary_au": (f"AFTER UPDATE ON work_experience BEGIN {invalidate('old.user_email')} "
+                                          f"{invalidate('new.user_email')} END"),
+        }
+        for name, body in triggers.items():
+            self.db.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+    def get(self, user_email: str, activity: Optional[str] = None) -> Tuple[float, float]:
+        """
+        Returns (total_years, matching_years) for the user. Without an activity the
+        matching years equal the total, as in the validator's input.
+        """
+        return self.get_windows(user_email, activity)[ALL_TIME]
+
+    def get_windows(self, user_email: str, activity: Optional[str] = None) -> Dict[int, Tuple[float, float]]:
+        """As ``get``, for all time and for each of EXPERIENCE_WINDOWS: {window_years: (total, matching)}."""
+        summary = {(a, w): years for a, w, years in self.db.execute(
+            "SELECT activity, window_years, years FROM applicant_experience_summary "
+            "WHERE user_email = ? AND activity IN (?, ?) AND (valid_month IS NULL OR valid_month = ?)",
+            (user_email, ALL_ACTIVITIES, activity or ALL_ACTIVITIES, datetime.date.today().strftime("%Y-%m")))}
+        if not self._complete(summary):
+            summary = self.refresh(user_email)
+        return windows_for(summary, activity)
+
+    def get_many(self, user_emails: Iterable[str]) -> Dict[str, Summary]:
+        """Summaries for a cohort: a read per QUERY_CHUNK users, and one refresh for those without valid rows."""
+        emails = sorted(set(user_emails))
+        summaries: Dict[str, Summary] = {email: {} for email in emails}
+        current_month = datetime.date.today().strftime("%Y-%m")
+        for chunk in _chunks(emails):
+            for user_email, activity, window, years in self.db.execute(
+                    "SELECT user_email, activity, window_years, years FROM applicant_experience_summary "
+                    f"WHERE user_email IN ({', '.join('?' * len(chunk))}) AND (valid_month IS NULL OR valid_month = ?)",
+                    (*chunk, current_month)):
+                summaries[user_email][(activity, window)] = years
+        stale = [email for email, summary in summaries.items() if not self._complete(summary)]
+        if stale:
+            summaries.update(self.refresh_many(stale))
+        return summaries
+
+    @staticmethod
+    def _complete(summary: Summary) -> bool:
+        return all((ALL_ACTIVITIES, w) in summary for w in (ALL_TIME, *EXPERIENCE_WINDOWS))
+
+    def warm(self, user_emails: Iterable[str]) -> None:
+        """Computes and stores the rows of users that have none valid (run on the writer)."""
+        self.get_many(user_emails)
+
+    def refresh(self, user_email: str) -> Summary:
+        """Recomputes the user's rows, storing them unless ``store`` is off."""
+        return self.refresh_many([user_email])[user_email]
+
+    def refresh_many(self, user_emails: List[str]) -> Dict[str, Summary]:
+        """Recomputes the rows of several users, storing them all in one transaction unless ``store`` is off."""
+        today = datetime.date.today()
+        this_month = today.replace(day=1)
+        ongoing = dict.fromkeys(user_emails, False)
+        periods: Dict[str, Dict[str, list]] = {email: {ALL_ACTIVITIES: []} for email in user_emails}
+        for chunk in _chunks(user_emails):
+            for exp in self.db.t.work_experience.rows_where(f"user_email IN ({', '.join('?' * len(chunk))})", chunk):
+                if not exp.get("start_date"):
+                    continue
+                end = exp.get("end_date")
+                ongoing[exp["user_email"]] = ongoing[exp["user_email"]] or not end
+                period = (_month_start(exp["start_date"]), _month_start(end) if end else this_month)
+                user_periods = periods[exp["user_email"]]
+                user_periods[ALL_ACTIVITIES].append(period)
+                if exp.get("associated_activity"):
+                    user_periods.setdefault(exp["associated_activity"], []).append(period)
+
+        summaries: Dict[str, Summary] = {}
+        for user_email, user_periods in periods.items():
+            summary = summaries[user_email] = {}
+            for activity, spans in user_periods.items():
+                summary[(activity, ALL_TIME)] = calculate_total_experience_years(list(spans))
+                for window in EXPERIENCE_WINDOWS:
+                    start = _window_start(today, window)
+                    clipped = [(max(s, start), e) for s, e in spans if e >= start]
+                    summary[(activity, window)] = calculate_total_experience_years(clipped)
+
+        if not self.store:
+            return summaries
+        current_month = today.strftime("%Y-%m")
+        computed_at = str(datetime.datetime.now())
+        with transaction(self.db):
+            for user_email, summary in summaries.items():
+                self.db.execute("DELETE FROM applicant_experience_summary WHERE user_email = ?", (user_email,))
+                self.db.conn.executemany(
+                    "INSERT INTO applicant_experience_summary (user_email, activity, window_years, years, valid_month, computed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(user_email, activity, window, years, current_month if window or ongoing[user_email] else None, computed_at)
+                     for (activity, window), years in summary.items()])
+        return summaries
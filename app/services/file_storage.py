@@ -0,0 +1,302 @@
+# app/services/file_storage.py
+"""Where uploaded files live: one API and one key scheme for every backend.
+
+Files are addressed by keys from ``new_key`` (``<kind>/<owner>/<uuid><ext>``),
+the same on GCS, on local disk and in the in-memory backend tests use. Rows
+store a storage identifier: the bare key on GCS (as documents always have),
+``local:<key>`` on disk and ``memory:<key>`` in memory, so ``backend.key``
+can tell whether a stored file belongs to the configured backend.
+
+Training and employment-proof files used to be written to ``uploads/`` under a
+bare file name. Those rows are stored as ``uploads:<name>`` (see
+``database.setup_database``), and ``legacy_backend`` serves that directory; the
+two upload tabs keep writing there when no backend is configured.
+
+All methods block; callers run them on the storage pool
+(``services.storage.run_storage``). ``sign`` returns a time-limited URL the
+browser can fetch directly, or None when the file has to be served through
+the app with ``stream``, which opens the file eagerly and raises
+FileNotFoundError when it is missing. ``SignedUrlCache`` keeps signed URLs per
+storage identifier so repeated views skip the signing call.
+"""
+import datetime
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterator, Optional, Tuple
+
+from google.api_core.exceptions import NotFound
+from google.cloud import storage
+from google.oauth2 import service_account
+from werkzeug.utils import secure_filename
+
+from utils.log import debug, error
+from utils.streaming_upload import GCSResumableSink, LocalFileSink, OpenSink, UploadSink
+
+GCS_BUCKET = os.environ.get("GCS_BUCKET_NAME", "your-gcs-bucket-name-here")
+ALLOW_LOCAL = os.environ.get("ALLOW_LOCAL_STORAGE_FALLBACK", "").lower() in {"1", "true", "yes"}
+LOCAL_ROOT = Path(__file__).parents[2] / "Uploads"
+LEGACY_ROOT = Path(__file__).parents[2] / "uploads"
+STREAM_CHUNK_SIZE = 256 * 1024
+PREFIXES = ("local:", "memory:", "uploads:")
+SIGNED_URL_TTL = datetime.timedelta(minutes=10)
+SIGNED_URL_MARGIN = datetime.timedelta(minutes=2) # A cached URL always has at least this long left
+
+
+def new_key(owner: str, filename: str, kind: str) -> str:
+    """A fresh key for one of ``owner``'s files; only the extension of ``filename`` is kept."""
+    ext = Path(secure_filename(filename)).suffix.lower()
+    return f"{kind}/{secure_filename(owner) or 'anonymous'}/{uuid.uuid4().hex}{ext}"
+
+
+def _read_chunks(f: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    try:
+        while chunk := f.read(chunk_size):
+            yield chunk
+    finally:
+        f.close()
+
+
+class StorageBackend:
+    """put/get/stream/sign/delete over keys; ``open_sink`` takes streamed uploads."""
+
+    prefix = ""
+
+    def identifier(self, key: str) -> str:
+        """The storage_identifier stored for ``key``."""
+        return self.prefix + key
+
+    def key(self, identifier: str) -> Optional[str]:
+        """The key behind a stored identifier, or None if it belongs to another backend."""
+        if self.prefix:
+            return identifier[len(self.prefix):] if identifier.startswith(self.prefix) else None
+        return None if identifier.startswith(PREFIXES) else identifier
+
+    def opener(self, field_name: str, owner: str, kind: str) -> OpenSink:
+        """An ``open_sink`` for ``receive_upload`` that stores files of ``field_name`` under new keys."""
+        def open_sink(name: str, filename: str, content_type: Optional[str]) -> Optional[UploadSink]:
+            if name != field_name: return None
+            return self.open_sink(new_key(owner, filename, kind), content_type)
+        return open_sink
+
+    def open_sink(self, key: str, content_type: Optional[str]) -> UploadSink: raise NotImplementedError
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None) -> None: raise NotImplementedError
+    def get(self, key: str) -> bytes: raise NotImplementedError
+    def stream(self, key: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]: raise NotImplementedError
+    def exists(self, key: str) -> bool: raise NotImplementedError
+    def sign(self, key: str, expires: datetime.timedelta) -> Optional[str]: raise NotImplementedError
+    def delete(self, key: str) -> None: raise NotImplementedError # A missing file is not an error
+
+
+class LocalBackend(StorageBackend):
+    """Files under ``root``; served through the app, never signed."""
+
+    prefix = "local:"
+
+    def __init__(self, root: Path, prefix: Optional[str] = None):
+        self.root = root.resolve() # Created by the first upload
+        if prefix is not None: self.prefix = prefix
+
+    def path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root not in path.parents: raise ValueError(f"Key outside storage root: {key}")
+        return path
+
+    def open_sink(self, key, content_type):
+        return LocalFileSink(self.path(key), self.identifier(key))
+
+    def put(self, key, data, content_type=None):
+        sink = self.open_sink(key, content_type)
+        sink.write(data)
+        sink.commit()
+
+    def get(self, key):
+        return self.path(key).read_bytes()
+
+    def stream(self, key, chunk_size=STREAM_CHUNK_SIZE):
+        return _read_chunks(open(self.path(key), "rb"), chunk_size)
+
+    def exists(self, key):
+        return self.path(key).is_file()
+
+    def sign(self, key, expires):
+        return None
+
+    def delete(self, key):
+        self.path(key).unlink(missing_ok=True)
+
+
+class GCSBackend(StorageBackend):
+    """Objects in a GCS bucket; views redirect to v4 signed URLs."""
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+
+    def open_sink(self, key, content_type):
+        return GCSResumableSink(self.bucket, key, content_type)
+
+    def put(self, key, data, content_type=None):
+        self.bucket.blob(key).upload_from_string(data, content_type=content_type)
+
+    def get(self, key):
+        return self.bucket.blob(key).download_as_bytes()
+
+    def stream(self, key, chunk_size=STREAM_CHUNK_SIZE):
+        blob = self.bucket.blob(key)
+        try:
+            blob.reload() # Fail here, not halfway through a response
+        except NotFound:
+            raise FileNotFoundError(key) from None
+        return _read_chunks(blob.open("rb", chunk_size=chunk_size), chunk_size)
+
+    def exists(self, key):
+        return self.bucket.blob(key).exists()
+
+    def sign(self, key, expires):
+        return self.bucket.blob(key).generate_signed_url(version="v4", expiration=expires, method="GET")
+
+    def delete(self, key):
+        try:
+            self.bucket.blob(key).delete()
+        except NotFound:
+            pass
+
+
+class _MemorySink:
+    def __init__(self, backend: "MemoryBackend", key: str, content_type: Optional[str]):
+        self.backend, self.key, self.content_type = backend, key, content_type
+        self.storage_identifier = backend.identifier(key)
+        self._data = bytearray()
+
+    def write(self, data: bytes) -> None:
+        self._data.extend(data)
+
+    def commit(self) -> None:
+        self.backend.put(self.key, bytes(self._data), self.content_type)
+
+    def discard(self) -> None:
+        self.backend.delete(self.key)
+
+
+class MemoryBackend(StorageBackend):
+    """In-process stand-in for tests; signs URLs like GCS unless ``signed_urls`` is False."""
+
+    prefix = "memory:"
+
+    def __init__(self, signed_urls: bool = True):
+        self.signed_urls = signed_urls
+        self.objects: Dict[str, Tuple[bytes, Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+    def open_sink(self, key, content_type):
+        return _MemorySink(self, key, content_type)
+
+    def put(self, key, data, content_type=None):
+        with self._lock:
+            self.objects[key] = (data, content_type)
+
+    def get(self, key):
+        with self._lock:
+            if key not in self.objects: raise FileNotFoundError(key)
+            return self.objects[key][0]
+
+    def stream(self, key, chunk_size=STREAM_CHUNK_SIZE):
+        data = self.get(key)
+        return (data[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+
+    def exists(self, key):
+        with self._lock:
+            return key in self.objects
+
+    def sign(self, key, expires):
+        if not self.signed_urls: return None
+        return f"https://storage.invalid/{key}?expires={int(expires.total_seconds())}"
+
+    def delete(self, key):
+        with self._lock:
+            self.objects.pop(key, None)
+
+
+class SignedUrlCache:
+    """Bounded LRU of signed URLs by storage identifier, dropped ``margin`` before they expire."""
+
+    def __init__(self, max_entries: int = 1024, margin: datetime.timedelta = SIGNED_URL_MARGIN,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.margin = margin.total_seconds()
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._metrics = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    def get(self, identifier: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(identifier)
+            if entry is None:
+                self._metrics["misses"] += 1
+                return None
+            url, valid_until = entry
+            if self.clock() >= valid_until:
+                del self._entries[identifier]
+                self._metrics["expired"] += 1
+                return None
+            self._entries.move_to_end(identifier)
+            self._metrics["hits"] += 1
+            return url
+
+    def put(self, identifier: str, url: str, expires: datetime.timedelta) -> None:
+        """Caches a URL signed just now to expire after ``expires``."""
+        valid_for = expires.total_seconds() - self.margin
+        if valid_for <= 0: return
+        with self._lock:
+            self._entries[identifier] = (url, self.clock() + valid_for)
+            self._entries.move_to_end(identifier)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._metrics["evictions"] += 1
+
+    def invalidate(self, identifier: str) -> None:
+        with self._lock:
+            self._entries.pop(identifier, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._metrics, "entries": len(self._entries)}
+
+
+def legacy_backend() -> LocalBackend:
+    """``uploads/``, where training and employment-proof files went before the shared backend."""
+    return LocalBackend(LEGACY_ROOT, prefix="uploads:")
+
+
+def resolve(identifier: str, *backends: Optional[StorageBackend]) -> Tuple[Optional[StorageBackend], Optional[str]]:
+    """The first of ``backends`` that holds ``identifier`` and its key there, or (None, None)."""
+    for backend in backends:
+        key = backend.key(identifier) if backend else None
+        if key is not None: return backend, key
+    return None, None
+
+
+def create_backend() -> Optional[StorageBackend]:
+    """GCS when a bucket is configured, local disk when the fallback is allowed, otherwise None."""
+    try:
+        if not GCS_BUCKET or "name-here" in GCS_BUCKET: raise ValueError("GCS Bucket not config")
+
+        creds = None
+        if raw := os.environ.get("GCS_SA_JSON"):
+            creds = service_account.Credentials.from_service_account_info(json.loads(raw))
+
+        client = storage.Client(credentials=creds, project=creds.project_id if creds else None)
+        debug(f"GCS connected: {GCS_BUCKET}")
+        return GCSBackend(client.bucket(GCS_BUCKET))
+    except Exception as e:
+        error(f"GCS init failed: {e}")
+        if ALLOW_LOCAL:
+            debug(f"Using local storage: {LOCAL_ROOT}")
+            return LocalBackend(LOCAL_ROOT)
+        error("Cloud storage required & local disabled")
+        return None
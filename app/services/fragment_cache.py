@@ -0,0 +1,72 @@
+# app/services/fragment_cache.py
+"""Rendered-HTML cache for the evaluator's application detail.
+
+Entries are keyed by qual_id and tagged with a content version read in one
+query: the evaluation's revision and updated_at, the applicant's highest
+``work_experience`` rowid and document count, and the applicant's write counter
+(``services.data_versions``). Re-opening an unchanged application serves the
+cached bytes.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from services.data_versions import application_version, ensure_version_triggers
+
+DEFAULT_MAX_ENTRIES = 256
+
+
+class FragmentCache:
+    """Bounded LRU of rendered fragments, valid while their content version is unchanged."""
+
+    def __init__(self, db, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db = db
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Hashable, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._metrics = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0}
+        self.ensure()
+
+    def ensure(self) -> None:
+        ensure_version_triggers(self.db)
+
+    def version(self, qual_id: str) -> Tuple:
+        """The content version of qual_id's detail panel (see ``services.data_versions``)."""
+        return application_version(self.db, qual_id)
+
+    def get(self, qual_id: str, version: Hashable) -> Optional[str]:
+        """The HTML cached for qual_id at ``version``, or None."""
+        with self._lock:
+            entry = self._entries.get(qual_id)
+            if entry and entry[0] == version:
+                self._entries.move_to_end(qual_id)
+                self._metrics["hits"] += 1
+                return entry[1]
+            self._metrics["stale" if entry else "misses"] += 1
+            self._entries.pop(qual_id, None)
+        return None
+
+    def put(self, qual_id: str, version: Hashable, html: str) -> None:
+        with self._lock:
+            self._entries[qual_id] = (version, html)
+            self._entries.move_to_end(qual_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._metrics["evictions"] += 1
+
+    def invalidate(self, qual_id: Optional[str] = None) -> None:
+        """Drops one entry, or all of them."""
+        with self._lock:
+            if qual_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(qual_id, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._metrics)
+            snapshot["size"] = len(self._entries)
+            snapshot["bytes"] = sum(len(html) for _, html in self._entries.values())
+        lookups = snapshot["hits"] + snapshot["misses"] + snapshot["stale"]
+        snapshot["hit_rate"] = round(snapshot["hits"] / lookups, 3) if lookups else None
+        return snapshot
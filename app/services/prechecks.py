@@ -0,0 +1,106 @@
+# app/services/prechecks.py
+"""Automatic prechecks: validation results saved before an evaluator opens an application.
+
+``collect_prechecks`` picks the applications to check and validates them one
+qualification at a time; the caller saves the results with
+``EvaluationStore.save_many`` (``save_prechecks``). Used by
+``scripts/populate_prechecks.py`` and, after a rules.toml change, by
+``recheck_prechecks``, which reads on a pool reader: it first warms the
+experience summaries of the affected applicants through the write queue and
+then collects with a summary that never writes.
+"""
+import asyncio
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from logic.models import ComplianceDashboardState
+from services.applicant_data import load_cohort
+from services.experience_summary import ExperienceSummary
+from utils.write_queue import run_write
+
+QUALIFICATION_LEVEL_TO_RULE_ID = {
+    "Ehituse tööjuht, TASE 5": "toojuht_tase_5",
+    "Ehitusjuht, TASE 6": "ehitusjuht_tase_6",
+}
+DEFAULT_RULE_ID = "toojuht_tase_5"
+PRECHECK_EVALUATOR = "system@auto.precheck"
+
+
+def _evaluations(db) -> Dict[str, Tuple[str, Optional[str], Optional[str]]]:
+    """{qual_id: (evaluator_email, final_decision, rule_set_hash)}, tolerating older schemas."""
+    columns = {row[1] for row in db.execute("PRAGMA table_info(evaluations)")}
+    if not columns:
+        return {}
+    select = ", ".join(c if c in columns else "NULL" for c in ("evaluator_email", "final_decision", "rule_set_hash"))
+    return {row[0]: row[1:] for row in db.execute(f"SELECT qual_id, {select} FROM evaluations")}
+
+
+def _pending(db, engine, rule_ids: Optional[Iterable[str]], recheck: bool) -> Dict[str, list]:
+    """{rule_id: [(qual_id, user_email, activity)]} of the applications ``collect_prechecks`` validates."""
+    rule_ids = set(rule_ids) if rule_ids is not None else None
+    evaluations = _evaluations(db)
+    by_rule: Dict[str, list] = {}
+    seen = set()
+    for app in db.t.applied_qualifications():
+        qual_id = f"{app.get('user_email')}:::{app.get('level')}:::{app.get('qualification_name')}"
+        if qual_id in seen:
+            continue
+        seen.add(qual_id) # One precheck per qual_id even with several specialisation rows
+        saved = evaluations.get(qual_id)
+        if saved and not (recheck and saved[0] == PRECHECK_EVALUATOR and saved[1] is None
+                          and saved[2] != engine.rule_set_hash):
+            continue
+        rule_id = QUALIFICATION_LEVEL_TO_RULE_ID.get(app.get('level'), DEFAULT_RULE_ID)
+        if rule_ids is None or rule_id in rule_ids:
+            by_rule.setdefault(rule_id, []).append((qual_id, app.get('user_email'), app.get('qualification_name')))
+    return by_rule
+
+
+def collect_prechecks(db, engine, rule_ids: Optional[Iterable[str]] = None, recheck: bool = False,
+                      workers: int = 1, experience: Optional[ExperienceSummary] = None,
+                      by_rule: Optional[Dict[str, list]] = None) -> List[Tuple[str, ComplianceDashboardState]]:
+    """
+    Validates applications without a saved evaluation and returns (qual_id, best state)
+    pairs. With ``recheck``, prechecks saved under another rule set are redone too, as
+    long as no evaluator has taken them over. ``rule_ids`` limits the qualifications.
+    """
+    if by_rule is None:
+        by_rule = _pending(db, engine, rule_ids, recheck)
+    experience = experience or ExperienceSummary(db)
+    results = []
+    for rule_id, apps in by_rule.items():
+        cohort = load_cohort(db, experience, [(email, activity) for _, email, activity in apps])
+        best_states = engine.validate_many(cohort, rule_id, workers=workers, best_only=True)
+        results.extend((qual_id, state) for (qual_id, _, _), state in zip(apps, best_states))
+    return results
+
+
+def save_prechecks(store, index, results: List[Tuple[str, ComplianceDashboardState]]) -> int:
+    """
+    Saves precheck results and refreshes their index rows, skipping applications an
+    evaluator has saved since they were collected. Returns the number written.
+    """
+    evaluations = _evaluations(store.db)
+    results = [(qual_id, state) for qual_id, state in results
+               if qual_id not in evaluations or (evaluations[qual_id][0] == PRECHECK_EVALUATOR
+                                                 and evaluations[qual_id][1] is None)]
+    written = store.save_many(results, PRECHECK_EVALUATOR)
+    for qual_id, _ in results:
+        index.refresh_application(qual_id)
+    return written
+
+
+async def recheck_prechecks(db, engine, rule_ids: Iterable[str], store, index, write_queue=None) -> int:
+    """
+    Redoes the prechecks of ``rule_ids`` saved under an older rule set. ``db`` may be a
+    read-only pool reader: summaries are written on ``store.db`` (the writer) only.
+    """
+    by_rule = await asyncio.to_thread(_pending, db, engine, rule_ids, True)
+    emails = {email for apps in by_rule.values() for _, email, _ in apps}
+    if not emails:
+        return 0
+    await run_write(write_queue, lambda: ExperienceSummary(store.db).warm(emails))
+    results = await asyncio.to_thread(collect_prechecks, db, engine, rule_ids, True,
+                                      experience=ExperienceSummary(db, store=False), by_rule=by_rule)
+    if not results:
+        return 0
+    return await run_write(write_queue, save_prechecks, store, index, results)
@@ -0,0 +1,102 @@
+# app/services/rule_registry.py
+"""
+Hot-reloadable rules.toml.
+
+``RuleRegistry`` stands in for the ``ValidationEngine`` the controllers hold:
+attribute access is forwarded to the current engine. ``watch`` follows the
+rules file; on a change the new engine is built and compiled off the event
+loop and swapped in with a single reference assignment, so requests keep
+running against whichever rule set they started with. A file that fails to
+load leaves the current rules in place.
+"""
+import asyncio
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from logic.validator import ValidationEngine
+from utils.log import debug, error
+
+try:
+    from watchfiles import awatch
+except ImportError:
+    awatch = None
+
+POLL_INTERVAL = 2.0 # Seconds between mtime checks when watchfiles is not installed
+
+# Called after a swap with the new engine and its changed packages ({qualification_id: {package_id}})
+RuleChangeListener = Callable[[ValidationEngine, Dict[str, set]], Awaitable[None]]
+
+
+class RuleRegistry:
+    """The current ValidationEngine for a rules file, reloaded when the file changes."""
+
+    def __init__(self, rules_path: Path):
+        self.rules_path = Path(rules_path)
+        self.engine = ValidationEngine(self.rules_path)
+        self.listeners: List[RuleChangeListener] = []
+        self.reloads = 0
+        self.failed_reloads = 0
+
+    def __getattr__(self, name):
+        if name == "engine": # Not set yet: don't recurse
+            raise AttributeError(name)
+        return getattr(self.engine, name)
+
+    def on_change(self, listener: RuleChangeListener) -> RuleChangeListener:
+        self.listeners.append(listener)
+        return listener
+
+    def reload(self) -> Dict[str, set]:
+        """Loads the rules file and swaps it in if its content changed. Returns the changed packages."""
+        engine = ValidationEngine(self.rules_path)
+        if engine.rule_set_hash == self.engine.rule_set_hash:
+            return {}
+        changed = self.engine.changed_packages(engine)
+        self.engine = engine
+        self.reloads += 1
+        debug(f"Rules reloaded: {engine.rule_set_hash}, changed packages {changed}")
+        return changed
+
+    async def reload_and_notify(self) -> Dict[str, set]:
+        try:
+            changed = await asyncio.to_thread(self.reload)
+        except Exception as e:
+            self.failed_reloads += 1
+            error(f"Keeping rules {self.engine.rule_set_hash}: reload of {self.rules_path} failed: {e}")
+            return {}
+        engine = self.engine
+        if changed:
+            for listener in self.listeners:
+                try:
+                    await listener(engine, changed)
+                except Exception as e:
+                    error(f"Rule change listener failed: {e} ({type(e).__name__})")
+        return changed
+
+    async def watch(self, stop_event: Optional[asyncio.Event] = None) -> None:
+        """Reloads on every change to the rules file until ``stop_event`` is set."""
+        stop_event = stop_event or asyncio.Event()
+        if awatch is not None:
+            # Watch the directory: editors replace the file rather than writing it in place
+            async for changes in awatch(self.rules_path.parent, stop_event=stop_event):
+                if any(Path(path).name == self.rules_path.name for _, path in changes):
+                    await self.reload_and_notify()
+            return
+        mtime = self._mtime()
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(stop_event.wait(), POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            if self._mtime() != mtime:
+                mtime = self._mtime()
+                await self.reload_and_notify()
+
+    def _mtime(self) -> Optional[float]:
+        try:
+            return self.rules_path.stat().st_mtime
+        except OSError:
+            return None
+
+    def metrics(self) -> Dict:
+        return {"rule_set_hash": self.engine.rule_set_hash, "reloads": self.reloads, "failed_reloads": self.failed_reloads}
@@ -1,12 +1,82 @@
 # app/services/smart_id_service.py
+"""Smart-ID RP API calls over one shared, pooled httpx client.
+
+The client is opened by the app's lifespan (``open_client``) and reused by
+every login step, so a status poll rides an existing keep-alive connection
+instead of paying a new TCP and TLS handshake. Pool limits come from the
+environment and HTTP/2 is used when the ``h2`` package is installed. Each call
+is timed per operation for ``/admin/metrics/db``. ``services.smart_id_stub``
+is a local stand-in for the API.
+"""
+import importlib.util
 import os
+import threading
+import time
 import httpx
 from typing import Optional, Dict, Any
 
+DEFAULT_BASE_URL = "https://sid.demo.sk.ee/smart-id-rp/v2/"
+STATUS_LONG_POLL_MS = 15000
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+_client: Optional[httpx.AsyncClient] = None
+_lock = threading.Lock()
+_metrics: Dict[str, Dict[str, float]] = {}
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.getenv("SMARTID_MAX_CONNECTIONS", 100)),
+        max_keepalive_connections=int(os.getenv("SMARTID_MAX_KEEPALIVE", 20)),
+        keepalive_expiry=float(os.getenv("SMARTID_KEEPALIVE_EXPIRY", 30)),
+    )
+
+
+async def open_client(transport: Optional[httpx.AsyncBaseTransport] = None, base_url: Optional[str] = None) -> httpx.AsyncClient:
+    """(Re)creates the shared client; ``transport`` lets tests route it to an in-process stub."""
+    global _client
+    await close_client()
+    base_url = base_url or os.getenv("SMARTID_API_HOST", DEFAULT_BASE_URL)
+    # The status long-poll holds the request for up to 15 s; reads get a margin on top
+    timeout = httpx.Timeout(STATUS_LONG_POLL_MS / 1000 + 5, connect=5.0)
+    _client = httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=_limits(),
+                                http2=HTTP2 and transport is None, transport=transport)
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+
+
 async def get_client() -> httpx.AsyncClient:
-    """Creates and returns an httpx client with the correct base URL and a reasonable timeout."""
-    base_url = os.getenv("SMARTID_API_HOST", "https://sid.demo.sk.ee/smart-id-rp/v2/")
-    return httpx.AsyncClient(base_url=base_url, timeout=20.0)
+    """Returns the shared client, opening it on first use (scripts, or before the lifespan ran)."""
+    if _client is None or _client.is_closed:
+        return await open_client()
+    return _client
+
+
+def _record(operation: str, outcome: str, start: float) -> None:
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    with _lock:
+        m = _metrics.setdefault(operation, {"calls": 0, "errors": 0, "timeouts": 0, "ms_total": 0.0, "ms_max": 0.0})
+        m["calls"] += 1
+        if outcome != "ok":
+            m[outcome] += 1
+        m["ms_total"] += elapsed_ms
+        m["ms_max"] = max(m["ms_max"], elapsed_ms)
+
+
+def metrics() -> Dict[str, Any]:
+    limits = _limits()
+    with _lock:
+        operations = {op: {**m, "ms_avg": m["ms_total"] / m["calls"] if m["calls"] else 0.0} for op, m in _metrics.items()}
+    return {"http2": HTTP2, "open": _client is not None and not _client.is_closed,
+            "max_connections": limits.max_connections, "max_keepalive": limits.max_keepalive_connections,
+            "operations": operations}
+
 
 async def initiate_authentication(national_id: str, encoded_hash: str, country_code: str = "EE") -> Optional[Dict[str, Any]]:
     """Initiates an authentication session with the Smart-ID API."""
@@ -14,27 +84,29 @@ async def initiate_authentication(national_id: str, encoded_hash: str, country_c
     relying_party_name = os.getenv("SMARTID_RP_NAME", "DEMO")
 
     endpoint = f"authentication/etsi/PNO{country_code}-{national_id}"
-    
+
     payload = {
-        "relyingPartyUUID": relying_party_uuid, 
+        "relyingPartyUUID": relying_party_uuid,
         "relyingPartyName": relying_party_name,
         "hash": encoded_hash,
         "hashType": "SHA256",
         "nonce": "KUTS2-DEMO-NONCE",
         # THE FIX: Remove the certificateLevel parameter to allow the service to use the default.
-        # "certificateLevel": "QUALIFIED", 
+        # "certificateLevel": "QUALIFIED",
         "allowedInteractionsOrder": [{"type": "displayTextAndPIN", "displayText60": "Log in to Kuts2?"}],
         "requestProperties": {
             "shareMdClientIpAddress": True
         }
     }
 
+    start, outcome = time.perf_counter(), "errors"
     try:
-        async with await get_client() as client:
-            response = await client.post(endpoint, json=payload)
-            response.raise_for_status()
-        
+        client = await get_client()
+        response = await client.post(endpoint, json=payload)
+        response.raise_for_status()
+
         response_data = response.json()
+        outcome = "ok"
         print(f"--- SUCCESS [Smart-ID Service]: Initiated session {response_data.get('sessionID')} ---")
         return response_data
 
@@ -44,7 +116,9 @@ async def initiate_authentication(national_id: str, encoded_hash: str, country_c
         print(f"--- ERROR [Smart-ID Service]: Network connection error: {e} ---")
     except Exception as e:
         print(f"--- ERROR [Smart-ID Service]: An unexpected error occurred during initiation: {e} ---")
-    
+    finally:
+        _record("initiate", outcome, start)
+
     return None
 
 async def check_session_status(session_id: str) -> Optional[Dict[str, Any]]:
@@ -54,25 +128,30 @@ async def check_session_status(session_id: str) -> Optional[Dict[str, Any]]:
     if not session_id:
         return None
 
-    endpoint = f"session/{session_id}?timeoutMs=15000"
+    endpoint = f"session/{session_id}?timeoutMs={STATUS_LONG_POLL_MS}"
 
+    start, outcome = time.perf_counter(), "errors"
     try:
-        async with await get_client() as client:
-            response = await client.get(endpoint)
-            response.raise_for_status()
-        
+        client = await get_client()
+        response = await client.get(endpoint)
+        response.raise_for_status()
+
         status_data = response.json()
+        outcome = "ok"
         print(f"--- INFO [Smart-ID Service]: Checked status for session {session_id}. State: {status_data.get('state')} ---")
         return status_data
 
     except httpx.HTTPStatusError as e:
         print(f"--- ERROR [Smart-ID Service]: HTTP error checking status: {e.response.status_code} - Body: {e.response.text} ---")
     except httpx.ReadTimeout:
+        outcome = "timeouts"
         print(f"--- INFO [Smart-ID Service]: Long-poll timeout for session {session_id}. Continuing to poll. ---")
         return {"state": "RUNNING"}
     except httpx.RequestError as e:
         print(f"--- ERROR [Smart-ID Service]: Network connection error while checking status: {e} ---")
     except Exception as e:
         print(f"--- ERROR [Smart-ID Service]: An unexpected error occurred checking status: {e} ---")
+    finally:
+        _record("status", outcome, start)
 
-    return None
\ No newline at end of file
+    return None
@@ -0,0 +1,99 @@
+# app/services/smart_id_stub.py
+"""Local stand-in for the Smart-ID RP API, for development and load tests.
+
+Implements the two calls the app makes: starting an authentication and the
+session status long-poll. Every session completes ``delay`` seconds after it
+was started with a self-signed certificate naming the person, so a full login
+runs against it. ``/stats`` reports requests and the distinct client
+connections seen, which shows whether the caller reuses connections.
+
+    python app/services/smart_id_stub.py [port] [delay]
+    SMARTID_API_HOST=http://127.0.0.1:8089/ python app/main.py
+"""
+import asyncio
+import base64
+import datetime
+import sys
+import time
+import uuid
+from typing import Dict, Set, Tuple
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+DEFAULT_DELAY = 2.0
+_key = ec.generate_private_key(ec.SECP256R1())
+
+
+def certificate(national_id: str, given_name: str = "MARI", surname: str = "MAASIKAS") -> str:
+    """Base64 DER of a self-signed certificate with the subject fields Smart-ID returns."""
+    subject = x509.Name([
+        x509.NameAttribute(NameOID.COUNTRY_NAME, "EE"),
+        x509.NameAttribute(NameOID.COMMON_NAME, f"{surname},{given_name},PNOEE-{national_id}"),
+        x509.NameAttribute(NameOID.SURNAME, surname),
+        x509.NameAttribute(NameOID.GIVEN_NAME, given_name),
+        x509.NameAttribute(NameOID.SERIAL_NUMBER, f"PNOEE-{national_id}"),
+    ])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(subject).issuer_name(subject).public_key(_key.public_key())
+            .serial_number(x509.random_serial_number()).not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+            .sign(_key, hashes.SHA256()))
+    return base64.b64encode(cert.public_bytes(serialization.Encoding.DER)).decode()
+
+
+def create_app(delay: float = DEFAULT_DELAY) -> Starlette:
+    sessions: Dict[str, Tuple[str, float]] = {} # sessionID -> (national id, completes at)
+    stats = {"requests": 0}
+    connections: Set[Tuple[str, int]] = set()
+
+    def seen(request: Request) -> None:
+        stats["requests"] += 1
+        if request.client:
+            connections.add((request.client.host, request.client.port))
+
+    async def authenticate(request: Request):
+        seen(request)
+        semantics = request.path_params["semantics"] # PNOEE-<national id>
+        session_id = str(uuid.uuid4())
+        sessions[session_id] = (semantics.split("-", 1)[-1], time.monotonic() + delay)
+        return JSONResponse({"sessionID": session_id})
+
+    async def status(request: Request):
+        seen(request)
+        session = sessions.get(request.path_params["session_id"])
+        if session is None:
+            return JSONResponse({"title": "Session not found"}, status_code=404)
+        national_id, completes_at = session
+        timeout = int(request.query_params.get("timeoutMs", 1000)) / 1000
+        remaining = completes_at - time.monotonic()
+        if remaining > 0:
+            await asyncio.sleep(min(remaining, timeout))
+            if remaining > timeout:
+                return JSONResponse({"state": "RUNNING"})
+        return JSONResponse({
+            "state": "COMPLETE",
+            "result": {"endResult": "OK", "documentNumber": f"PNOEE-{national_id}-MOCK-Q"},
+            "cert": {"value": certificate(national_id), "certificateLevel": "QUALIFIED"},
+            "interactionFlowUsed": "displayTextAndPIN",
+        })
+
+    async def get_stats(request: Request):
+        return JSONResponse({**stats, "connections": len(connections), "sessions": len(sessions)})
+
+    return Starlette(routes=[
+        Route("/authentication/etsi/{semantics}", authenticate, methods=["POST"]),
+        Route("/session/{session_id}", status),
+        Route("/stats", get_stats),
+    ])
+
+
+if __name__ == "__main__":
+    import uvicorn
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8089
+    uvicorn.run(create_app(float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_DELAY), host="127.0.0.1", port=port)
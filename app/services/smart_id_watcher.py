@@ -0,0 +1,125 @@
+# app/services/smart_id_watcher.py
+"""One server-side watcher task per Smart-ID session.
+
+The watcher long-polls the session status upstream until it leaves RUNNING and
+keeps the final status for ``result_ttl`` seconds. Everything that asks about
+a session (the SSE stream the login page listens on, the status route that
+completes the login, a stale page still polling) waits on the same task, so a
+session costs one upstream long-poll at a time however often it is asked.
+
+At most ``max_polls`` long-polls run at once; further sessions queue for a
+slot. Past ``max_sessions`` unfinished sessions ``watch`` raises
+``WatcherBusy`` and the login form asks the user to retry instead of starting
+another Smart-ID session.
+"""
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from services import smart_id_service
+from utils.log import error
+
+Status = Optional[Dict[str, Any]]
+
+
+class WatcherBusy(Exception):
+    """Too many Smart-ID sessions are being watched; the caller should retry later."""
+
+
+class SessionWatcher:
+    """Shared status tasks by Smart-ID session id, with bounded upstream concurrency."""
+
+    def __init__(self, poll: Callable[[str], Awaitable[Status]] = smart_id_service.check_session_status,
+                 max_polls: int = int(os.environ.get("SMARTID_MAX_POLLS", 50)),
+                 max_sessions: int = int(os.environ.get("SMARTID_MAX_SESSIONS", 500)),
+                 session_timeout: float = 180.0, result_ttl: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.poll = poll
+        self.max_polls = max_polls
+        self.max_sessions = max_sessions
+        self.session_timeout = session_timeout
+        self.result_ttl = result_ttl
+        self.clock = clock
+        self._tasks: Dict[str, Tuple[asyncio.Task, float]] = {} # session id -> (task, finished at)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._polling = 0
+        self._metrics = {"sessions": 0, "joined": 0, "rejected": 0, "polls": 0, "polls_max": 0,
+                         "completed": 0, "failed": 0, "timed_out": 0}
+
+    def _pending(self) -> int:
+        return sum(1 for task, _ in self._tasks.values() if not task.done())
+
+    def _prune(self) -> None:
+        now = self.clock()
+        for session_id, (task, finished_at) in list(self._tasks.items()):
+            if task.done() and now - finished_at >= self.result_ttl:
+                del self._tasks[session_id]
+
+    def full(self) -> bool:
+        self._prune()
+        return self._pending() >= self.max_sessions
+
+    def watch(self, session_id: str) -> asyncio.Task:
+        """The session's watcher task, started on first use; its result is the final status or None."""
+        self._prune()
+        if session_id in self._tasks:
+            self._metrics["joined"] += 1
+            return self._tasks[session_id][0]
+        if self._pending() >= self.max_sessions:
+            self._metrics["rejected"] += 1
+            raise WatcherBusy(f"{self.max_sessions} Smart-ID sessions already pending")
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_polls)
+        task = asyncio.create_task(self._run(session_id))
+        self._tasks[session_id] = (task, float("inf"))
+        task.add_done_callback(lambda t: self._finished(session_id, t))
+        self._metrics["sessions"] += 1
+        return task
+
+    def _finished(self, session_id: str, task: asyncio.Task) -> None:
+        if self._tasks.get(session_id, (None,))[0] is task:
+            self._tasks[session_id] = (task, self.clock())
+
+    async def _run(self, session_id: str) -> Status:
+        deadline = self.clock() + self.session_timeout
+        while True:
+            async with self._slots:
+                self._polling += 1
+                self._metrics["polls"] += 1
+                self._metrics["polls_max"] = max(self._metrics["polls_max"], self._polling)
+                try:
+                    status = await self.poll(session_id)
+                except Exception as e:
+                    error(f"Smart-ID watcher for {session_id} failed: {e}")
+                    status = None
+                finally:
+                    self._polling -= 1
+            if status is None:
+                self._metrics["failed"] += 1
+                return None
+            if status.get("state") != "RUNNING":
+                self._metrics["completed"] += 1
+                return status
+            if self.clock() >= deadline:
+                self._metrics["timed_out"] += 1
+                return {"state": "TIMEOUT"}
+
+    async def status(self, session_id: str, wait: float) -> Status:
+        """The final status if it arrives within ``wait`` seconds, else ``{"state": "RUNNING"}``."""
+        task = self.watch(session_id)
+        done, _ = await asyncio.wait({task}, timeout=wait)
+        return task.result() if done else {"state": "RUNNING"}
+
+    async def close(self) -> None:
+        """Cancels unfinished watchers (app shutdown); their tasks belong to the closing loop."""
+        tasks = [task for task, _ in self._tasks.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._slots = None
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self._metrics, "pending": self._pending(), "polling": self._polling,
+                "max_polls": self.max_polls, "max_sessions": self.max_sessions}
@@ -0,0 +1,82 @@
+# app/services/state_cache.py
+"""Bounded LRU of hydrated ``ComplianceDashboardState`` objects, keyed by qual_id.
+
+Entries are tagged with the ``evaluations.revision`` they were loaded or saved
+at. A lookup reads only that revision (a primary-key probe) and reuses the
+cached state when it matches, so a save by another worker or through another
+code path is picked up on the next request without any messaging. Saves made
+through ``put`` write through, so the following click is a hit.
+"""
+import dataclasses
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from logic.models import ComplianceCheck, ComplianceDashboardState
+
+DEFAULT_MAX_ENTRIES = 512
+
+
+def copy_state(state: ComplianceDashboardState) -> ComplianceDashboardState:
+    """A copy callers may mutate without touching the cached object."""
+    checks = {f.name: dataclasses.replace(getattr(state, f.name)) for f in dataclasses.fields(state)
+              if isinstance(getattr(state, f.name), ComplianceCheck)}
+    return dataclasses.replace(state, **checks, accepted_work_experience_ids=list(state.accepted_work_experience_ids or []))
+
+
+class EvaluationStateCache:
+    """Revision-checked LRU in front of ``EvaluationStore.load`` + ``dict_to_state``."""
+
+    def __init__(self, store, validation_engine, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.store = store
+        self.validation_engine = validation_engine
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[ComplianceDashboardState, int]]" = OrderedDict()
+        self._lock = threading.Lock() # Write-through runs on the write queue's thread
+        self._metrics = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0}
+
+    def get(self, qual_id: str) -> Optional[ComplianceDashboardState]:
+        """The saved state for qual_id (a private copy), or None if nothing is saved."""
+        revision = self.store.revision(qual_id)
+        with self._lock:
+            entry = self._entries.get(qual_id)
+            if entry and entry[1] == revision:
+                self._entries.move_to_end(qual_id)
+                self._metrics["hits"] += 1
+                return copy_state(entry[0])
+            self._metrics["stale" if entry else "misses"] += 1
+            self._entries.pop(qual_id, None)
+        if revision is None:
+            return None
+
+        data = self.store.load(qual_id)
+        if not data:
+            return None
+        state = self.validation_engine.dict_to_state(data)
+        self.put(qual_id, state, revision)
+        return copy_state(state)
+
+    def put(self, qual_id: str, state: ComplianceDashboardState, revision: int) -> None:
+        """Caches (a copy of) the state as saved at ``revision``."""
+        with self._lock:
+            self._entries[qual_id] = (copy_state(state), revision)
+            self._entries.move_to_end(qual_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._metrics["evictions"] += 1
+
+    def invalidate(self, qual_id: Optional[str] = None) -> None:
+        """Drops one entry, or all of them."""
+        with self._lock:
+            if qual_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(qual_id, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._metrics)
+            snapshot["size"] = len(self._entries)
+        lookups = snapshot["hits"] + snapshot["misses"] + snapshot["stale"]
+        snapshot["hit_rate"] = round(snapshot["hits"] / lookups, 3) if lookups else None
+        return snapshot
@@ -0,0 +1,104 @@
+# app/services/storage.py
+"""Async access to blocking storage calls (GCS, local disk).
+
+Every call runs on a small dedicated thread pool, so a slow GCS request ties
+up one of ``workers`` threads instead of the event loop, and the default
+executor (used by ``asyncio.to_thread`` and sync routes) is left alone. Each
+operation has a timeout covering both the wait for a free thread and the call
+itself; a timed-out call cannot be interrupted and finishes in the background,
+but the request gets ``StorageTimeout`` straight away. Per-operation counts,
+errors, timeouts and latencies are kept for ``/admin/metrics/db``.
+"""
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+DEFAULT_WORKERS = 8
+DEFAULT_TIMEOUT = 30.0
+OPERATION_TIMEOUTS = {
+    "exists": 5.0,
+    "sign": 5.0,
+    "upload": 60.0, # One request chunk, or a resumable-upload finalisation
+    "discard": 15.0,
+    "read": 15.0, # One chunk of a file served through the app
+}
+
+
+class StorageTimeout(Exception):
+    def __init__(self, operation: str, timeout: float):
+        super().__init__(f"Storage {operation} did not finish within {timeout:g}s")
+        self.operation = operation
+
+
+class StorageService:
+    """Bounded thread pool for storage I/O with per-operation timeouts and metrics."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, timeouts: Optional[Dict[str, float]] = None):
+        self.workers = workers
+        self.timeouts = {**OPERATION_TIMEOUTS, **(timeouts or {})}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="storage")
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+        self._in_flight = 0
+
+    async def run(self, operation: str, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Runs ``fn(*args, **kwargs)`` on the storage pool; raises StorageTimeout past the operation's limit."""
+        timeout = timeout if timeout is not None else self.timeouts.get(operation, DEFAULT_TIMEOUT)
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        with self._lock:
+            self._in_flight += 1
+        outcome = "ok"
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs)), timeout)
+        except asyncio.TimeoutError:
+            outcome = "timeouts"
+            raise StorageTimeout(operation, timeout) from None
+        except Exception:
+            outcome = "errors"
+            raise
+        finally:
+            self._record(operation, outcome, (time.perf_counter() - start) * 1000)
+
+    def _record(self, operation: str, outcome: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            m = self._metrics.setdefault(operation, {"calls": 0, "errors": 0, "timeouts": 0, "ms_total": 0.0, "ms_max": 0.0})
+            m["calls"] += 1
+            if outcome != "ok":
+                m[outcome] += 1
+            m["ms_total"] += elapsed_ms
+            m["ms_max"] = max(m["ms_max"], elapsed_ms)
+
+    def runner(self, operation: str) -> Callable[..., Any]:
+        """``run`` bound to one operation, for helpers that take a ``run(fn, *args)`` coroutine function."""
+        return functools.partial(self.run, operation)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            operations = {op: {**m, "ms_avg": m["ms_total"] / m["calls"] if m["calls"] else 0.0}
+                          for op, m in self._metrics.items()}
+            return {"workers": self.workers, "in_flight": self._in_flight, "operations": operations}
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_storage(storage: Optional[StorageService], operation: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Runs ``fn`` on ``storage``'s pool when one is configured, in the default thread pool otherwise."""
+    if storage is None:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return await storage.run(operation, fn, *args, **kwargs)
+
+
+async def iterate_storage(storage: Optional[StorageService], chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """Pulls a blocking chunk iterator (``StorageBackend.stream``) one chunk at a time on the storage pool."""
+    try:
+        while (chunk := await run_storage(storage, "read", next, chunks, None)) is not None:
+            yield chunk
+    finally:
+        close = getattr(chunks, "close", None)
+        if close: await run_storage(storage, "read", close)
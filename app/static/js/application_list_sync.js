@@ -0,0 +1,30 @@
+// app/static/js/application_list_sync.js
+// Keeps the evaluator sidebar lists in step with the server-side list version.
+// Responses send an HX-Trigger "applicationListVersion" event:
+//   {version, base}   -> the response patched one item, moving the list from base to version
+//   {version, suffix} -> the response reloaded the container with that id suffix
+// A list whose stamp is not the patch's base missed other changes and is reloaded.
+(function () {
+    const CONTAINER_PREFIX = 'application-list-container';
+
+    function reloadList(container) {
+        const suffix = container.id.slice(CONTAINER_PREFIX.length);
+        const input = document.getElementById('search-input' + suffix);
+        // The search input re-posts the search text and filters of its own form
+        if (input && window.htmx) htmx.trigger(input, 'search');
+    }
+
+    document.body.addEventListener('applicationListVersion', function (evt) {
+        const detail = evt.detail || {};
+        document.querySelectorAll('[data-list-version]').forEach(function (container) {
+            const suffix = container.id.slice(CONTAINER_PREFIX.length);
+            if (detail.base === undefined) {
+                if (detail.suffix === suffix) container.dataset.listVersion = detail.version;
+            } else if (String(detail.base) === container.dataset.listVersion) {
+                container.dataset.listVersion = detail.version;
+            } else {
+                reloadList(container);
+            }
+        });
+    });
+})();
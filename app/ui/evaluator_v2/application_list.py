@@ -1,19 +1,33 @@
 # klmrgrss/kuts2/kuts2-eval/app/ui/evaluator_v2/application_list.py
 from fasthtml.common import *
 from monsterui.all import *
-from typing import List, Dict
+from typing import List, Dict, Optional
+from urllib.parse import urlencode
 from ui.shared_components import LevelPill
 from config.qualification_data import QUALIFICATION_LEVEL_STYLES
+from services.application_index import PENDING
+from services.application_search import split_highlight
+from fasthtml.components import Select as NativeSelect
 import hashlib
+import json
 
-def get_safe_dom_id(qual_id: str) -> str:
-    """Returns a CSS-safe ID for DOM elements."""
-    return "app-" + hashlib.md5(qual_id.encode()).hexdigest()
+APPLICATION_PAGE_URL = "/evaluator/d/applications"
 
-def render_application_item(app: Dict, include_oob: bool = True, active_qual_id: str = None) -> FT:
+LIST_CONTAINER_SUFFIXES = ("", "-drawer") # Desktop sidebar and mobile drawer
+
+def get_safe_dom_id(qual_id: str, id_suffix: str = "") -> str:
+    """Returns a CSS-safe ID for DOM elements, unique per list container via id_suffix."""
+    return "app-" + hashlib.md5(qual_id.encode()).hexdigest() + id_suffix
+
+def render_highlighted(text: str) -> tuple:
+    """Renders FTS highlight output, wrapping matched fragments in <mark>."""
+    return tuple(Mark(chunk, cls="bg-yellow-200 dark:bg-yellow-700 rounded-sm") if is_match else chunk
+                 for chunk, is_match in split_highlight(text))
+
+def render_application_item(app: Dict, include_oob: bool = True, active_qual_id: str = None, id_suffix: str = "") -> FT:
     """Renders a single application list item."""
     qual_id = app.get('qual_id', '')
-    dom_id = get_safe_dom_id(qual_id)
+    dom_id = get_safe_dom_id(qual_id, id_suffix)
     
     is_active = (qual_id == active_qual_id)
     base_cls = "block p-3 border-b hover:bg-gray-100 dark:hover:bg-gray-800 dark:border-gray-700 focus:outline-none transition-colors"
@@ -43,11 +57,23 @@ def render_application_item(app: Dict, include_oob: bool = True, active_qual_id:
     
     level_abbr = QUALIFICATION_LEVEL_STYLES.get(app.get('level'), {}).get('abbr', 'N/A')
     qual_name = app.get('qualification_name', 'N/A')
-    
+    name_parts, qual_parts = (app.get('applicant_name', 'N/A'),), (qual_name,)
+
+    # Search results carry highlighted fields; show a snippet when the match is elsewhere (ID, company, object)
+    highlights = app.get('highlights') or {}
+    snippet_line = None
+    if highlights:
+        name_parts = render_highlighted(highlights.get('applicant_name')) or name_parts
+        qual_parts = render_highlighted(highlights.get('qualification_name')) or qual_parts
+        matched_in_title = any(is_match for field in ('applicant_name', 'qualification_name')
+                               for _, is_match in split_highlight(highlights.get(field)))
+        if not matched_in_title and highlights.get('snippet'):
+            snippet_line = P(*render_highlighted(highlights['snippet']), cls="text-xs text-gray-500 truncate")
+
     # --- REVISED STRUCTURE for correct truncation ---
     second_line_content = Div(
         # This span takes up the available space and allows the text inside to be truncated
-        Span(f"{level_abbr} / {qual_name}", cls="truncate"),
+        Span(f"{level_abbr} / ", *qual_parts, cls="truncate"),
         # The parent div is a flex container
         cls="flex justify-between items-baseline text-xs text-gray-600 dark:text-gray-400"
     )
@@ -87,10 +113,11 @@ def render_application_item(app: Dict, include_oob: bool = True, active_qual_id:
             # Text Content
             Div(
                 Div(
-                    P(app.get('applicant_name', 'N/A'), cls="font-semibold text-sm truncate"),
+                    P(*name_parts, cls="font-semibold text-sm truncate"),
                     cls="flex justify-between items-baseline"
                 ),
-                second_line_content, 
+                second_line_content,
+                snippet_line,
                 cls="flex-grow min-w-0"
             ),
             cls="flex items-center"
@@ -99,7 +126,7 @@ def render_application_item(app: Dict, include_oob: bool = True, active_qual_id:
         **attrs
     )
 
-def render_application_list(applications: List[Dict], include_oob: bool = True, active_qual_id: str = None) -> FT:
+def render_application_list(applications: List[Dict], include_oob: bool = True, active_qual_id: str = None, id_suffix: str = "") -> FT:
     """
     Renders the list of application items.
     Conditionally includes the hx_swap_oob attribute.
@@ -107,5 +134,82 @@ def render_application_list(applications: List[Dict], include_oob: bool = True,
     if not applications:
         return P("No applications found.", cls="p-4 text-center text-gray-500")
 
-    application_items = [render_application_item(app, include_oob, active_qual_id) for app in applications]
-    return tuple(application_items)
\ No newline at end of file
+    application_items = [render_application_item(app, include_oob, active_qual_id, id_suffix) for app in applications]
+    return tuple(application_items)
+
+LIST_VERSION_EVENT = "applicationListVersion" # Handled by static/js/application_list_sync.js
+
+def list_version_header(version: int, base_version: int = None, id_suffix: str = None):
+    """
+    HX-Trigger carrying the list version. With base_version the response patched the list
+    from base_version to version; without it the response reloaded the id_suffix container.
+    """
+    detail = {"version": version}
+    if base_version is not None: detail["base"] = base_version
+    if id_suffix is not None: detail["suffix"] = id_suffix
+    return HtmxResponseHeaders(trigger=json.dumps({LIST_VERSION_EVENT: detail}))
+
+def render_application_patch(app: Dict, active_qual_id: str = None) -> tuple:
+    """
+    OOB replacements of one item in every list container. Containers that have not
+    loaded the item (later page, filtered out) simply ignore the swap.
+    """
+    return tuple(render_application_item(app, False, active_qual_id, id_suffix)(hx_swap_oob="true")
+                 for id_suffix in LIST_CONTAINER_SUFFIXES)
+
+def application_page_url(cursor: Optional[str] = None, id_suffix: str = "", active_qual_id: str = None, **filters) -> str:
+    """Builds the paginated list URL, carrying filters and panel context forward."""
+    params = {"cursor": cursor, "suffix": id_suffix, "active": active_qual_id, **filters}
+    return f"{APPLICATION_PAGE_URL}?{urlencode({k: v for k, v in params.items() if v})}"
+
+def render_load_more(next_url: str) -> FT:
+    """Infinite-scroll sentinel: fetches the next page when scrolled into view and replaces itself."""
+    return Div(
+        Span(cls="loading loading-dots loading-sm"),
+        hx_get=next_url,
+        hx_trigger="intersect once",
+        hx_swap="outerHTML",
+        cls="flex justify-center p-3 text-gray-400"
+    )
+
+def render_application_page(applications: List[Dict], next_url: Optional[str] = None, active_qual_id: str = None, is_first_page: bool = True, id_suffix: str = "") -> FT:
+    """
+    Renders one page of the list followed by the sentinel for the next page (if any).
+    Continuation pages with no rows render nothing so the list simply ends.
+    """
+    if not applications and is_first_page:
+        return render_application_list(applications, include_oob=False)
+    items = [render_application_item(app, False, active_qual_id, id_suffix) for app in applications]
+    if next_url:
+        items.append(render_load_more(next_url))
+    return tuple(items)
+
+def render_list_filters(list_container_id: str) -> FT:
+    """
+    Level / decision / precheck filters. Rendered inside the search form, so any change
+    reloads the list through the search endpoint with the search text included.
+    """
+    select_cls = "select select-bordered select-xs min-w-0 flex-1 text-xs"
+    hx = dict(hx_post="/evaluator/d/search_applications", hx_trigger="change", hx_target=f"#{list_container_id}",
+              hx_swap="innerHTML", hx_include="closest form")
+    return Div(
+        NativeSelect(
+            Option("Kõik tasemed", value=""),
+            *[Option(style["abbr"], value=level) for level, style in QUALIFICATION_LEVEL_STYLES.items()],
+            name="level", cls=select_cls, **hx
+        ),
+        NativeSelect(
+            Option("Kõik otsused", value=""),
+            Option("Otsuseta", value=PENDING),
+            *[Option(d, value=d) for d in ("Anda", "Mitte anda", "Täiendav tegevus")],
+            name="decision", cls=select_cls, **hx
+        ),
+        NativeSelect(
+            Option("Eelkontroll", value=""),
+            Option("Vastab", value="1"),
+            Option("Ei vasta", value="0"),
+            Option("Kontrollimata", value=PENDING),
+            name="precheck", cls=select_cls, **hx
+        ),
+        cls="flex gap-1 mt-2"
+    )
@@ -38,7 +38,8 @@ def render_header_document_icons(docs: list) -> FT:
         cls="flex items-center gap-1 ml-2"
     )
 
-def render_compliance_section(title: str, icon_name: str, subsections: List[FT], all_checks: List[ComplianceCheck], context_name: str, comment: Optional[str], decision: Optional[str] = None, inline_details: Optional[str] = None, custom_status_color: str = None, doc_icons: Optional[FT] = None):
+def _section_status(all_checks: List[ComplianceCheck], context_name: str, decision: Optional[str] = None, custom_status_color: str = None):
+    """(border, accent, icon, text) for a section header."""
     relevant = [c for c in all_checks if c.is_relevant]
     if not relevant and context_name != "otsus":
          border, accent, icon, text = "border-gray-300 dark:border-gray-700 opacity-50", "bg-gray-300", UkIcon("minus", cls="text-gray-500"), "Ei ole asjakohane"
@@ -66,7 +67,11 @@ def render_compliance_section(title: str, icon_name: str, subsections: List[FT],
                 accent = "bg-green-500" if all_met else "bg-red-500"
                 icon = UkIcon("check-circle", cls="text-green-500") if all_met else UkIcon("x-circle", cls="text-red-500")
                 text = f"{len([c for c in relevant if c.is_met])}/{len(relevant)} täidetud"
+    return border, accent, icon, text
 
+def render_section_header(title: str, icon_name: str, all_checks: List[ComplianceCheck], context_name: str, decision: Optional[str] = None, inline_details: Optional[str] = None, custom_status_color: str = None, doc_icons: Optional[FT] = None):
+    """The header bar of a compliance section; swappable on its own (id section-header-<context>)."""
+    border, accent, icon, text = _section_status(all_checks, context_name, decision, custom_status_color)
     header_content = [
         Div(cls=f"w-1.5 h-full absolute left-0 top-0 {accent}"), UkIcon(icon_name, cls="w-5 h-5"), H5(title, cls="font-semibold")
     ]
@@ -83,18 +88,24 @@ def render_compliance_section(title: str, icon_name: str, subsections: List[FT],
 
     header_content.extend([icon, Span(text, cls="text-sm text-gray-500 dark:text-gray-400 truncate")])
 
+    # data-section-border: the section's border follows a header swapped in alone (see evDashboard script)
     return Div(
-        Div(
-            *header_content,
-            cls="flex items-center gap-x-3 w-full p-3 relative bg-white dark:bg-gray-800 rounded-t-lg"
-        ),
+        *header_content,
+        id=f"section-header-{context_name}", data_section_border=border,
+        cls="flex items-center gap-x-3 w-full p-3 relative bg-white dark:bg-gray-800 rounded-t-lg"
+    )
+
+def render_compliance_section(title: str, icon_name: str, subsections: List[FT], all_checks: List[ComplianceCheck], context_name: str, comment: Optional[str], decision: Optional[str] = None, inline_details: Optional[str] = None, custom_status_color: str = None, doc_icons: Optional[FT] = None):
+    border = _section_status(all_checks, context_name, decision, custom_status_color)[0]
+    return Div(
+        render_section_header(title, icon_name, all_checks, context_name, decision, inline_details, custom_status_color, doc_icons),
         Div(
             *subsections,
             P(comment or "Kommentaarid...", id=f"comment-display-{context_name}", data_comment=comment or "", cls="text-sm p-4 border-t italic text-gray-600 dark:text-gray-300 dark:border-gray-700 min-h-[4rem]"),
             cls="p-3 border-t bg-gray-50 dark:bg-gray-900 dark:border-gray-700 space-y-2"
         ),
         cls=f"border {border} rounded-lg overflow-hidden bg-white dark:bg-gray-800 dark:border-gray-700 cursor-pointer transition-shadow hover:shadow-md", 
-        data_context=context_name,
+        data_context=context_name, data_border=border,
         onclick=f"window.evDashboard.setActiveContext('{context_name}')"
     )
 
@@ -154,21 +165,8 @@ def render_certification_type_toggle(state: ComplianceDashboardState, qual_id: s
 
 
 
-def render_compliance_dashboard(state: ComplianceDashboardState, work_experience: List[Dict] = None, documents: List[Dict] = None, qual_id: str = None):
-    # Header moved to main panel
-    
-    sections = [
-        render_compliance_subsection("Haridustase", state.education, show_title=False),
-        render_compliance_subsection("Töökogemus kokku", state.total_experience),
-        render_compliance_subsection("Vastav töökogemus", state.matching_experience),
-        render_compliance_subsection("Baaskoolitus", state.base_training),
-        render_compliance_subsection("Tingimuslik baaskoolitus", state.conditional_training),
-        render_compliance_subsection("Ehitusjuhi baaskoolitus", state.manager_training),
-        render_compliance_subsection("Täiendkoolitus", state.cpd_training)
-    ]
-    
-    edu_details = f"Nõue: {state.education.required}, Esitatud: {state.education.provided}" if state.education.is_relevant else None
-
+def _workex_header_details(state: ComplianceDashboardState):
+    """(inline_details, custom_status_color) for the Töökogemus header."""
     # If matching experience is relevant, we just use the provided string which is standard formatted now.
     inline_details_text = None
     if state.matching_experience.is_relevant:
@@ -188,6 +186,31 @@ def render_compliance_dashboard(state: ComplianceDashboardState, work_experience
     workex_status_color = None
     if not state.accepted_work_experience_ids:
         workex_status_color = "gray"
+    return inline_details_text, workex_status_color
+
+def render_workex_section_header(state: ComplianceDashboardState, emp_docs: List[Dict]) -> FT:
+    """The Töökogemus header alone, for the work-experience toggle's OOB swap."""
+    inline_details_text, workex_status_color = _workex_header_details(state)
+    return render_section_header("Töökogemus", "briefcase", [state.total_experience, state.matching_experience], "tookogemus",
+                                 inline_details=inline_details_text, custom_status_color=workex_status_color,
+                                 doc_icons=render_header_document_icons(emp_docs))
+
+def render_compliance_dashboard(state: ComplianceDashboardState, work_experience: List[Dict] = None, documents: List[Dict] = None, qual_id: str = None):
+    # Header moved to main panel
+    
+    sections = [
+        render_compliance_subsection("Haridustase", state.education, show_title=False),
+        render_compliance_subsection("Töökogemus kokku", state.total_experience),
+        render_compliance_subsection("Vastav töökogemus", state.matching_experience),
+        render_compliance_subsection("Baaskoolitus", state.base_training),
+        render_compliance_subsection("Tingimuslik baaskoolitus", state.conditional_training),
+        render_compliance_subsection("Ehitusjuhi baaskoolitus", state.manager_training),
+        render_compliance_subsection("Täiendkoolitus", state.cpd_training)
+    ]
+    
+    edu_details = f"Nõue: {state.education.required}, Esitatud: {state.education.provided}" if state.education.is_relevant else None
+
+    inline_details_text, workex_status_color = _workex_header_details(state)
 
     # Work Experience Table Injection
     work_ex_content = []
@@ -366,6 +389,20 @@ def render_center_panel(qual_data: Dict, user_data: Dict, state: ComplianceDashb
                 }
             };
             
+            // A section header swapped in alone (work-experience toggle) carries its section's border classes
+            if (!window.evSectionBorderSync) {
+                window.evSectionBorderSync = true;
+                document.body.addEventListener('htmx:afterSettle', () => {
+                    document.querySelectorAll('[data-section-border]').forEach(h => {
+                        const section = h.closest('[data-border]');
+                        if (!section || section.dataset.border === h.dataset.sectionBorder) return;
+                        section.classList.remove(...section.dataset.border.split(' '));
+                        section.classList.add(...h.dataset.sectionBorder.split(' '));
+                        section.dataset.border = h.dataset.sectionBorder;
+                    });
+                });
+            }
+            
             window.toggleDropdown = (id) => { 
                 console.log('Toggle Dropdown', id);
                 const d=document.getElementById(id); 
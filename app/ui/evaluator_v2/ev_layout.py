@@ -73,6 +73,7 @@ def ev_layout(
             ),
             cls="drawer-side z-40"
         ),
+        Script(src="/static/js/application_list_sync.js", defer=True),
         cls="drawer"
     )
 
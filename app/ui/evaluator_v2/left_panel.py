@@ -1,20 +1,24 @@
 # app/ui/evaluator_v2/left_panel.py
 from fasthtml.common import *
 from monsterui.all import *
-from typing import List, Dict
-from .application_list import render_application_list
+from typing import List, Dict, Optional
+from .application_list import render_application_page, render_list_filters, application_page_url
 
 
 
-def render_left_panel(applications: List[Dict], id_suffix: str = "", active_qual_id: str = None, bg_class: str = "bg-white dark:bg-gray-900") -> FT:
+def render_left_panel(applications: List[Dict], id_suffix: str = "", active_qual_id: str = None, bg_class: str = "bg-white dark:bg-gray-900",
+                      next_cursor: Optional[str] = None, list_version: Optional[int] = None) -> FT:
     """
     Renders the full left panel, including the search controls
-    and the initial list of applications. Accepts an optional id_suffix and bg_class.
+    and the first page of applications. Accepts an optional id_suffix and bg_class.
+    When next_cursor is given, further pages load on scroll. list_version stamps the
+    container so application_list_sync.js can detect a stale list.
     """
     search_input_id = f"search-input{id_suffix}"
     list_container_id = f"application-list-container{id_suffix}"
 
-    header = Div(
+    header = Form(
+        Input(type="hidden", name="suffix", value=id_suffix),
         Div(
             Input(
                 id=search_input_id, name="search", type="search",
@@ -22,19 +26,28 @@ def render_left_panel(applications: List[Dict], id_suffix: str = "", active_qual
                 hx_post="/evaluator/d/search_applications",
                 hx_trigger="keyup changed delay:500ms, search",
                 hx_target=f"#{list_container_id}",
-                hx_swap="innerHTML"
+                hx_swap="innerHTML",
+                hx_include="closest form"
             ),
             UkIcon("search", cls="absolute right-3 top-1/2 -translate-y-1/2 w-5 h-5 text-gray-400 pointer-events-none"),
             cls="relative w-full"
         ),
+        render_list_filters(list_container_id),
+        onsubmit="return false;",
         cls=f"p-3 border-b border-gray-100 dark:border-gray-700 sticky top-0 z-10 {bg_class}"
     )
 
     return Div(
         header,
         Div(
-            render_application_list(applications, active_qual_id=active_qual_id),
-            id=list_container_id
+            render_application_page(
+                applications,
+                next_url=application_page_url(next_cursor, id_suffix, active_qual_id) if next_cursor else None,
+                active_qual_id=active_qual_id,
+                id_suffix=id_suffix
+            ),
+            id=list_container_id,
+            data_list_version=list_version
         ),
         cls=f"h-full border-r dark:border-gray-700 overflow-auto [scrollbar-width:none] {bg_class}"
     )
\ No newline at end of file
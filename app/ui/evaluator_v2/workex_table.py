@@ -1,6 +1,7 @@
 from fasthtml.common import *
 from typing import Optional
 from datetime import datetime
+import json
 
 def calculate_duration_str(start_str: Optional[str], end_str: Optional[str]) -> str:
     if not start_str: return "-"
@@ -46,14 +47,16 @@ def render_info_card(label: str, name: Optional[str], code: Optional[str], conta
         cls="relative"
     )
 
-def render_checkbox_cell(is_checked: bool, qual_id: str, exp_id: int):
+def render_checkbox_cell(is_checked: bool, qual_id: str, exp_id: int, row_number: int = None):
     # Using hx-post to toggle state independently. 
     # Must stop propagation to prevent row clicks if any.
+    # The response is this row; the Töökogemus header comes along out-of-band.
     return Td(
         Input(type="checkbox", checked=is_checked, 
               hx_post=f"/evaluator/d/toggle-exp/{qual_id}/{exp_id}",
-              hx_target="#compliance-dashboard-container",
+              hx_target="closest tr",
               hx_swap="outerHTML",
+              hx_vals=json.dumps({"row_number": row_number}) if row_number else None,
               cls="checkbox checkbox-sm checkbox-primary"),
         cls="text-left pl-2", # Left aligned as requested
         onclick="event.stopPropagation()" # Prevent row click if any
@@ -71,59 +74,59 @@ def render_indicative_checkbox(checked: bool):
         
     return Input(type="checkbox", checked=checked, onclick="return false;", cls=cls, tabindex="-1")
 
+def render_work_experience_row(exp: dict, idx: int, qual_id: str = None, is_accepted: bool = False) -> FT:
+    # Duration
+    duration_str = calculate_duration_str(exp.get('start_date'), exp.get('end_date'))
+    exp_id = exp.get('id')
+
+    # Determining PTV/ATV/PTVO (Informational columns)
+    c_type = (exp.get('contract_type') or "").strip()
+    is_ptv = c_type == "PTV"
+    is_atv = c_type == "ATV"
+    is_ptvo = c_type == "PTVO"
+
+    # Checkbox Column (First)
+    # We need qual_id to form the URL. If not provided, disable?
+    if qual_id and exp_id:
+        check_col = render_checkbox_cell(is_accepted, qual_id, exp_id, idx)
+    else:
+        check_col = Td(Input(type="checkbox", disabled=True, cls="checkbox checkbox-xs"), cls="text-left pl-2")
+
+    return Tr(
+        check_col,
+        Td(str(idx), cls="text-left text-gray-400"),
+        Td(exp.get('role', '-'), cls="font-medium"),
+        Td(
+            Div(exp.get('start_date', '-'), cls="text-xs"),
+            Div(exp.get('end_date', '...'), cls="text-xs text-gray-400"),
+        ),
+        Td(duration_str, cls="font-mono text-xs whitespace-nowrap"),
+        
+        # Replaced disabled checkboxes with indicative ones - Left aligned
+        Td(render_indicative_checkbox(is_ptv), cls="text-left"),
+        Td(render_indicative_checkbox(is_atv), cls="text-left"),
+        Td(render_indicative_checkbox(is_ptvo), cls="text-left"),
+        
+        Td(exp.get('object_address', '-'), cls="text-xs max-w-[150px] truncate", title=exp.get('object_address', '')),
+        Td(exp.get('ehr_code', '-'), cls="font-mono text-xs"),
+        Td(render_indicative_checkbox(bool(exp.get('permit_required'))), cls="text-left"),
+        Td(
+            render_info_card("Ettevõte", exp.get('company_name'), exp.get('company_code'), exp.get('company_contact'), exp.get('company_email'), exp.get('company_phone'))
+        ),
+        Td(
+            render_info_card("Tellija", exp.get('client_name'), exp.get('client_code'), exp.get('client_contact'), exp.get('client_email'), exp.get('client_phone'))
+        ),
+        id=f"workex-row-{exp_id}" if exp_id else None,
+        cls=f"hover:bg-gray-50 dark:hover:bg-gray-800 transition-colors {'bg-green-50/50' if is_accepted else ''}"
+    )
+
 def render_work_experience_table(experiences: list, qual_id: str = None, accepted_ids: list = None) -> FT:
     if not experiences:
         return Div("Töökogemus puudub.", cls="text-sm text-gray-500 italic p-3")
 
     accepted_ids = accepted_ids or []
-    rows = []
-    for idx, exp in enumerate(experiences, 1):
-        # Duration
-        duration_str = calculate_duration_str(exp.get('start_date'), exp.get('end_date'))
-        exp_id = exp.get('id')
-        
-        # Check if accepted by evaluator
-        is_accepted = exp_id in accepted_ids
-
-        # Determining PTV/ATV/PTVO (Informational columns)
-        c_type = (exp.get('contract_type') or "").strip()
-        is_ptv = c_type == "PTV"
-        is_atv = c_type == "ATV"
-        is_ptvo = c_type == "PTVO"
-
-        # Checkbox Column (First)
-        # We need qual_id to form the URL. If not provided, disable?
-        if qual_id and exp_id:
-            check_col = render_checkbox_cell(is_accepted, qual_id, exp_id)
-        else:
-            check_col = Td(Input(type="checkbox", disabled=True, cls="checkbox checkbox-xs"), cls="text-left pl-2")
-
-        rows.append(Tr(
-            check_col,
-            Td(str(idx), cls="text-left text-gray-400"),
-            Td(exp.get('role', '-'), cls="font-medium"),
-            Td(
-                Div(exp.get('start_date', '-'), cls="text-xs"),
-                Div(exp.get('end_date', '...'), cls="text-xs text-gray-400"),
-            ),
-            Td(duration_str, cls="font-mono text-xs whitespace-nowrap"),
-            
-            # Replaced disabled checkboxes with indicative ones - Left aligned
-            Td(render_indicative_checkbox(is_ptv), cls="text-left"),
-            Td(render_indicative_checkbox(is_atv), cls="text-left"),
-            Td(render_indicative_checkbox(is_ptvo), cls="text-left"),
-            
-            Td(exp.get('object_address', '-'), cls="text-xs max-w-[150px] truncate", title=exp.get('object_address', '')),
-            Td(exp.get('ehr_code', '-'), cls="font-mono text-xs"),
-            Td(render_indicative_checkbox(bool(exp.get('permit_required'))), cls="text-left"),
-            Td(
-                render_info_card("Ettevõte", exp.get('company_name'), exp.get('company_code'), exp.get('company_contact'), exp.get('company_email'), exp.get('company_phone'))
-            ),
-            Td(
-                render_info_card("Tellija", exp.get('client_name'), exp.get('client_code'), exp.get('client_contact'), exp.get('client_email'), exp.get('client_phone'))
-            ),
-            cls=f"hover:bg-gray-50 dark:hover:bg-gray-800 transition-colors {'bg-green-50/50' if is_accepted else ''}"
-        ))
+    rows = [render_work_experience_row(exp, idx, qual_id, exp.get('id') in accepted_ids)
+            for idx, exp in enumerate(experiences, 1)]
 
     headers = ["OK", "#", "Roll", "Periood", "Kokku", "PTV", "ATV", "PTVO", "Asukoht", "EHR kood", "Ehitusluba", "Ettevõte", "Tellija"]
     
@@ -47,7 +47,10 @@ def base_layout(title: str, *content: Any, theme_headers: tuple = Theme.blue.hea
         Link(rel="manifest", href="/static/manifest.json"),
         Link(rel="stylesheet", href=flatpickr_css_cdn),
         Link(rel="stylesheet", href=flatpickr_month_plugin_css_cdn),
+        # Template parsing lets a swapped table row carry out-of-band siblings
+        Meta(name="htmx-config", content='{"useTemplateFragments": true}'),
         Script(src="https://unpkg.com/htmx.org@1.9.10"),
+        Script(src="https://unpkg.com/htmx.org@1.9.10/dist/ext/sse.js"),
         Script(src=ag_grid_js_cdn, defer=True),
         Script(src=flatpickr_js_cdn),
         Script(src=flatpickr_locale_et_js_cdn),
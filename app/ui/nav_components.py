@@ -8,6 +8,7 @@ from monsterui.all import *
 from starlette.requests import Request
 
 from auth.roles import ROLE_LABELS, is_admin, is_evaluator, normalize_role
+from utils.identity_map import identity_map
 from utils.log import debug
 
 # --- TABS Dictionary ---
@@ -61,7 +62,8 @@ def app_navbar(request: Request, db: Any) -> FT:
     display_name = user_email # Fallback to email
     if is_authenticated and db:
         try:
-            user_data = db.t.users[user_email]
+            user_data = identity_map(request, db).user(user_email) # Loaded once per request, usually by the guard
+            if user_data is None: raise NotFoundError(user_email)
             fn = user_data.get('full_name')
             if fn and fn.strip():
                 display_name = fn.strip()
@@ -238,7 +240,8 @@ def evaluator_navbar(request: Request, db: Any) -> FT:
     display_name = user_email
     if is_authenticated and db:
         try:
-            user_data = db.t.users[user_email]
+            user_data = identity_map(request, db).user(user_email)
+            if user_data is None: raise NotFoundError(user_email)
             fn = user_data.get('full_name')
             if fn and fn.strip():
                 display_name = fn.strip()
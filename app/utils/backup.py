@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import datetime as _dt
 import sqlite3
+from contextlib import closing
 from pathlib import Path
 
 from database import DB_FILE
@@ -16,7 +17,7 @@ def vacuum_into(destination: str | Path, prefix: str = "app-backup") -> Path:
     timestamp = _dt.datetime.utcnow().strftime("%Y%m%d-%H%M%S")
     backup_path = target_dir / f"{prefix}-{timestamp}.db"
 
-    with sqlite3.connect(DB_FILE) as connection:
+    with closing(sqlite3.connect(DB_FILE)) as connection:
         escaped = str(backup_path).replace("'", "''")
         connection.execute("VACUUM INTO '" + escaped + "'")
 
@@ -0,0 +1,139 @@
+"""ETags for GET fragments from per-user and per-application data versions.
+
+Routes register a version function with ``ConditionalGet.route``. For a
+matching GET the middleware reads the version (one cheap query, before the
+handler runs) and hashes it with everything else the HTML depends on: the path
+and query, the session user, whether htmx asked for a fragment and for which
+target, the day (ongoing roles are counted up to today) and the build. A
+matching ``If-None-Match`` gets a 304 without calling the handler; any other
+200 response carries the ETag. htmx requests go through the browser's HTTP
+cache, which revalidates them and hands htmx the cached body on a 304.
+
+The requester's own write counter is always part of the version, so a role
+change re-runs the route's guard instead of being answered from the tag.
+"""
+from __future__ import annotations
+
+import datetime
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Match, Optional, Pattern, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services.data_versions import user_version
+
+# Changes with each deploy, so new markup is never answered with an old tag
+BUILD_ID = os.environ.get("APP_BUILD") or str(int(time.time()))
+
+VersionFn = Callable[..., Optional[Hashable]]
+
+
+class ConditionalGet:
+    """Registry of versioned routes, plus the hit counters the middleware updates."""
+
+    def __init__(self):
+        self._routes: List[Tuple[Pattern, VersionFn]] = []
+        self._lock = threading.Lock()
+        self._metrics = {"requests": 0, "not_modified": 0, "tagged": 0, "errors": 0}
+
+    def route(self, pattern: str) -> Callable[[VersionFn], VersionFn]:
+        """
+        Registers ``fn(request, db, **path_groups)`` for paths fully matching ``pattern``.
+        It returns the data version the response depends on, or None to skip tagging.
+        """
+        def decorator(fn: VersionFn) -> VersionFn:
+            self._routes.append((re.compile(pattern), fn))
+            return fn
+        return decorator
+
+    def match(self, path: str) -> Optional[Tuple[VersionFn, Match]]:
+        """The version function registered for ``path`` and its match, or None."""
+        for pattern, fn in self._routes:
+            match = pattern.fullmatch(path)
+            if match:
+                return fn, match
+        return None
+
+    def etag(self, request: Request, db, route: Optional[Tuple[VersionFn, Match]] = None) -> Optional[str]:
+        path = request.url.path
+        route = route or self.match(path)
+        if route is None:
+            return None
+        fn, match = route
+        user_email = request.session.get("user_email")
+        version = fn(request, db, **match.groupdict())
+        if version is None or not user_email:
+            return None
+        key = (path, request.url.query, user_email, user_version(db, user_email), version,
+               request.headers.get("HX-Request"), request.headers.get("HX-Target"),
+               datetime.date.today().isoformat(), BUILD_ID)
+        return f'W/"{hashlib.sha1(repr(key).encode()).hexdigest()[:20]}"'
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self._metrics[name] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._metrics)
+        snapshot["hit_rate"] = round(snapshot["not_modified"] / snapshot["requests"], 3) if snapshot["requests"] else None
+        return snapshot
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags or etag.removeprefix("W/") in tags
+
+
+class ConditionalGetMiddleware:
+    """Answers unchanged GETs of registered routes with 304 Not Modified.
+
+    A plain ASGI middleware: anything but a GET of a registered path is passed
+    straight through, and a tagged response only has its headers extended on
+    ``http.response.start`` (the tag comes from the data versions, not the body).
+    """
+
+    def __init__(self, app: ASGIApp, conditional: ConditionalGet):
+        self.app = app
+        self.conditional = conditional
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET" or "session" not in scope:
+            return await self.app(scope, receive, send)
+        route = self.conditional.match(scope["path"])
+        if route is None:
+            return await self.app(scope, receive, send)
+
+        request = Request(scope, receive)
+        state = scope.get("state", {})
+        db = state.get("read_db") or state.get("db")
+        try:
+            etag = self.conditional.etag(request, db, route) if db is not None else None
+        except Exception:
+            self.conditional.count("errors") # Never let versioning break the page itself
+            etag = None
+        if etag is None:
+            return await self.app(scope, receive, send)
+
+        self.conditional.count("requests")
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Cookie, HX-Request, HX-Target"}
+        if _matches(request.headers.get("If-None-Match"), etag):
+            self.conditional.count("not_modified")
+            return await Response(status_code=304, headers=headers)(scope, receive, send)
+
+        async def send_tagged(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                self.conditional.count("tagged")
+                MutableHeaders(scope=message).update(headers)
+            await send(message)
+
+        await self.app(scope, receive, send_tagged)
@@ -0,0 +1,117 @@
+"""Reader/writer connection pool for the SQLite database.
+
+SQLite in WAL mode allows many concurrent readers next to one writer. The pool
+keeps the single read-write handle returned by ``setup_database`` (shared by the
+controllers, as before) and a fixed set of read-only connections that requests
+check out for their reads, so read traffic no longer queues on one connection.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import apsw
+from apswutils.db import Database
+
+DEFAULT_READERS = 4
+_MEMORY_PATHS = {"", ":memory:"}
+
+
+class ConnectionPool:
+    """One shared writer plus ``readers`` read-only WAL connections with usage metrics."""
+
+    def __init__(self, writer: Database, db_path: Optional[str] = None, readers: int = DEFAULT_READERS,
+                 busy_timeout_ms: int = 10000):
+        self.writer = writer
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        # In-memory databases are private to their connection: reads must use the writer
+        self.size = 0 if (db_path or "") in _MEMORY_PATHS else readers
+        self._idle: "queue.LifoQueue[Database]" = queue.LifoQueue()
+        for _ in range(self.size):
+            self._idle.put(self._open_reader())
+        self._lock = threading.Lock()
+        self._metrics = {"checkouts": 0, "checkins": 0, "in_use": 0, "peak_in_use": 0,
+                         "exhausted": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0,
+                         "hold_ms_total": 0.0, "hold_ms_max": 0.0}
+
+    def _open_reader(self) -> Database:
+        # Opened read-write with query_only rather than SQLITE_OPEN_READONLY: a read-only
+        # handle maps the WAL index read-only and can miss commits or fail with SQLITE_IOERR
+        conn = apsw.Connection(self.db_path)
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA query_only=ON")
+        return Database(conn)
+
+    def checkout(self, timeout: Optional[float] = 0) -> Optional[Database]:
+        """
+        Takes an idle reader, waiting up to ``timeout`` seconds (None waits forever).
+        Returns None when the pool has no readers or none became free; callers then
+        read through ``writer``. Pair every non-None result with ``checkin``.
+        """
+        if not self.size:
+            return None
+        start = time.perf_counter()
+        try:
+            reader = self._idle.get(block=timeout != 0, timeout=timeout or None)
+        except queue.Empty:
+            with self._lock:
+                self._metrics["exhausted"] += 1
+            return None
+        waited = (time.perf_counter() - start) * 1000
+        with self._lock:
+            m = self._metrics
+            m["checkouts"] += 1
+            m["in_use"] += 1
+            m["peak_in_use"] = max(m["peak_in_use"], m["in_use"])
+            m["wait_ms_total"] += waited
+            m["wait_ms_max"] = max(m["wait_ms_max"], waited)
+        reader._pool_checked_out_at = time.perf_counter()
+        return reader
+
+    def checkin(self, reader: Optional[Database]) -> None:
+        if reader is None:
+            return
+        held = (time.perf_counter() - getattr(reader, "_pool_checked_out_at", time.perf_counter())) * 1000
+        if reader.conn.in_transaction: # Never hand out a connection pinned to an old snapshot
+            reader.execute("ROLLBACK")
+        with self._lock:
+            m = self._metrics
+            m["checkins"] += 1
+            m["in_use"] -= 1
+            m["hold_ms_total"] += held
+            m["hold_ms_max"] = max(m["hold_ms_max"], held)
+        self._idle.put(reader)
+
+    @contextmanager
+    def reader(self, timeout: Optional[float] = 0) -> Iterator[Database]:
+        """Yields a read-only connection, or the writer if none is free."""
+        conn = self.checkout(timeout)
+        try:
+            yield conn or self.writer
+        finally:
+            self.checkin(conn)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._metrics)
+        snapshot["size"] = self.size
+        snapshot["idle"] = self._idle.qsize()
+        return snapshot
+
+    def close(self) -> None:
+        """Closes idle readers (checked-out readers are closed when returned)."""
+        while True:
+            try:
+                self._idle.get_nowait().conn.close()
+            except queue.Empty:
+                break
+        self.size = 0
+
+
+def read_db(request, default: Database) -> Database:
+    """The request's checked-out reader if it has one, else ``default``."""
+    return getattr(request.state, "read_db", None) or default
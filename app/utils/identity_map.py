@@ -0,0 +1,96 @@
+"""Request-scoped identity map: each row is loaded at most once per request.
+
+``AuthMiddleware`` attaches an ``IdentityMap`` over the request's read
+connection as ``request.state.identity_map``. The guard, the navbars and the
+controllers then resolve the current user, their profile and their applied
+qualifications through ``identity_map(request)`` and share the same dicts
+instead of querying again. Misses are remembered too, so an absent profile
+costs one query. The user row itself comes from the process-wide
+``auth.user_cache`` when the map is given one, so it often costs none.
+
+A handler that writes one of these rows and renders it again in the same
+request calls ``forget``. Totals across requests (``metrics``) show how many
+queries the map saved.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastlite import NotFoundError
+
+_lock = threading.Lock()
+_totals = {"requests": 0, "loads": 0, "queries_saved": 0}
+
+
+class IdentityMap:
+    """Rows by (table, key) for one request."""
+
+    def __init__(self, db, user_cache=None):
+        self.db = db
+        self.user_cache = user_cache
+        self.loads = 0
+        self.hits = 0
+        self._rows: Dict[Tuple[str, Any], Optional[dict]] = {}
+        self._lists: Dict[Tuple[str, str], List[dict]] = {}
+
+    def get(self, table: str, pk: Any) -> Optional[dict]:
+        """The row of ``table`` with primary key ``pk``, or None."""
+        key = (table, pk)
+        if key in self._rows:
+            self.hits += 1
+            return self._rows[key]
+        self.loads += 1
+        try:
+            row = self.db.t[table][pk]
+        except NotFoundError:
+            row = None
+        self._rows[key] = row
+        return row
+
+    def rows_for_user(self, table: str, user_email: str) -> List[dict]:
+        """All of ``user_email``'s rows in ``table``, by id."""
+        key = (table, user_email)
+        if key in self._lists:
+            self.hits += 1
+            return self._lists[key]
+        self.loads += 1
+        rows = self._lists[key] = self.db.t[table]("user_email = ?", [user_email], order_by="id")
+        return rows
+
+    def user(self, email: str) -> Optional[dict]:
+        if self.user_cache is None or ("users", email) in self._rows:
+            return self.get("users", email)
+        self.loads += 1
+        row = self._rows[("users", email)] = self.user_cache.get(self.db, email)
+        return row
+
+    def profile(self, email: str) -> Optional[dict]:
+        return self.get("applicant_profile", email)
+
+    def qualifications(self, email: str) -> List[dict]:
+        return self.rows_for_user("applied_qualifications", email)
+
+    def forget(self, table: str, pk: Any = None) -> None:
+        """Drops ``table``'s row ``pk`` (every row and list of ``table`` when None) after a write."""
+        self._rows = {k: v for k, v in self._rows.items() if k[0] != table or (pk is not None and k[1] != pk)}
+        self._lists = {k: v for k, v in self._lists.items() if k[0] != table or (pk is not None and k[1] != pk)}
+
+    def record(self) -> None:
+        """Adds this request's counts to the process totals."""
+        with _lock:
+            _totals["requests"] += 1
+            _totals["loads"] += self.loads
+            _totals["queries_saved"] += self.hits
+
+
+def identity_map(request, db=None) -> IdentityMap:
+    """The request's map; outside ``AuthMiddleware`` (scripts, direct calls) a fresh one over ``db``."""
+    state = getattr(request, "state", None)
+    found = getattr(state, "identity_map", None) if state is not None else None
+    return found if found is not None else IdentityMap(db)
+
+
+def metrics() -> Dict[str, Any]:
+    with _lock:
+        return dict(_totals)
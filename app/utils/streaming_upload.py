@@ -0,0 +1,268 @@
+"""Streaming multipart uploads: file parts go straight to their destination.
+
+``receive_upload`` reads the request body chunk by chunk instead of through
+``request.form()``, so a file is never held in memory or spooled to a temporary
+file first. Each file part is written to the sink ``open_sink`` returns for it
+(a local file, or a GCS resumable upload), hashed and counted as it arrives,
+and the upload is aborted as soon as a file passes ``max_bytes``. Sink writes
+run off the event loop through ``run`` (the storage service's pool in the app),
+one request chunk at a time, so memory per upload stays at a request chunk
+plus the sink's own buffer.
+
+On any failure every sink opened for the request is discarded, including files
+that were already complete, so a rejected request leaves nothing behind. A
+timed-out write keeps running on its thread; ``Upload.lock`` makes the discard
+wait for it rather than close or delete the file underneath it.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Protocol
+
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import Request
+
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+MAX_FIELD_BYTES = 64 * 1024
+GCS_CHUNK_SIZE = 256 * 1024 # Resumable upload chunk; must be a multiple of 256 KiB
+
+
+class UploadError(Exception):
+    """The request body is not an acceptable multipart upload."""
+
+
+class UploadTooLarge(UploadError):
+    def __init__(self, filename: str, max_bytes: int):
+        super().__init__(f"{filename} exceeds {max_bytes // (1024 * 1024)} MB")
+        self.filename = filename
+
+
+class UploadSink(Protocol):
+    storage_identifier: str
+    def write(self, data: bytes) -> None: ...
+    def commit(self) -> None: ...
+    def discard(self) -> None: ...
+
+
+class LocalFileSink:
+    """Writes to ``<path>.part`` and renames it into place on commit."""
+
+    def __init__(self, path: Path, storage_identifier: str):
+        self.path = path
+        self.storage_identifier = storage_identifier
+        self._partial = path.with_name(path.name + ".part")
+        self._file = None
+
+    def write(self, data: bytes) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self._partial, "wb")
+        self._file.write(data)
+
+    def commit(self) -> None:
+        if self._file is None: # Empty file
+            self.write(b"")
+        self._file.close()
+        self._partial.replace(self.path)
+
+    def discard(self) -> None:
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+        self._partial.unlink(missing_ok=True)
+        self.path.unlink(missing_ok=True)
+
+
+class GCSResumableSink:
+    """Streams into a GCS resumable upload session, ``GCS_CHUNK_SIZE`` at a time."""
+
+    def __init__(self, bucket, name: str, content_type: Optional[str]):
+        self.blob = bucket.blob(name)
+        self.storage_identifier = name
+        self.content_type = content_type
+        self._writer = None
+        self._committed = False
+
+    def write(self, data: bytes) -> None:
+        if self._writer is None:
+            self._writer = self.blob.open("wb", content_type=self.content_type, chunk_size=GCS_CHUNK_SIZE)
+        self._writer.write(data)
+
+    def commit(self) -> None:
+        if self._writer is None:
+            self.write(b"")
+        self._writer.close()
+        self._committed = True
+
+    def discard(self) -> None:
+        # An unfinished resumable session is never finalised, so nothing becomes visible
+        if self._committed:
+            self.blob.delete()
+
+
+@dataclass
+class UploadedFile:
+    field_name: str
+    filename: str
+    content_type: Optional[str]
+    storage_identifier: str
+    size: int = 0
+    sha256: str = ""
+
+
+@dataclass
+class Upload:
+    fields: Dict[str, List[str]] = field(default_factory=dict)
+    files: List[UploadedFile] = field(default_factory=list)
+    sinks: List[UploadSink] = field(default_factory=list, repr=False)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False) # Sink writes vs discard
+
+    def get(self, name: str, default: str = "") -> str:
+        values = self.fields.get(name)
+        return values[0] if values else default
+
+    def discard(self) -> None:
+        """Removes every stored file, e.g. when the rows recording them could not be written."""
+        with self.lock: # Blocks until a write still running after a timeout has finished
+            for sink in self.sinks:
+                try:
+                    sink.discard()
+                except Exception:
+                    pass # Best effort: the upload has failed already
+
+
+@dataclass
+class _Part:
+    headers: Dict[bytes, bytes] = field(default_factory=dict)
+    name: str = ""
+    data: bytearray = field(default_factory=bytearray)
+    file: Optional[UploadedFile] = None
+    sink: Optional[UploadSink] = None
+    hasher: Optional["hashlib._Hash"] = None
+    skip: bool = False
+
+
+OpenSink = Callable[[str, str, Optional[str]], Optional[UploadSink]]
+
+
+class _Receiver:
+    def __init__(self, open_sink: OpenSink, max_bytes: int, max_files: int, charset: str):
+        self.open_sink = open_sink
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.charset = charset
+        self.upload = Upload()
+        self.pending: List[tuple] = [] # (sink, bytes) | (sink, None) to commit, drained after each chunk
+        self.part = _Part()
+        self._header_name = b""
+        self._header_value = b""
+
+    def callbacks(self) -> dict:
+        return {"on_part_begin": self.on_part_begin, "on_part_data": self.on_part_data, "on_part_end": self.on_part_end,
+                "on_header_field": self.on_header_field, "on_header_value": self.on_header_value,
+                "on_header_end": self.on_header_end, "on_headers_finished": self.on_headers_finished}
+
+    def on_part_begin(self) -> None:
+        self.part = _Part()
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self.part.headers[self._header_name.lower()] = self._header_value
+        self._header_name = self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self.part.headers.get(b"content-disposition", b""))
+        if b"name" not in options:
+            raise UploadError("Multipart part without a name")
+        self.part.name = options[b"name"].decode(self.charset, errors="replace")
+        if b"filename" not in options:
+            return
+        filename = options[b"filename"].decode(self.charset, errors="replace")
+        content_type = self.part.headers.get(b"content-type", b"").decode("latin-1") or None
+        if filename and len(self.upload.files) >= self.max_files:
+            raise UploadError(f"More than {self.max_files} files")
+        sink = self.open_sink(self.part.name, filename, content_type) if filename else None
+        if sink is None: # Empty file input, or a field the caller does not take files for
+            self.part.skip = True
+            return
+        self.upload.sinks.append(sink)
+        self.part.sink, self.part.hasher = sink, hashlib.sha256()
+        self.part.file = UploadedFile(self.part.name, filename, content_type, sink.storage_identifier)
+        self.upload.files.append(self.part.file)
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        chunk = data[start:end]
+        part = self.part
+        if part.skip:
+            return
+        if part.file is None:
+            if len(part.data) + len(chunk) > MAX_FIELD_BYTES:
+                raise UploadError(f"Field {part.name} is too long")
+            part.data.extend(chunk)
+            return
+        part.file.size += len(chunk)
+        if part.file.size > self.max_bytes:
+            raise UploadTooLarge(part.file.filename, self.max_bytes)
+        part.hasher.update(chunk)
+        self.pending.append((part.sink, bytes(chunk)))
+
+    def on_part_end(self) -> None:
+        part = self.part
+        if part.file is not None:
+            part.file.sha256 = part.hasher.hexdigest()
+            self.pending.append((part.sink, None))
+        elif not part.skip:
+            self.upload.fields.setdefault(part.name, []).append(part.data.decode(self.charset, errors="replace"))
+
+    def drain(self) -> None:
+        """Runs in a worker thread: writes (and commits) what the last chunk produced."""
+        pending, self.pending = self.pending, []
+        with self.upload.lock:
+            for sink, data in pending:
+                sink.write(data) if data is not None else sink.commit()
+
+
+async def receive_upload(request: Request, open_sink: OpenSink, max_bytes: int = MAX_UPLOAD_BYTES,
+                         max_files: int = 20, run: Optional[Callable[..., Awaitable[Any]]] = None) -> Upload:
+    """
+    Streams a multipart request body. ``open_sink(field_name, filename, content_type)``
+    returns where a file part goes, or None to skip it; sink I/O goes through
+    ``run(fn)`` (``asyncio.to_thread`` by default). Raises UploadError (UploadTooLarge
+    past ``max_bytes``) after discarding everything written.
+    """
+    run = run or asyncio.to_thread
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadError("Expected multipart/form-data")
+    charset = params.get(b"charset", b"utf-8").decode("latin-1")
+    receiver = _Receiver(open_sink, max_bytes, max_files, charset)
+    parser = MultipartParser(params[b"boundary"], receiver.callbacks())
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if receiver.pending:
+                await run(receiver.drain)
+        parser.finalize()
+        if receiver.pending:
+            await run(receiver.drain)
+    except asyncio.CancelledError:
+        # On a thread: it may wait for an in-flight write, and a cancelled request must not block the loop
+        threading.Thread(target=receiver.upload.discard, daemon=True).start()
+        raise
+    except Exception as e: # Too large, malformed body, client gone, storage failure or timeout
+        try:
+            await run(receiver.upload.discard)
+        except Exception:
+            pass # Best effort: report the original failure
+        if isinstance(e, UploadError):
+            raise
+        raise UploadError(str(e)) from e
+    return receiver.upload
@@ -0,0 +1,113 @@
+"""Single-writer asyncio queue that batches database writes.
+
+Async handlers ``await queue.submit(fn, *args)`` instead of writing inline. One
+consumer task drains whatever has queued up, runs the whole batch in a worker
+thread inside a single transaction (each write in its own savepoint, so one
+failing write does not roll back the others), commits once and resolves every
+caller's future with its function's return value or exception.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from database import transaction
+from utils.log import error
+
+DEFAULT_MAX_BATCH = 64
+
+_Job = Tuple[Callable[..., Any], tuple, dict, asyncio.Future]
+
+
+class WriteQueue:
+    """Serialises writes through ``db`` (the pool's writer) in one transaction per batch."""
+
+    def __init__(self, db, max_batch: int = DEFAULT_MAX_BATCH):
+        self.db = db
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumer: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._metrics = {"submitted": 0, "committed": 0, "failed": 0, "batches": 0, "peak_depth": 0,
+                         "largest_batch": 0, "commit_ms_total": 0.0, "commit_ms_max": 0.0, "commit_ms_last": 0.0}
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> asyncio.Future:
+        """Queues ``fn(*args, **kwargs)``; the returned future resolves once its batch commits."""
+        self._ensure_consumer()
+        future = self._loop.create_future()
+        self._queue.put_nowait((fn, args, kwargs, future))
+        with self._lock:
+            self._metrics["submitted"] += 1
+            self._metrics["peak_depth"] = max(self._metrics["peak_depth"], self._queue.qsize())
+        return future
+
+    def _ensure_consumer(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._consumer is None or self._consumer.done():
+            # First use, or the previous event loop is gone (e.g. a restarted test client)
+            self._loop, self._queue = loop, asyncio.Queue()
+            self._consumer = loop.create_task(self._consume())
+
+    async def _consume(self) -> None:
+        queue = self._queue
+        while True:
+            batch: List[_Job] = [await queue.get()]
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            live = [job for job in batch if not job[3].cancelled()]
+            if not live:
+                continue
+            try:
+                outcomes, elapsed_ms = await asyncio.to_thread(self._run_batch, live)
+            except Exception as e: # The commit itself failed: nothing in the batch was written
+                error(f"Write batch of {len(live)} failed: {e}")
+                outcomes, elapsed_ms = [(False, e)] * len(live), 0.0
+            self._record(outcomes, elapsed_ms)
+            for (_, _, _, future), (ok, value) in zip(live, outcomes):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def _run_batch(self, batch: List[_Job]) -> Tuple[List[Tuple[bool, Any]], float]:
+        start = time.perf_counter()
+        outcomes = []
+        with transaction(self.db): # One transaction (and one commit) for the batch
+            for fn, args, kwargs, _ in batch:
+                try:
+                    with transaction(self.db): # Savepoint per write
+                        outcomes.append((True, fn(*args, **kwargs)))
+                except Exception as e:
+                    outcomes.append((False, e))
+        return outcomes, (time.perf_counter() - start) * 1000
+
+    def _record(self, outcomes: List[Tuple[bool, Any]], elapsed_ms: float) -> None:
+        failed = sum(1 for ok, _ in outcomes if not ok)
+        with self._lock:
+            m = self._metrics
+            m["batches"] += 1
+            m["committed"] += len(outcomes) - failed
+            m["failed"] += failed
+            m["largest_batch"] = max(m["largest_batch"], len(outcomes))
+            m["commit_ms_total"] += elapsed_ms
+            m["commit_ms_max"] = max(m["commit_ms_max"], elapsed_ms)
+            m["commit_ms_last"] = elapsed_ms
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._metrics)
+        snapshot["depth"] = self._queue.qsize() if self._queue else 0
+        snapshot["commit_ms_avg"] = snapshot["commit_ms_total"] / snapshot["batches"] if snapshot["batches"] else 0.0
+        return snapshot
+
+
+async def run_write(write_queue: Optional[WriteQueue], fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Runs ``fn`` through ``write_queue`` when one is configured, inline otherwise."""
+    if write_queue is None:
+        return fn(*args, **kwargs)
+    return await write_queue.submit(fn, *args, **kwargs)
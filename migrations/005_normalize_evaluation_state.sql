@@ -0,0 +1,72 @@
+-- migrations/005_normalize_evaluation_state.sql
+-- Typed evaluation state: scalar columns on evaluations, child tables for the
+-- compliance checks and accepted work experience. Existing JSON blobs are converted;
+-- evaluation_state_json is kept (no longer written) for rollback.
+
+ALTER TABLE evaluations ADD COLUMN package_id TEXT;
+ALTER TABLE evaluations ADD COLUMN overall_met INTEGER;
+ALTER TABLE evaluations ADD COLUMN final_decision TEXT;
+ALTER TABLE evaluations ADD COLUMN certification_type TEXT;
+ALTER TABLE evaluations ADD COLUMN haridus_comment TEXT;
+ALTER TABLE evaluations ADD COLUMN tookogemus_comment TEXT;
+ALTER TABLE evaluations ADD COLUMN koolitus_comment TEXT;
+ALTER TABLE evaluations ADD COLUMN otsus_comment TEXT;
+ALTER TABLE evaluations ADD COLUMN education_old_or_foreign INTEGER;
+ALTER TABLE evaluations ADD COLUMN education_10y_plus INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE evaluations ADD COLUMN education_foreign INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE evaluations ADD COLUMN state_format INTEGER NOT NULL DEFAULT 1; -- 1 = JSON blob, 2 = typed columns
+ALTER TABLE evaluations ADD COLUMN revision INTEGER NOT NULL DEFAULT 0;   -- Incremented on every save
+
+CREATE TABLE IF NOT EXISTS evaluation_checks (
+    qual_id TEXT NOT NULL,
+    check_name TEXT NOT NULL, -- ComplianceDashboardState field, e.g. "education"
+    is_relevant INTEGER NOT NULL DEFAULT 0,
+    is_met INTEGER NOT NULL DEFAULT 0,
+    required TEXT,
+    provided TEXT,
+    evaluator_comment TEXT,
+    PRIMARY KEY (qual_id, check_name)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS evaluation_accepted_experience (
+    qual_id TEXT NOT NULL,
+    work_experience_id INTEGER NOT NULL,
+    PRIMARY KEY (qual_id, work_experience_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS ix_evaluations_final_decision ON evaluations (final_decision);
+
+-- Convert existing blobs
+UPDATE evaluations SET
+    package_id = json_extract(evaluation_state_json, '$.package_id'),
+    overall_met = json_extract(evaluation_state_json, '$.overall_met'),
+    final_decision = NULLIF(json_extract(evaluation_state_json, '$.final_decision'), ''),
+    certification_type = json_extract(evaluation_state_json, '$.certification_type'),
+    haridus_comment = json_extract(evaluation_state_json, '$.haridus_comment'),
+    tookogemus_comment = json_extract(evaluation_state_json, '$.tookogemus_comment'),
+    koolitus_comment = json_extract(evaluation_state_json, '$.koolitus_comment'),
+    otsus_comment = json_extract(evaluation_state_json, '$.otsus_comment'),
+    education_old_or_foreign = json_extract(evaluation_state_json, '$.education_old_or_foreign'),
+    education_10y_plus = COALESCE(json_extract(evaluation_state_json, '$.education_10y_plus'), 0),
+    education_foreign = COALESCE(json_extract(evaluation_state_json, '$.education_foreign'), 0),
+    state_format = 2
+WHERE json_valid(evaluation_state_json);
+
+INSERT OR REPLACE INTO evaluation_checks
+    (qual_id, check_name, is_relevant, is_met, required, provided, evaluator_comment)
+SELECT e.qual_id, c.key,
+       COALESCE(json_extract(c.value, '$.is_relevant'), 0),
+       COALESCE(json_extract(c.value, '$.is_met'), 0),
+       json_extract(c.value, '$.required'),
+       json_extract(c.value, '$.provided'),
+       json_extract(c.value, '$.evaluator_comment')
+FROM evaluations e,
+     json_each(CASE WHEN json_valid(e.evaluation_state_json) THEN e.evaluation_state_json ELSE '{}' END) c
+WHERE c.type = 'object';
+
+INSERT OR IGNORE INTO evaluation_accepted_experience (qual_id, work_experience_id)
+SELECT e.qual_id, CAST(a.value AS INTEGER)
+FROM evaluations e,
+     json_each(CASE WHEN json_valid(e.evaluation_state_json) THEN e.evaluation_state_json ELSE '{}' END,
+               '$.accepted_work_experience_ids') a
+WHERE a.value IS NOT NULL;
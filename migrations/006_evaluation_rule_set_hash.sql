@@ -0,0 +1,6 @@
+-- migrations/006_evaluation_rule_set_hash.sql
+-- Records which version of config/rules.toml each evaluation's checks were computed with.
+
+ALTER TABLE evaluations ADD COLUMN rule_set_hash TEXT;
+
+CREATE INDEX IF NOT EXISTS ix_evaluations_rule_set_hash ON evaluations (rule_set_hash);
@@ -0,0 +1,5 @@
+-- migrations/007_evaluation_accepted_years.sql
+-- Stored an accepted-years total per evaluation. Toggles now recompute it from
+-- the accepted rows, so migration 008 drops the column again.
+
+ALTER TABLE evaluations ADD COLUMN accepted_experience_years REAL;
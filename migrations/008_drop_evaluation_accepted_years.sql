@@ -0,0 +1,5 @@
+-- migrations/008_drop_evaluation_accepted_years.sql
+-- The accepted-years total is recomputed from evaluation_accepted_experience on
+-- every toggle and was never read back.
+
+ALTER TABLE evaluations DROP COLUMN accepted_experience_years;
@@ -0,0 +1,56 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Ensure app is in path
+APP_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app'))
+sys.path.insert(0, APP_PATH)
+
+from fastlite import database
+from services.application_search import ApplicationSearch
+
+FIRST_NAMES = ["Mari", "Jaan", "Kati", "Peeter", "Tõnu", "Liis", "Andres", "Kadri"]
+LAST_NAMES = ["Tamm", "Saar", "Kask", "Mägi", "Sepp", "Rebane", "Ilves", "Kukk"]
+ACTIVITIES = ["Üldehituslik ehitamine", "Teedeehitus", "Sillaehitus"]
+QUERIES = ["mari", "mari tamm", "3000001234", "firma12", "teede", "tõnu mägi", "kool"]
+
+
+def build_database(path: str, n: int):
+    """Synthetic applicants, one qualification and one work experience row each."""
+    db = database(path)
+    db.t.users.create(email=str, full_name=str, national_id_number=str, pk='email')
+    db.t.applied_qualifications.create(id=int, user_email=str, qualification_name=str, level=str, specialisation=str, pk='id')
+    db.t.work_experience.create(id=int, user_email=str, company_name=str, object_address=str, object_purpose=str, pk='id')
+    db.t.evaluations.create(qual_id=str, evaluation_state_json=str, pk='qual_id')
+    db.execute("CREATE INDEX ix_applied_qualifications_user_email ON applied_qualifications (user_email)")
+    db.execute("CREATE INDEX ix_work_experience_user_email ON work_experience (user_email)")
+
+    db.t.users.insert_all([dict(email=f"u{i}@example.com", national_id_number=str(30000000000 + i),
+                                full_name=f"{random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)}{i % 997}") for i in range(n)])
+    db.t.applied_qualifications.insert_all([dict(id=i, user_email=f"u{i}@example.com", level="Ehitusjuht, TASE 6",
+                                                 qualification_name=random.choice(ACTIVITIES), specialisation="Kandekonstruktsioonid") for i in range(n)])
+    db.t.work_experience.insert_all([dict(id=i, user_email=f"u{i}@example.com", company_name=f"Firma{i % 500} OÜ",
+                                          object_address=f"Tänav {i}", object_purpose="Kool") for i in range(n)])
+    return db
+
+
+def run_benchmark(n: int = 100_000, repeats: int = 5):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = build_database(os.path.join(tmp, "bench.db"), n)
+        start = time.perf_counter()
+        search = ApplicationSearch(db)
+        print(f"Indexed {n} applications in {time.perf_counter() - start:.1f}s")
+
+        for query in QUERIES:
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                results = search.search(query)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"  {query!r:16} {len(results):3} hits  best {min(timings):6.2f} ms  median {sorted(timings)[len(timings) // 2]:6.2f} ms")
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,79 @@
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+
+# Ensure app is in path
+APP_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app'))
+sys.path.insert(0, APP_PATH)
+
+from fastlite import database
+from itsdangerous import Signer
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import PlainTextResponse
+
+from auth.middleware import AuthMiddleware
+from auth.user_cache import UserCache
+
+SECRET = "benchmark-secret"
+
+
+async def endpoint(scope, receive, send):
+    await PlainTextResponse("ok")(scope, receive, send)
+
+
+class Passthrough(BaseHTTPMiddleware):
+    """What wrapping a request in BaseHTTPMiddleware costs before any auth logic runs."""
+
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+
+def legacy_cookie() -> bytes:
+    payload = base64.b64encode(json.dumps({"authenticated": True, "user_email": "u@example.com"}).encode())
+    return b"session=" + Signer(SECRET).sign(payload)
+
+
+async def measure(app, path: str, session: dict, headers=(), n: int = 20_000) -> float:
+    """Mean microseconds per request through ``app``, called directly as ASGI."""
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(n):
+        scope = {"type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "query_string": b"",
+                 "headers": list(headers), "session": dict(session), "state": {}}
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+async def run_benchmark(n: int):
+    db = database(":memory:")
+    db.t.users.create(email=str, role=str, full_name=str, pk='email')
+    db.t.users.insert(dict(email="u@example.com", role="applicant", full_name="Bench User"))
+    auth = AuthMiddleware(endpoint, db=db, session_secret=SECRET, user_cache=UserCache())
+    session = {"authenticated": True, "user_email": "u@example.com"}
+
+    cases = [
+        ("bare endpoint", endpoint, "/app", session, ()),
+        ("BaseHTTPMiddleware passthrough", Passthrough(endpoint), "/app", session, ()),
+        ("AuthMiddleware, public path", auth, "/auth/smart-id/status/1", {}, ()),
+        ("AuthMiddleware, authenticated", auth, "/app", session, ()),
+        ("AuthMiddleware, legacy cookie", auth, "/app", {}, [(b"cookie", legacy_cookie())]),
+        ("AuthMiddleware, anonymous redirect", auth, "/app", {}, ()),
+    ]
+    base = None
+    for name, app, path, sess, headers in cases:
+        await measure(app, path, sess, headers, n // 10) # Warm up
+        us = await measure(app, path, sess, headers, n)
+        base = us if base is None else base
+        print(f"  {name:36} {us:7.2f} us/request  (+{us - base:6.2f} us over the bare endpoint)")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000))
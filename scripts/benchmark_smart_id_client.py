@@ -0,0 +1,76 @@
+import asyncio
+import contextlib
+import io
+import os
+import socket
+import sys
+import threading
+import time
+
+# Ensure app is in path
+APP_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'app'))
+sys.path.insert(0, APP_PATH)
+
+import httpx
+import uvicorn
+
+from services import smart_id_service
+from services.smart_id_stub import create_app
+
+
+def start_stub() -> str:
+    """Runs the Smart-ID stub over real TCP on a free port in a daemon thread."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(create_app(delay=0.0), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}/"
+
+
+async def login(session_id_prefix: str, polls: int) -> None:
+    session = await smart_id_service.initiate_authentication(session_id_prefix, "aGFzaA==")
+    for _ in range(polls):
+        await smart_id_service.check_session_status(session["sessionID"])
+
+
+async def client_per_call(base_url: str, n: int):
+    """The old pattern: a new AsyncClient (and connection) for every API call."""
+    async def call():
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            session = (await client.post("authentication/etsi/PNOEE-1", json={})).json()
+        for _ in range(3):
+            async with httpx.AsyncClient(base_url=base_url) as client:
+                (await client.get(f"session/{session['sessionID']}?timeoutMs=1000")).raise_for_status()
+    return await asyncio.gather(*(call() for _ in range(n)), return_exceptions=True)
+
+
+async def shared_client(base_url: str, n: int):
+    await smart_id_service.open_client(base_url=base_url)
+    try:
+        return await asyncio.gather(*(login("1", 3) for _ in range(n)), return_exceptions=True)
+    finally:
+        await smart_id_service.close_client()
+
+
+async def run_benchmark(logins: int):
+    base_url = start_stub()
+    for name, runner in (("client per call", client_per_call), ("shared pooled client", shared_client)):
+        async with httpx.AsyncClient(base_url=base_url) as stats_client:
+            before = (await stats_client.get("stats")).json()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()): # The service logs every call
+                outcomes = await runner(base_url, logins)
+            elapsed = time.perf_counter() - start
+            after = (await stats_client.get("stats")).json()
+        requests = after["requests"] - before["requests"] - 1 # Minus the second stats read
+        connections = after["connections"] - before["connections"]
+        failed = sum(isinstance(o, Exception) for o in outcomes)
+        print(f"  {name:22} {elapsed * 1000:8.1f} ms for {logins} logins ({failed} failed), "
+              f"{requests} requests over {connections} new connections")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50))
@@ -77,3 +77,49 @@ def test_legacy_cookie_preserves_role_checks(client, _cleanup_user):
 
     response = client.get("/evaluator/d", follow_redirects=False)
     assert response.status_code == 403
+
+
+def test_public_paths_are_matched_exactly_or_by_prefix():
+    from auth.middleware import compile_public_paths
+
+    public = compile_public_paths(["/static/", "/auth/smart-id/"], ["/", "/logout", "/test"])
+    assert all(public.match(p) for p in ["/", "/logout", "/test", "/static/app.css", "/auth/smart-id/status/1"])
+    assert not any(public.match(p) for p in ["/app", "/testing", "/logout/x", "/static"])
+
+
+def test_streamed_body_passes_through_and_reader_returns_at_response_start():
+    from starlette.applications import Starlette
+    from starlette.responses import StreamingResponse
+    from starlette.routing import Route
+    from starlette.testclient import TestClient
+
+    from auth.middleware import AuthMiddleware
+
+    events = []
+
+    class Pool:
+        def checkout(self):
+            events.append("checkout")
+            return db
+
+        def checkin(self, reader):
+            events.append("checkin")
+
+    def chunks():
+        for i in range(3):
+            events.append(f"chunk {i}")
+            yield b"x" * 1000
+
+    async def download(request):
+        assert request.state.read_db is db and request.state.identity_map is not None
+        return StreamingResponse(chunks(), media_type="application/octet-stream")
+
+    inner = AuthMiddleware(Starlette(routes=[Route("/download", download)]), db=db, session_secret="s", pool=Pool())
+
+    async def with_session(scope, receive, send):
+        scope["session"] = {"authenticated": True, "user_email": "someone@example.com"}
+        await inner(scope, receive, send)
+
+    response = TestClient(with_session).get("/download")
+    assert response.status_code == 200 and response.content == b"x" * 3000
+    assert events == ["checkout", "checkin", "chunk 0", "chunk 1", "chunk 2"]
@@ -0,0 +1,60 @@
+# tests/auth/test_user_cache.py
+from fastlite import NotFoundError
+
+from auth.roles import APPLICANT, EVALUATOR
+from auth.user_cache import UserCache, user_cache
+from main import db
+
+ID_CODE = "_cache_test_id"
+EMAIL = "cache.test@example.com"
+
+
+def test_entries_expire_and_stay_bounded(authenticated_client):
+    now = [0.0]
+    cache = UserCache(ttl=30, max_entries=1, clock=lambda: now[0])
+    user = cache.get(db, "test_user@example.com")
+    assert user["role"] == APPLICANT
+
+    user["role"] = "changed by the caller"
+    assert cache.get(db, "test_user@example.com")["role"] == APPLICANT
+    now[0] = 30
+    cache.get(db, "test_user@example.com")
+    assert cache.get(db, "nobody@example.com") is None
+
+    metrics = cache.metrics()
+    assert (metrics["hits"], metrics["misses"], metrics["expired"], metrics["entries"]) == (1, 2, 1, 1)
+
+
+def test_guarded_requests_reuse_the_cached_user(authenticated_client):
+    authenticated_client.get("/app/kutsed")
+    before = user_cache.metrics()
+    for _ in range(3):
+        assert authenticated_client.get("/app/kutsed").status_code == 200
+    after = user_cache.metrics()
+    assert after["hits"] - before["hits"] == 3
+    assert after["misses"] == before["misses"] and after["expired"] == before["expired"]
+
+
+def test_promotion_and_demotion_invalidate(admin_client):
+    try:
+        db.t.users.delete(EMAIL)
+    except NotFoundError:
+        pass
+    db.t.users.insert({"email": EMAIL, "hashed_password": "", "full_name": "Cache Test", "birthday": "1990-01-01",
+                       "role": APPLICANT, "national_id_number": ID_CODE}, pk="email")
+    user_cache.invalidate(EMAIL)
+    try:
+        assert user_cache.get(db, EMAIL)["role"] == APPLICANT
+
+        admin_client.post("/dashboard/evaluators", data={"national_id_number": ID_CODE})
+        assert user_cache.get(db, EMAIL)["role"] == EVALUATOR
+
+        admin_client.delete(f"/dashboard/evaluators/{ID_CODE}")
+        assert user_cache.get(db, EMAIL)["role"] == APPLICANT
+    finally:
+        db.t.users.delete(EMAIL)
+        user_cache.invalidate(EMAIL)
+        try:
+            db.t.allowed_evaluators.delete(ID_CODE)
+        except NotFoundError:
+            pass
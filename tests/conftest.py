@@ -18,6 +18,7 @@ sys.path.insert(0, app_path)
 from main import app, db, SESSION_SECRET_KEY
 from auth.utils import get_password_hash
 from auth.roles import APPLICANT, ADMIN
+from auth.user_cache import user_cache
 
 @pytest.fixture(scope="session")
 def client():
@@ -43,6 +44,7 @@ def _create_auth_client(base_client: TestClient, email: str, role: str, full_nam
         "role": role,
         "national_id_number": f"_test_{email.split('@')[0]}"
     }, pk='email')
+    user_cache.invalidate(email) # Written behind the app's back
 
     # 2. Create and sign the session data
     session_data = {
@@ -76,6 +78,7 @@ def authenticated_client(client: TestClient):
         db.t.users.delete(email)
     except NotFoundError:
         pass
+    user_cache.invalidate(email)
 
 @pytest.fixture
 def admin_client(client: TestClient):
@@ -89,4 +92,5 @@ def admin_client(client: TestClient):
     try:
         db.t.users.delete(email)
     except NotFoundError:
-        pass
\ No newline at end of file
+        pass
+    user_cache.invalidate(email)
\ No newline at end of file
@@ -0,0 +1,114 @@
+import json
+import pytest
+from fastlite import database
+from app.services.application_index import ApplicationIndex
+
+@pytest.fixture
+def db():
+    db = database(":memory:")
+    db.t.users.create(email=str, full_name=str, pk='email')
+    db.t.users.insert(email="user1@example.com", full_name="User One")
+    db.t.users.insert(email="user2@example.com", full_name="User Two")
+
+    db.t.applied_qualifications.create(
+        id=int, user_email=str, qualification_name=str, level=str,
+        specialisation=str, activity=str, eval_decision=str, pk='id'
+    )
+    db.t.applied_qualifications.insert(id=1, user_email="user1@example.com", level="Lvl5", qualification_name="Job", specialisation="Spec1")
+    db.t.applied_qualifications.insert(id=2, user_email="user1@example.com", level="Lvl5", qualification_name="Job", specialisation="Spec2")
+    db.t.applied_qualifications.insert(id=3, user_email="user2@example.com", level="Lvl5", qualification_name="Job", specialisation="Spec1", eval_decision="Anda")
+
+    db.t.evaluations.create(qual_id=str, evaluation_state_json=str, pk='qual_id')
+    db.t.evaluations.insert(qual_id="user1@example.com:::Lvl5:::Job", evaluation_state_json=json.dumps({"overall_met": True, "final_decision": None}))
+    return db
+
+def test_backfill_on_creation(db):
+    index = ApplicationIndex(db)
+    apps = index.list_all()
+
+    assert [a['applicant_name'] for a in apps] == ["User One", "User Two"]
+    user1, user2 = apps
+    assert user1['selected_specialisations_count'] == 2
+    assert user1['specialisations'] == ["Spec1", "Spec2"]
+    assert user1['precheck_met'] is True
+    assert user1['final_decision'] is None
+    # No evaluation saved: decision falls back to the legacy column
+    assert user2['precheck_met'] is None
+    assert user2['final_decision'] == "Anda"
+
+def test_refresh_application_and_user(db):
+    index = ApplicationIndex(db)
+    qual_id = "user1@example.com:::Lvl5:::Job"
+
+    db.execute("UPDATE evaluations SET evaluation_state_json = ? WHERE qual_id = ?",
+               (json.dumps({"overall_met": False, "final_decision": "Mitte anda"}), qual_id))
+    index.refresh_application(qual_id)
+    row = index.get(qual_id)
+    assert row['precheck_met'] is False
+    assert row['final_decision'] == "Mitte anda"
+
+    db.t.applied_qualifications.delete_where("user_email = ?", ["user1@example.com"])
+    index.refresh_user("user1@example.com")
+    assert index.get(qual_id) is None
+    assert index.count() == 1
+
+def test_keyset_pagination_and_filters(db):
+    for i in range(5):
+        email = f"bulk{i}@example.com"
+        db.t.users.insert(email=email, full_name=f"Bulk {i}")
+        db.t.applied_qualifications.insert(id=10 + i, user_email=email, level="Lvl6", qualification_name="Job", specialisation="Spec1")
+    index = ApplicationIndex(db)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = index.page(cursor=cursor, limit=3)
+        seen.extend(a['qual_id'] for a in page)
+        if not cursor:
+            break
+    assert seen == [a['qual_id'] for a in index.list_all()]
+    assert len(seen) == 7
+
+    assert len(index.page(level="Lvl6", limit=10)[0]) == 5
+    assert [a['applicant_name'] for a in index.page(decision="Anda")[0]] == ["User Two"]
+    assert [a['applicant_name'] for a in index.page(precheck="1")[0]] == ["User One"]
+    assert len(index.page(decision="none")[0]) == 6
+    # A tampered cursor is ignored rather than failing the request
+    assert len(index.page(cursor="not-a-cursor", limit=10)[0]) == 7
+
+def test_version_bumps_on_row_changes(db):
+    index = ApplicationIndex(db)
+    before = index.version()
+    index.refresh_application("user1@example.com:::Lvl5:::Job")
+    assert index.version() > before
+    unchanged = index.version()
+    index.list_all()
+    assert index.version() == unchanged
+
+def test_refresh_does_not_probe_the_schema(db):
+    index = ApplicationIndex(db)
+    statements = []
+    db.conn.exec_trace = lambda cursor, sql, bindings: statements.append(sql) or True
+    try:
+        index.refresh_user("user1@example.com")
+        index.refresh_application("user2@example.com:::Lvl5:::Job")
+    finally:
+        db.conn.exec_trace = None
+    assert statements and not any("PRAGMA" in sql for sql in statements)
+    assert index.count() == 2
+
+def test_patch_targets_item_in_each_container(db):
+    from fasthtml.common import to_xml
+    from app.ui.evaluator_v2.application_list import render_application_patch, get_safe_dom_id
+
+    app = ApplicationIndex(db).get("user1@example.com:::Lvl5:::Job")
+    html = to_xml(render_application_patch(app))
+    for suffix in ("", "-drawer"):
+        assert f'id="{get_safe_dom_id(app["qual_id"], suffix)}"' in html
+    assert html.count('hx-swap-oob="true"') == 2
+
+
+def test_app_controllers_share_one_index():
+    import main
+    controllers = (main.auth_ctrl, main.qual_ctrl, main.eval_search, main.eval_bench)
+    assert all(c.index is main.app_index for c in controllers)
+    assert main.eval_search.search.index is main.app_index
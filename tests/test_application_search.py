@@ -0,0 +1,61 @@
+import pytest
+from fastlite import database
+from app.services.application_index import ApplicationIndex
+from app.services.application_search import ApplicationSearch, split_highlight, to_match_query
+
+@pytest.fixture
+def db():
+    db = database(":memory:")
+    db.t.users.create(email=str, full_name=str, national_id_number=str, pk='email')
+    db.t.users.insert(email="mari@example.com", full_name="Mari Tõnisson", national_id_number="49001010001")
+    db.t.users.insert(email="jaan@example.com", full_name="Jaan Tamm", national_id_number="38001010002")
+
+    db.t.applied_qualifications.create(
+        id=int, user_email=str, qualification_name=str, level=str, specialisation=str, pk='id'
+    )
+    db.t.applied_qualifications.insert(id=1, user_email="mari@example.com", level="Ehitusjuht, TASE 6", qualification_name="Üldehituslik ehitamine", specialisation="Kandekonstruktsioonid")
+    db.t.applied_qualifications.insert(id=2, user_email="jaan@example.com", level="Oskustööline, TASE 4", qualification_name="Müürsepp", specialisation=None)
+
+    db.t.work_experience.create(id=int, user_email=str, company_name=str, object_address=str, object_purpose=str, pk='id')
+    db.t.evaluations.create(qual_id=str, evaluation_state_json=str, pk='qual_id')
+    return db
+
+def test_to_match_query_prefixes_every_word():
+    assert to_match_query('Mari "Tõn') == '"Mari"* "Tõn"*'
+    assert to_match_query("  --  ") is None
+
+def test_ranked_highlighted_search(db):
+    search = ApplicationSearch(db)
+
+    results = search.search("tonis")  # diacritics folded, prefix match
+    assert [a['applicant_name'] for a in results] == ["Mari Tõnisson"]
+    assert ("Tõnisson", True) in split_highlight(results[0]['highlights']['applicant_name'])
+
+    assert [a['user_email'] for a in search.search("3800101")] == ["jaan@example.com"]
+    assert [a['user_email'] for a in search.search("kandekon")] == ["mari@example.com"]
+    assert search.search("mari", level="Oskustööline, TASE 4") == []
+
+def test_triggers_keep_search_current(db):
+    index = ApplicationIndex(db)
+    search = ApplicationSearch(db, index)
+
+    db.t.work_experience.insert(id=1, user_email="jaan@example.com", company_name="Ehitus OÜ", object_address="Tartu mnt 5", object_purpose="Kool")
+    assert [a['user_email'] for a in search.search("tartu kool")] == ["jaan@example.com"]
+    db.t.work_experience.delete(1)
+    assert search.search("tartu") == []
+
+    db.execute("UPDATE users SET full_name = 'Jaan Kask' WHERE email = 'jaan@example.com'")
+    index.refresh_user("jaan@example.com")
+    assert search.search("tamm") == []
+    assert len(search.search("kask")) == 1
+
+def test_best_matches_are_kept_past_the_limit(db):
+    for i in range(3, 9): # Company-only hits, scanned first in rowid order
+        db.t.users.insert(email=f"u{i}@example.com", full_name=f"Applicant {i}", national_id_number=str(i))
+        db.t.applied_qualifications.insert(id=i, user_email=f"u{i}@example.com", level="Oskustööline, TASE 4", qualification_name="Müürsepp", specialisation=None)
+        db.t.work_experience.insert(id=i, user_email=f"u{i}@example.com", company_name="Teede OÜ", object_address="", object_purpose="")
+    db.t.users.insert(email="zed@example.com", full_name="Zed Last", national_id_number="9")
+    db.t.applied_qualifications.insert(id=9, user_email="zed@example.com", level="Ehitusjuht, TASE 6", qualification_name="Teedeehitus", specialisation=None)
+
+    results = ApplicationSearch(db).search("teede", limit=3)
+    assert len(results) == 3 and results[0]['qualification_name'] == "Teedeehitus"
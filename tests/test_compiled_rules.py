@@ -0,0 +1,109 @@
+import pickle
+from pathlib import Path
+
+import pytest
+
+from logic.compiled_rules import compile_package
+from logic.models import ApplicantData, EligibilityPackage
+from logic.validator import ValidationEngine
+from services.applicant_data import build_applicant_data
+
+RULES_PATH = Path(__file__).parent.parent / 'app' / 'config' / 'rules.toml'
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return ValidationEngine(RULES_PATH)
+
+
+def _states(engine, applicant, qualification_id="toojuht_tase_5"):
+    return {s.package_id: s for s in engine.validate(applicant, qualification_id)}
+
+
+def test_every_package_in_rules_compiles(engine):
+    assert {p.id for p in engine.get_compiled_packages("ehitusjuht_tase_6")} == set(engine.packages_by_id["ehitusjuht_tase_6"])
+
+
+def test_conditional_rule_and_grouped_education_requirement(engine):
+    applicant = ApplicantData(education="vastav_kõrgharidus_240_eap", work_experience_years=3.0,
+                              matching_experience_years=3.0, higher_ed_field="vastav")
+    state = _states(engine, applicant)["tj5_variant_4"]
+    assert state.overall_met and state.education.is_met
+    assert not state.matching_experience.is_relevant
+
+    applicant.higher_ed_field = "mittevastav"
+    state = _states(engine, applicant)["tj5_variant_4"]
+    assert not state.overall_met
+    assert (state.matching_experience.required, state.matching_experience.provided) == ("5a", "3.0a")
+
+    applicant.education = "keskharidus"
+    assert not _states(engine, applicant)["tj5_variant_4"].education.is_met
+
+
+def test_windowed_experience_falls_back_to_totals(engine):
+    applicant = ApplicantData(education="vastav_kõrgharidus_300_eap", work_experience_years=8.0,
+                              matching_experience_years=8.0)
+    assert _states(engine, applicant, "ehitusjuht_tase_6")["ej6_deg_matched_300"].overall_met
+
+    applicant.matching_experience_years_by_window = {5: 1.5}
+    state = _states(engine, applicant, "ehitusjuht_tase_6")["ej6_deg_matched_300"]
+    assert not state.overall_met
+    assert state.matching_experience.provided == "1.5a"
+
+
+def test_route_prior_qualification_and_recert_training(engine):
+    applicant = ApplicantData(education="any", matching_experience_years=3.0, cpd_training_hours=16,
+                              has_prior_same_level=True)
+    assert not _states(engine, applicant)["tj5_taastõendamine"].overall_met
+
+    applicant.certification_type = "taastõendamine"
+    states = _states(engine, applicant)
+    assert states["tj5_taastõendamine"].overall_met
+    assert not states["tj5_variant_1"].overall_met
+    assert states["tj5_taastõendamine"].prior_level_4.is_met
+
+    state = _states(engine, applicant, "ehitusjuht_tase_6")["ej6_taastõendamine"]
+    assert not state.overall_met
+    assert (state.cpd_training.required, state.cpd_training.provided) == ("32h", "16h")
+
+
+def test_prior_certificates_without_data_are_left_to_the_evaluator(engine):
+    applicant = ApplicantData(education="any", matching_experience_years=2.0, cpd_training_hours=16)
+    state = _states(engine, applicant)["tj5_variant_3"]
+    assert state.overall_met and not state.prior_level_4.is_relevant
+
+    applicant.has_prior_level_6 = False
+    state = _states(engine, applicant)["tj5_variant_3"]
+    assert not state.overall_met and state.prior_level_4.is_relevant
+
+
+def test_applicant_data_derives_higher_ed_field():
+    windows = {0: (3.0, 3.0), 5: (3.0, 3.0), 10: (3.0, 3.0)}
+    assert build_applicant_data("mittevastav_kõrgharidus_240_eap", windows).higher_ed_field == "mittevastav"
+    assert build_applicant_data("vastav_kõrgharidus_300_eap", windows).higher_ed_field == "vastav"
+    assert build_applicant_data("keskharidus", windows).higher_ed_field is None
+
+
+def test_conditional_training_covers_manager_hours(engine):
+    applicant = ApplicantData(education="vastav_kõrgharidus_300_eap", matching_experience_years=3.0,
+                              is_education_old_or_foreign=True, manager_training_hours=0)
+    state = _states(engine, applicant, "ehitusjuht_tase_6")["ej6_deg_matched_300"]
+    assert not state.overall_met
+    assert (state.conditional_training.required, state.conditional_training.provided) == ("30h", "0h")
+
+
+@pytest.mark.parametrize("package", [
+    EligibilityPackage(id="bad_education", education_requirement="doktorikraad"),
+    EligibilityPackage(id="bad_condition", conditional_rules=[{"when": "age > 30", "set": {"total_experience_years": 1}}]),
+    EligibilityPackage(id="bad_override", conditional_rules=[{"when": "higher_ed_field == 'x'", "set": {"role": 1}}]),
+    EligibilityPackage(id="bad_trigger", conditional_training={"trigger": "unknown", "base_training_hours": 30}),
+])
+def test_rules_that_cannot_be_evaluated_fail_at_compile_time(package):
+    with pytest.raises(ValueError):
+        compile_package(package)
+
+
+def test_compiled_packages_pickle_for_worker_processes(engine):
+    package = engine.get_compiled_packages("toojuht_tase_5")[3]
+    applicant = ApplicantData(education="keskharidus", higher_ed_field="mittevastav")
+    assert pickle.loads(pickle.dumps(package)).evaluate(applicant) == package.evaluate(applicant)
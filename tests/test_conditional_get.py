@@ -0,0 +1,63 @@
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from main import db
+from utils.conditional_get import ConditionalGet, ConditionalGetMiddleware
+
+
+def test_unchanged_tab_is_not_modified(authenticated_client):
+    first = authenticated_client.get("/app/dokumendid", headers={"HX-Request": "true"})
+    assert first.status_code == 200 and first.headers["ETag"].startswith('W/"')
+    etag = first.headers["ETag"]
+
+    repeat = authenticated_client.get("/app/dokumendid", headers={"HX-Request": "true", "If-None-Match": etag})
+    assert repeat.status_code == 304 and repeat.headers["ETag"] == etag and not repeat.content
+
+    # The full page is a different representation
+    page = authenticated_client.get("/app/dokumendid", headers={"If-None-Match": etag})
+    assert page.status_code == 200 and page.headers["ETag"] != etag
+
+    db.t.users.update({"email": "test_user@example.com", "full_name": "Renamed Applicant"})
+    changed = authenticated_client.get("/app/dokumendid", headers={"HX-Request": "true", "If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+
+
+def test_writes_and_unregistered_routes_are_not_tagged(authenticated_client):
+    assert "ETag" not in authenticated_client.get("/app").headers
+    assert "ETag" not in authenticated_client.post("/app/kutsed/submit", data={"qual_1_0": "on"}).headers
+
+
+def test_middleware_tags_start_message_and_passes_others_through():
+    conditional = ConditionalGet()
+    conditional.route(r"/tab")(lambda req, rdb: ("v1",))
+
+    async def login(request):
+        request.session["user_email"] = "a@example.com"
+        return PlainTextResponse("ok")
+
+    async def chunks():
+        yield b"one "
+        yield b"two"
+
+    class Seed: # What AuthMiddleware puts on the scope
+        def __init__(self, app): self.app = app
+        async def __call__(self, scope, receive, send):
+            scope.setdefault("state", {})["db"] = db
+            await self.app(scope, receive, send)
+
+    app = Starlette(routes=[Route("/login", login), Route("/tab", lambda r: StreamingResponse(chunks())),
+                            Route("/stream", lambda r: StreamingResponse(chunks()))],
+                    middleware=[Middleware(SessionMiddleware, secret_key="k"), Middleware(Seed),
+                                Middleware(ConditionalGetMiddleware, conditional=conditional)])
+    with TestClient(app) as client:
+        client.get("/login")
+        tab = client.get("/tab")
+        assert tab.text == "one two" and tab.headers["ETag"].startswith('W/"')
+        assert client.get("/tab", headers={"If-None-Match": tab.headers["ETag"]}).status_code == 304
+        stream = client.get("/stream")
+        assert stream.text == "one two" and "ETag" not in stream.headers
+    assert conditional.metrics()["tagged"] == 1 and conditional.metrics()["not_modified"] == 1
@@ -0,0 +1,88 @@
+import threading
+
+import apsw
+import pytest
+from fastlite import database as fastlite_database
+
+from database import transaction
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = fastlite_database(str(tmp_path / "tx.db"))
+    db.enable_wal()
+    db.t.items.create(id=int, name=str, pk="id")
+    return db
+
+
+def _names(db):
+    return [r["name"] for r in db.t.items(order_by="id")]
+
+
+def test_block_commits_or_rolls_back_as_a_whole(db):
+    with transaction(db):
+        db.t.items.insert({"id": 1, "name": "a"})
+        db.t.items.insert({"id": 2, "name": "b"})
+    assert _names(db) == ["a", "b"]
+
+    with pytest.raises(ValueError):
+        with transaction(db):
+            db.t.items.delete_where("id = ?", [1])
+            db.t.items.insert({"id": 3, "name": "c"})
+            raise ValueError("boom")
+    assert _names(db) == ["a", "b"]
+    assert not db.conn.in_transaction
+
+
+def test_nested_block_is_a_savepoint(db):
+    with transaction(db):
+        db.t.items.insert({"id": 1, "name": "outer"})
+        with pytest.raises(ValueError):
+            with transaction(db):
+                db.t.items.insert({"id": 2, "name": "inner"})
+                raise ValueError("boom")
+        with transaction(db):
+            db.t.items.insert({"id": 3, "name": "kept"})
+    assert _names(db) == ["outer", "kept"]
+
+
+def test_busy_begin_is_retried(db, tmp_path):
+    other = apsw.Connection(str(tmp_path / "tx.db"))
+    other.execute("BEGIN IMMEDIATE")
+    timer = threading.Timer(0.15, lambda: other.execute("COMMIT"))
+    timer.start()
+    try:
+        db.conn.execute("PRAGMA busy_timeout=0")
+        with transaction(db, retries=8, backoff=0.02):
+            db.t.items.insert({"id": 1, "name": "after wait"})
+    finally:
+        timer.join()
+    assert _names(db) == ["after wait"]
+
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        with pytest.raises(apsw.BusyError):
+            with transaction(db, retries=1, backoff=0.01):
+                pass
+    finally:
+        other.execute("COMMIT")
+
+
+def test_other_threads_do_not_join_an_open_transaction(db):
+    a_open, b_started = threading.Event(), threading.Event()
+
+    def thread_b():
+        b_started.set()
+        with transaction(db): # Waits for A instead of becoming a savepoint inside it
+            db.t.items.insert({"id": 2, "name": "b"})
+
+    b = threading.Thread(target=thread_b)
+    with pytest.raises(ValueError):
+        with transaction(db):
+            db.t.items.insert({"id": 1, "name": "a"})
+            b.start()
+            b_started.wait()
+            a_open.wait(0.1) # Give B time to run into the open transaction
+            raise ValueError("A rolls back")
+    b.join()
+    assert _names(db) == ["b"]
@@ -0,0 +1,64 @@
+import apsw
+import pytest
+from fastlite import database
+
+from utils.db_pool import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    path = str(tmp_path / "pool.db")
+    writer = database(path)
+    writer.enable_wal()
+    writer.t.users.create(email=str, full_name=str, pk="email")
+    writer.t.users.insert(dict(email="a@example.com", full_name="Mari Tamm"))
+    pool = ConnectionPool(writer, path, readers=2)
+    yield pool
+    pool.close()
+
+
+def test_readers_are_read_only_and_see_committed_writes(pool):
+    with pool.reader() as reader:
+        assert reader is not pool.writer
+        assert reader.t.users["a@example.com"]["full_name"] == "Mari Tamm"
+        with pytest.raises(apsw.ReadOnlyError):
+            reader.execute("DELETE FROM users")
+
+    pool.writer.t.users.insert(dict(email="b@example.com", full_name="Jaan Saar"))
+    with pool.reader() as reader:
+        assert reader.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 2
+
+
+def test_exhausted_pool_falls_back_to_writer_and_counts(pool):
+    first, second = pool.checkout(), pool.checkout()
+    assert first is not None and second is not None
+    assert pool.checkout() is None
+    with pool.reader() as reader:
+        assert reader is pool.writer
+    pool.checkin(first)
+    pool.checkin(second)
+
+    metrics = pool.metrics()
+    assert metrics["checkouts"] == metrics["checkins"] == 2
+    assert metrics["in_use"] == 0 and metrics["peak_in_use"] == 2
+    assert metrics["exhausted"] == 2
+    assert metrics["idle"] == metrics["size"] == 2
+
+
+def test_memory_database_reads_through_writer():
+    writer = database(":memory:")
+    pool = ConnectionPool(writer, ":memory:")
+    assert pool.metrics()["size"] == 0
+    with pool.reader() as reader:
+        assert reader is writer
+
+
+def test_requests_return_their_reader(admin_client):
+    from main import db_pool
+    before = db_pool.metrics()
+    response = admin_client.get("/admin/metrics/db")
+    assert response.status_code == 200
+    assert response.json()["pool"]["size"] == db_pool.size
+    after = db_pool.metrics()
+    assert after["in_use"] == before["in_use"]
+    assert after["checkins"] - before["checkins"] == after["checkouts"] - before["checkouts"] >= 1
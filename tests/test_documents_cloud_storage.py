@@ -4,43 +4,17 @@ import json
 import base64
 from itsdangerous import Signer
 
-from main import db, documents_controller, SESSION_SECRET_KEY
+from main import db, doc_ctrl, SESSION_SECRET_KEY
 from auth.roles import EVALUATOR
-
-
-class FakeBlob:
-    def __init__(self, name: str, storage: dict[str, tuple[bytes, str | None]]):
-        self._name = name
-        self._storage = storage
-
-    def upload_from_string(self, data: bytes, content_type: str | None = None) -> None:
-        self._storage[self._name] = (data, content_type)
-
-    def exists(self) -> bool:
-        return self._name in self._storage
-
-    def generate_signed_url(self, *_, **__) -> str:
-        return f"https://fake.storage/{self._name}"
-
-
-class FakeBucket:
-    def __init__(self) -> None:
-        self.storage: dict[str, tuple[bytes, str | None]] = {}
-
-    def blob(self, name: str) -> FakeBlob:
-        return FakeBlob(name, self.storage)
+from auth.user_cache import user_cache
+from services.file_storage import LocalBackend, MemoryBackend
 
 
 def test_document_upload_requires_cloud_storage(authenticated_client):
-    controller = documents_controller
-
-    original_bucket = controller.bucket
-    original_local_dir = controller.local_storage_dir
-    original_fallback = controller._local_fallback_enabled
+    controller = doc_ctrl
 
-    controller.bucket = None
-    controller.local_storage_dir = None
-    controller._local_fallback_enabled = False
+    original_backend = controller.backend
+    controller.backend = None
 
     try:
         response = authenticated_client.post(
@@ -50,17 +24,15 @@ def test_document_upload_requires_cloud_storage(authenticated_client):
         )
         assert response.status_code == 503
     finally:
-        controller.bucket = original_bucket
-        controller.local_storage_dir = original_local_dir
-        controller._local_fallback_enabled = original_fallback
+        controller.backend = original_backend
 
 
 def test_document_upload_and_view_uses_signed_url(authenticated_client):
-    controller = documents_controller
+    controller = doc_ctrl
 
-    fake_bucket = FakeBucket()
-    original_bucket = controller.bucket
-    controller.bucket = fake_bucket
+    backend = MemoryBackend()
+    original_backend = controller.backend
+    controller.backend = backend
 
     try:
         existing_ids = {doc.get("id") for doc in controller.documents_table(order_by="id")}
@@ -79,35 +51,68 @@ def test_document_upload_and_view_uses_signed_url(authenticated_client):
         assert new_docs, "Expected document to be stored"
         document = new_docs[-1]
 
-        storage_identifier = document.get("storage_identifier")
-        assert storage_identifier in fake_bucket.storage
+        key = backend.key(document.get("storage_identifier"))
+        assert key.startswith("documents/test_userexample.com/") and key.endswith(".pdf")
+        assert backend.get(key) == file_bytes
 
         view_response = authenticated_client.get(f"/files/view/{document['id']}", follow_redirects=False)
         assert view_response.status_code == 307
-        assert view_response.headers.get("location") == f"https://fake.storage/{storage_identifier}"
+        assert view_response.headers.get("location").startswith(f"https://storage.invalid/{key}?")
+
+        # The row's upload metadata stands in for an existence check, and the URL is reused
+        backend.exists = backend.sign = None
+        repeat = authenticated_client.get(f"/files/view/{document['id']}", follow_redirects=False)
+        assert repeat.status_code == 307 and repeat.headers["location"] == view_response.headers["location"]
 
     finally:
-        controller.bucket = original_bucket
+        controller.backend = original_backend
 
 
-def test_localised_evaluator_can_view_other_users_document(authenticated_client):
-    controller = documents_controller
+def test_local_document_is_streamed_by_the_app(authenticated_client, tmp_path):
+    controller = doc_ctrl
+
+    backend = LocalBackend(tmp_path)
+    original_backend = controller.backend
+    controller.backend = backend
+    backend.put("documents/test_userexample.com/local.pdf", b"local bytes")
 
-    original_bucket = controller.bucket
-    original_local_dir = controller.local_storage_dir
-    original_fallback = controller._local_fallback_enabled
+    doc_record = controller.documents_table.insert({
+        "user_email": "test_user@example.com", "document_type": "other", "description": "Local document",
+        "metadata": "{}", "original_filename": "tõend.pdf",
+        "storage_identifier": backend.identifier("documents/test_userexample.com/local.pdf"),
+        "upload_timestamp": "2024-01-01T00:00:00",
+    })
+    traversal = controller.documents_table.insert({**doc_record, "id": None, "storage_identifier": "local:../outside.pdf"})
+
+    try:
+        view_response = authenticated_client.get(f"/files/view/{doc_record['id']}")
+        assert view_response.status_code == 200 and view_response.content == b"local bytes"
+        assert view_response.headers["content-type"] == "application/pdf"
+        assert "t%C3%B5end.pdf" in view_response.headers["content-disposition"]
+
+        assert authenticated_client.get(f"/files/view/{traversal['id']}").status_code == 400
+
+        backend.delete("documents/test_userexample.com/local.pdf")
+        assert authenticated_client.get(f"/files/view/{doc_record['id']}").status_code == 404
+    finally:
+        controller.backend = original_backend
+        controller.documents_table.delete(doc_record["id"])
+        controller.documents_table.delete(traversal["id"])
+
+
+def test_localised_evaluator_can_view_other_users_document(authenticated_client):
+    controller = doc_ctrl
 
-    fake_bucket = FakeBucket()
-    controller.bucket = fake_bucket
-    controller.local_storage_dir = None
-    controller._local_fallback_enabled = False
+    original_backend = controller.backend
+    backend = MemoryBackend()
+    controller.backend = backend
 
-    storage_identifier = "other.user/doc.pdf"
-    fake_bucket.storage[storage_identifier] = (b"data", "application/pdf")
+    key = "documents/other.userexample.com/doc.pdf"
+    backend.put(key, b"data", "application/pdf")
 
     doc_record = controller.documents_table.insert({
         "user_email": "other.user@example.com", "document_type": "other", "description": "Other user document",
-        "metadata": "{}", "original_filename": "doc.pdf", "storage_identifier": storage_identifier,
+        "metadata": "{}", "original_filename": "doc.pdf", "storage_identifier": backend.identifier(key),
         "upload_timestamp": "2024-01-01T00:00:00",
     })
     document_id = doc_record.get('id')
@@ -117,7 +122,8 @@ def test_localised_evaluator_can_view_other_users_document(authenticated_client)
     original_role = users_table[test_user_email].get("role")
 
     try:
-        users_table.update({"role": "Hindaja"}, pk_values=test_user_email)
+        users_table.update({"role": EVALUATOR}, pk_values=test_user_email)
+        user_cache.invalidate(test_user_email)
 
         # Re-authenticate the client with the new 'evaluator' role
         session_data = {"authenticated": True, "user_email": test_user_email, "role": EVALUATOR}
@@ -128,10 +134,9 @@ def test_localised_evaluator_can_view_other_users_document(authenticated_client)
         view_response = authenticated_client.get(f"/files/view/{document_id}", follow_redirects=False)
 
         assert view_response.status_code == 307
-        assert view_response.headers.get("location") == f"https://fake.storage/{storage_identifier}"
+        assert view_response.headers.get("location").startswith(f"https://storage.invalid/{key}?")
     finally:
         users_table.update({"role": original_role}, pk_values=test_user_email)
-        controller.bucket = original_bucket
-        controller.local_storage_dir = original_local_dir
-        controller._local_fallback_enabled = original_fallback
-        controller.documents_table.delete(document_id)
\ No newline at end of file
+        user_cache.invalidate(test_user_email)
+        controller.backend = original_backend
+        controller.documents_table.delete(document_id)
@@ -0,0 +1,57 @@
+import dataclasses
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+from fastlite import database
+from app.logic.models import ComplianceCheck, ComplianceDashboardState
+from app.services.evaluation_store import EvaluationStore
+
+MIGRATIONS = Path(__file__).resolve().parent.parent / "migrations"
+QUAL_ID = "app@example.com:::Ehitusjuht, TASE 6:::Ehitusjuhtimine"
+
+def _legacy_state():
+    state = ComplianceDashboardState(package_id="pkg_1", overall_met=True, final_decision="Anda", otsus_comment="OK")
+    state.education = ComplianceCheck(is_relevant=True, is_met=True, required="Kõrgharidus", provided="Kõrgharidus")
+    state.accepted_work_experience_ids = [7, 3]
+    return state
+
+def test_save_and_load_roundtrip():
+    db = database(":memory:")
+    db.t.evaluations.create(qual_id=str, evaluator_email=str, evaluation_state_json=str, updated_at=str, pk='qual_id')
+    store = EvaluationStore(db)
+
+    store.save(QUAL_ID, "eval@example.com", _legacy_state())
+    loaded = store.load(QUAL_ID)
+    assert loaded['final_decision'] == "Anda"
+    assert loaded['overall_met'] is True
+    assert loaded['education'] == dict(is_relevant=True, is_met=True, required="Kõrgharidus",
+                                       provided="Kõrgharidus", evaluator_comment=None)
+    assert loaded['accepted_work_experience_ids'] == [3, 7]
+
+    state = _legacy_state()
+    state.accepted_work_experience_ids = []
+    store.save(QUAL_ID, "eval@example.com", state)
+    assert store.load(QUAL_ID)['accepted_work_experience_ids'] == []
+    row = db.execute("SELECT revision, evaluation_state_json FROM evaluations WHERE qual_id = ?", (QUAL_ID,)).fetchone()
+    assert row == (2, None)
+    assert store.load("missing") is None
+
+def test_migration_converts_legacy_blobs(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript((MIGRATIONS / "004_create_evaluations_table.sql").read_text())
+        conn.execute("INSERT INTO evaluations (qual_id, evaluator_email, evaluation_state_json) VALUES (?, ?, ?)",
+                     (QUAL_ID, "eval@example.com", json.dumps(dataclasses.asdict(_legacy_state()))))
+        conn.execute("INSERT INTO evaluations (qual_id, evaluator_email, evaluation_state_json) VALUES ('broken', 'e', 'not json')")
+        conn.executescript((MIGRATIONS / "005_normalize_evaluation_state.sql").read_text())
+
+    store = EvaluationStore(database(db_path))
+    loaded = store.load(QUAL_ID)
+    assert loaded['final_decision'] == "Anda"
+    assert loaded['package_id'] == "pkg_1"
+    assert loaded['education']['is_met'] is True
+    assert loaded['accepted_work_experience_ids'] == [3, 7]
+    with pytest.raises(ValueError):
+        store.load('broken')  # Unconvertible rows keep the legacy format
@@ -8,6 +8,7 @@ from app.controllers.evaluator import EvaluatorController
 from app.controllers.evaluator_search_controller import EvaluatorSearchController
 from app.logic.models import ComplianceDashboardState
 from app.logic.validator import ValidationEngine
+from app.services.evaluation_store import EvaluationStore
 
 # Mock classes
 class MockRequest:
@@ -100,9 +101,8 @@ async def test_persistence_workflow(db, validation_engine):
     await bench_ctrl.re_evaluate_application(req, qual_id)
 
     # 2. Verify DB state (Persistence)
-    saved_eval = db.t.evaluations.get(qual_id)
-    assert saved_eval is not None, "Evaluation record not found in DB"
-    state = json.loads(saved_eval['evaluation_state_json'])
+    state = EvaluationStore(db).load(qual_id)
+    assert state is not None, "Evaluation record not found in DB"
     assert state['final_decision'] == "Anda"
     assert state['otsus_comment'] == "Test decision"
 
@@ -0,0 +1,90 @@
+import datetime
+
+import pytest
+from fastlite import database
+
+from app.services.experience_summary import ExperienceSummary
+
+
+@pytest.fixture
+def db():
+    db = database(":memory:")
+    db.t.work_experience.create(id=int, user_email=str, start_date=str, end_date=str,
+                                associated_activity=str, pk='id')
+    # 2020 (Teedeehitus) overlaps 2020-07..2021-06 (Sillaehitus): 18 merged months overall
+    db.t.work_experience.insert(id=1, user_email="app@example.com", start_date="2020-01", end_date="2020-12",
+                                associated_activity="Teedeehitus")
+    db.t.work_experience.insert(id=2, user_email="app@example.com", start_date="2020-07", end_date="2021-06",
+                                associated_activity="Sillaehitus")
+    return db
+
+
+def _cached_rows(db, email="app@example.com"):
+    return dict(db.execute("SELECT activity, years FROM applicant_experience_summary "
+                           "WHERE user_email = ? AND window_years = 0", (email,)).fetchall())
+
+
+def test_totals_are_computed_once_and_cached(db):
+    summary = ExperienceSummary(db)
+    assert summary.get("app@example.com") == (1.5, 1.5)
+    assert summary.get("app@example.com", "Teedeehitus") == (1.5, 1.0)
+    assert summary.get("app@example.com", "Üldehitus") == (1.5, 0.0)
+    assert _cached_rows(db) == {"": 1.5, "Teedeehitus": 1.0, "Sillaehitus": 1.0}
+
+    # Served from the table: a tampered row is returned as is
+    db.execute("UPDATE applicant_experience_summary SET years = 9 WHERE activity = ''")
+    assert summary.get("app@example.com")[0] == 9
+
+
+def test_work_experience_changes_invalidate_the_user(db):
+    summary = ExperienceSummary(db)
+    summary.get("app@example.com")
+    db.t.work_experience.insert(id=3, user_email="other@example.com", start_date="2019-01", end_date="2019-12")
+    assert _cached_rows(db)
+
+    db.t.work_experience.delete(2)
+    assert _cached_rows(db) == {}
+    assert summary.get("app@example.com", "Sillaehitus") == (1.0, 0.0)
+
+
+def test_ongoing_role_is_only_valid_this_month(db):
+    summary = ExperienceSummary(db)
+    summary.get("app@example.com")
+    months = dict(db.execute("SELECT window_years, valid_month FROM applicant_experience_summary"))
+    assert months == {0: None, 5: datetime.date.today().strftime("%Y-%m"), 10: datetime.date.today().strftime("%Y-%m")}
+
+    db.t.work_experience.insert(id=3, user_email="app@example.com", start_date="2023-01", end_date=None)
+    summary.get("app@example.com")
+    months = {r[0] for r in db.execute("SELECT valid_month FROM applicant_experience_summary")}
+    assert months == {datetime.date.today().strftime("%Y-%m")}
+
+    db.execute("UPDATE applicant_experience_summary SET valid_month = '2000-01', years = 0")
+    assert summary.get("app@example.com")[0] > 1.5
+
+
+def test_windows_only_count_recent_months(db):
+    today = datetime.date.today()
+    db.t.work_experience.insert(id=3, user_email="app@example.com", start_date=f"{today.year - 1}-{today.month:02d}",
+                                end_date=None, associated_activity="Teedeehitus")
+    windows = ExperienceSummary(db).get_windows("app@example.com", "Teedeehitus")
+    # The last year falls in every window; 2020-2021 is outside the 5-year window from 2026 on
+    assert windows[0] == pytest.approx((1.5 + 13 / 12, 1.0 + 13 / 12), abs=0.01)
+    if today.year >= 2026:
+        assert windows[5] == pytest.approx((13 / 12, 13 / 12), abs=0.01)
+    assert windows[10] == windows[0]
+
+
+def test_cold_cohort_is_refreshed_in_one_transaction(db, monkeypatch):
+    db.t.work_experience.insert(id=3, user_email="other@example.com", start_date="2019-01", end_date="2019-12")
+    summary = ExperienceSummary(db)
+    summary.get("untouched@example.com")
+    commits = []
+    db.conn.set_commit_hook(lambda: commits.append(1) or False)
+    monkeypatch.setattr("app.services.experience_summary.QUERY_CHUNK", 1) # One IN (...) read per user
+
+    summaries = summary.get_many(["app@example.com", "other@example.com", "nobody@example.com"])
+    assert summaries["app@example.com"][("", 0)] == 1.5 and summaries["other@example.com"][("", 0)] == 1.0
+    assert summaries["nobody@example.com"][("", 0)] == 0.0
+    assert len(commits) == 1
+    assert {r[0] for r in db.execute("SELECT DISTINCT user_email FROM applicant_experience_summary")} == {
+        "app@example.com", "other@example.com", "nobody@example.com", "untouched@example.com"}
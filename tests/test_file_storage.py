@@ -0,0 +1,66 @@
+import datetime
+
+import pytest
+
+from services import file_storage
+from services.file_storage import GCSBackend, LocalBackend, MemoryBackend, SignedUrlCache, new_key, resolve
+
+
+@pytest.fixture(params=["local", "memory"])
+def backend(request, tmp_path):
+    return LocalBackend(tmp_path) if request.param == "local" else MemoryBackend()
+
+
+def test_backends_share_the_api(backend):
+    key = new_key("mari@example.com", "Diplom.PDF", "documents")
+    assert key.startswith("documents/mariexample.com/") and key.endswith(".pdf")
+
+    sink = backend.open_sink(key, "application/pdf")
+    sink.write(b"abc" * 100_000)
+    sink.commit()
+    assert backend.key(sink.storage_identifier) == key
+    assert backend.exists(key) and backend.get(key) == b"abc" * 100_000
+    assert b"".join(backend.stream(key, chunk_size=4096)) == b"abc" * 100_000
+
+    backend.delete(key)
+    backend.delete(key) # Missing is fine
+    assert not backend.exists(key)
+
+
+def test_identifiers_belong_to_one_backend(tmp_path):
+    local, memory, gcs = LocalBackend(tmp_path), MemoryBackend(), GCSBackend(bucket=None)
+    assert local.key("local:documents/a/b.pdf") == "documents/a/b.pdf"
+    assert gcs.key("mari@example.com/legacy.pdf") == "mari@example.com/legacy.pdf" # Documents stored before the key scheme
+    assert gcs.key("local:documents/a/b.pdf") is None and local.key("memory:x") is None
+    assert memory.sign("k", datetime.timedelta(minutes=10)).endswith("expires=600")
+    assert local.sign("k", datetime.timedelta(minutes=10)) is None
+    with pytest.raises(ValueError):
+        local.exists("../outside.pdf")
+
+
+def test_legacy_uploads_resolve_to_their_own_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_storage, "LEGACY_ROOT", tmp_path)
+    legacy, gcs = file_storage.legacy_backend(), GCSBackend(bucket=None)
+    legacy.put("mari@example.com_abc_proof.pdf", b"old")
+
+    backend, key = resolve("uploads:mari@example.com_abc_proof.pdf", gcs, legacy)
+    assert backend is legacy and backend.get(key) == b"old" # Not mistaken for a GCS key
+    assert resolve("training/a/b.pdf", gcs, legacy) == (gcs, "training/a/b.pdf")
+    assert resolve("memory:x", gcs, legacy) == (None, None)
+
+
+def test_signed_urls_are_dropped_before_they_expire():
+    now = [0.0]
+    cache = SignedUrlCache(max_entries=2, margin=datetime.timedelta(minutes=2), clock=lambda: now[0])
+    cache.put("a", "https://a", datetime.timedelta(minutes=10))
+    assert cache.get("a") == "https://a"
+
+    now[0] = 8 * 60 - 1
+    assert cache.get("a") == "https://a"
+    now[0] = 8 * 60
+    assert cache.get("a") is None
+
+    for name in "bcd":
+        cache.put(name, f"https://{name}", datetime.timedelta(minutes=10))
+    assert cache.get("b") is None and cache.get("d") == "https://d"
+    assert cache.metrics() == {"hits": 3, "misses": 1, "expired": 1, "evictions": 1, "entries": 2}
@@ -0,0 +1,65 @@
+import pytest
+from fastlite import database
+
+from logic.models import ComplianceDashboardState
+from services.evaluation_store import EvaluationStore
+from services.data_versions import user_version
+from services.fragment_cache import FragmentCache
+
+QUAL_ID = "app@example.com:::Ehitusjuht, TASE 6:::Üldehitus"
+
+
+@pytest.fixture
+def db():
+    db = database(":memory:")
+    db.t.users.create(email=str, full_name=str, pk='email')
+    db.t.work_experience.create(id=int, user_email=str, role=str, pk='id')
+    db.t.documents.create(id=int, user_email=str, document_type=str, pk='id')
+    db.t.evaluations.create(qual_id=str, evaluator_email=str, evaluation_state_json=str, updated_at=str, pk='qual_id')
+    db.t.users.insert(email="app@example.com", full_name="App Licant")
+    db.t.work_experience.insert(id=1, user_email="app@example.com", role="Role 1")
+    return db
+
+
+def test_unchanged_content_is_a_hit(db):
+    cache = FragmentCache(db)
+    version = cache.version(QUAL_ID)
+    assert cache.get(QUAL_ID, version) is None
+    cache.put(QUAL_ID, version, "<div>panel</div>")
+    assert cache.get(QUAL_ID, cache.version(QUAL_ID)) == "<div>panel</div>"
+    assert cache.metrics()["hits"] == 1
+
+
+@pytest.mark.parametrize("write", [
+    lambda db: db.t.work_experience.update({"id": 1, "role": "Role 2"}),     # Same rowid, new content
+    lambda db: db.t.work_experience.insert(id=2, user_email="app@example.com", role="Role 2"),
+    lambda db: db.t.documents.insert(id=1, user_email="app@example.com", document_type="degree"),
+    lambda db: db.t.users.update({"email": "app@example.com", "full_name": "Renamed"}),
+    lambda db: EvaluationStore(db).save(QUAL_ID, "eval@example.com", ComplianceDashboardState(package_id="p", overall_met=False)),
+])
+def test_writes_change_the_version(db, write):
+    cache = FragmentCache(db)
+    cache.put(QUAL_ID, cache.version(QUAL_ID), "<div>panel</div>")
+    write(db)
+    assert cache.get(QUAL_ID, cache.version(QUAL_ID)) is None
+    assert cache.metrics()["stale"] == 1
+
+
+def test_other_applicants_writes_keep_the_entry(db):
+    cache = FragmentCache(db)
+    cache.put(QUAL_ID, cache.version(QUAL_ID), "<div>panel</div>")
+    db.t.work_experience.insert(id=2, user_email="other@example.com", role="Role")
+    assert cache.get(QUAL_ID, cache.version(QUAL_ID)) == "<div>panel</div>"
+
+
+def test_version_query_is_worked_out_once_per_connection(db):
+    cache = FragmentCache(db)
+    cache.version(QUAL_ID), user_version(db, "app@example.com")
+    statements = []
+    db.conn.exec_trace = lambda cursor, sql, bindings: statements.append(sql) or True
+    try:
+        cache.version(QUAL_ID)
+        user_version(db, "app@example.com")
+    finally:
+        db.conn.exec_trace = None
+    assert len(statements) == 2 and not any("PRAGMA" in s or "sqlite_master" in s for s in statements)
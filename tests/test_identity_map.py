@@ -0,0 +1,27 @@
+from main import db
+from utils.identity_map import IdentityMap, metrics
+
+
+def test_rows_are_loaded_once_until_forgotten(authenticated_client):
+    identities = IdentityMap(db)
+    user = identities.user("test_user@example.com")
+    assert identities.user("test_user@example.com") is user
+    assert identities.profile("nobody@example.com") is None and identities.profile("nobody@example.com") is None
+    assert identities.qualifications("nobody@example.com") == []
+    assert (identities.loads, identities.hits) == (3, 2)
+
+    identities.forget("users", "test_user@example.com")
+    reloaded = identities.user("test_user@example.com")
+    assert reloaded == user and reloaded is not user
+    assert identities.profile("nobody@example.com") is None
+    assert (identities.loads, identities.hits) == (4, 3)
+
+
+def test_guard_navbar_and_review_share_one_user_load(authenticated_client):
+    before = metrics()
+    response = authenticated_client.get("/app/ulevaatamine")
+    assert response.status_code == 200
+    after = metrics()
+    assert after["requests"] == before["requests"] + 1
+    # The navbar and the review data reuse the user row the guard loaded
+    assert after["queries_saved"] - before["queries_saved"] >= 2
@@ -0,0 +1,107 @@
+import asyncio
+import shutil
+from pathlib import Path
+
+import pytest
+from fastlite import database
+
+from logic.models import ApplicantData
+from services.evaluation_store import EvaluationStore
+from services.experience_summary import ExperienceSummary
+from services.prechecks import PRECHECK_EVALUATOR, recheck_prechecks
+from services.rule_registry import RuleRegistry
+from utils.db_pool import ConnectionPool
+
+RULES_PATH = Path(__file__).parent.parent / 'app' / 'config' / 'rules.toml'
+EJ6 = "Ehitusjuht, TASE 6"
+
+
+@pytest.fixture
+def rules(tmp_path):
+    path = tmp_path / "rules.toml"
+    shutil.copy(RULES_PATH, path)
+    return path
+
+
+def _amend(path, old, new):
+    path.write_text(path.read_text(encoding="utf-8").replace(old, new, 1), encoding="utf-8")
+
+
+def test_reload_swaps_in_changed_rules(rules):
+    registry = RuleRegistry(rules)
+    old_hash = registry.rule_set_hash
+    assert registry.reload() == {}
+
+    _amend(rules, 'id = "ej6_deg_matched_300"\n', 'id = "ej6_deg_matched_300"\n  total_experience_years = 1\n')
+    assert registry.reload() == {"ehitusjuht_tase_6": {"ej6_deg_matched_300"}}
+    assert registry.rule_set_hash != old_hash and registry.reloads == 1
+    state = registry.validate(ApplicantData(education="vastav_kõrgharidus_300_eap"), "ehitusjuht_tase_6")[0]
+    assert state.total_experience.is_relevant and state.rule_set_hash == registry.rule_set_hash
+
+
+def test_broken_rules_keep_the_current_engine(rules):
+    registry = RuleRegistry(rules)
+    engine = registry.engine
+    _amend(rules, 'education_requirement = "keskharidus"', 'education_requirement = "doktorikraad"')
+    assert asyncio.run(registry.reload_and_notify()) == {}
+    assert registry.engine is engine and registry.failed_reloads == 1
+
+
+class _Index:
+    def __init__(self):
+        self.refreshed = []
+
+    def refresh_application(self, qual_id):
+        self.refreshed.append(qual_id)
+
+
+def test_recheck_redoes_only_stale_automatic_prechecks(rules):
+    db = database(":memory:")
+    db.t.applied_qualifications.create(id=int, user_email=str, level=str, qualification_name=str, pk='id')
+    db.t.evaluations.create(qual_id=str, evaluator_email=str, evaluation_state_json=str, updated_at=str, pk='qual_id')
+    store = EvaluationStore(db)
+    registry = RuleRegistry(rules)
+    states = registry.validate(ApplicantData(education="any"), "ehitusjuht_tase_6")
+
+    for i, owner in enumerate([PRECHECK_EVALUATOR, PRECHECK_EVALUATOR, "evaluator@example.com", None]):
+        qual_id = f"u{i}@example.com:::{EJ6}:::Üldehitus"
+        db.t.applied_qualifications.insert(user_email=f"u{i}@example.com", level=EJ6, qualification_name="Üldehitus")
+        if owner:
+            store.save(qual_id, owner, states[0])
+
+    _amend(rules, 'id = "ej6_deg_matched_300"\n', 'id = "ej6_deg_matched_300"\n  total_experience_years = 1\n')
+    changed = registry.reload()
+    fresh = registry.validate(ApplicantData(education="any"), "ehitusjuht_tase_6")
+    store.save(f"u1@example.com:::{EJ6}:::Üldehitus", PRECHECK_EVALUATOR, fresh[0]) # Already under the new rules
+    index = _Index()
+    written = asyncio.run(recheck_prechecks(db, registry.engine, changed.keys(), store, index))
+
+    # u0: stale precheck; u3: never checked. u1 is current, u2 belongs to an evaluator
+    assert sorted(index.refreshed) == [f"u0@example.com:::{EJ6}:::Üldehitus", f"u3@example.com:::{EJ6}:::Üldehitus"]
+    assert written == 2
+    hashes = dict(db.execute("SELECT qual_id, rule_set_hash FROM evaluations"))
+    assert hashes[f"u0@example.com:::{EJ6}:::Üldehitus"] == registry.rule_set_hash
+    assert hashes[f"u2@example.com:::{EJ6}:::Üldehitus"] == states[0].rule_set_hash != registry.rule_set_hash
+
+
+def test_recheck_reads_on_a_pool_reader(rules, tmp_path):
+    path = str(tmp_path / "pool.db")
+    db = database(path)
+    db.enable_wal()
+    db.t.applied_qualifications.create(id=int, user_email=str, level=str, qualification_name=str, pk='id')
+    db.t.work_experience.create(id=int, user_email=str, start_date=str, end_date=str, associated_activity=str, pk='id')
+    db.t.evaluations.create(qual_id=str, evaluator_email=str, evaluation_state_json=str, updated_at=str, pk='qual_id')
+    store = EvaluationStore(db)
+    ExperienceSummary(db) # Cache table and triggers, as at startup
+    db.t.applied_qualifications.insert(user_email="u@example.com", level=EJ6, qualification_name="Üldehitus")
+    db.t.work_experience.insert(user_email="u@example.com", start_date="2015-01", end_date=None, associated_activity="Üldehitus")
+    registry, index = RuleRegistry(rules), _Index()
+    pool = ConnectionPool(db, path, readers=1)
+    try:
+        with pool.reader() as rdb:
+            assert rdb is not db
+            written = asyncio.run(recheck_prechecks(rdb, registry.engine, ["ehitusjuht_tase_6"], store, index))
+    finally:
+        pool.close()
+    assert written == 1 and index.refreshed == [f"u@example.com:::{EJ6}:::Üldehitus"]
+    assert db.execute("SELECT COUNT(*) FROM applicant_experience_summary").fetchone()[0] > 0
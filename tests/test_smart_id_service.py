@@ -0,0 +1,37 @@
+import asyncio
+
+import httpx
+
+from controllers.auth import AuthController
+from services import smart_id_service
+from services.smart_id_stub import create_app
+
+
+async def test_login_round_trip_reuses_the_shared_client():
+    client = await smart_id_service.open_client(transport=httpx.ASGITransport(create_app(delay=0.05)), base_url="http://stub/")
+    try:
+        before = smart_id_service.metrics()["operations"].get("status", {}).get("calls", 0)
+        session = await smart_id_service.initiate_authentication("38001085718", "aGFzaA==")
+        assert await smart_id_service.get_client() is client
+
+        statuses = await asyncio.gather(*(smart_id_service.check_session_status(session["sessionID"]) for _ in range(3)))
+        assert [s["state"] for s in statuses] == ["COMPLETE"] * 3
+        fields = AuthController._parse_subject_fields(statuses[0])
+        assert (fields["givenName"], fields["surname"]) == ("MARI", "MAASIKAS")
+        assert AuthController._extract_national_id(fields["serialNumber"]) == "38001085718"
+
+        metrics = smart_id_service.metrics()
+        assert metrics["open"] and metrics["operations"]["status"]["calls"] == before + 3
+    finally:
+        await smart_id_service.close_client()
+    assert client.is_closed and not smart_id_service.metrics()["open"]
+
+
+async def test_unknown_session_is_an_error_not_an_exception():
+    await smart_id_service.open_client(transport=httpx.ASGITransport(create_app()), base_url="http://stub/")
+    try:
+        errors = smart_id_service.metrics()["operations"].get("status", {}).get("errors", 0)
+        assert await smart_id_service.check_session_status("missing") is None
+        assert smart_id_service.metrics()["operations"]["status"]["errors"] == errors + 1
+    finally:
+        await smart_id_service.close_client()
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+import main
+from services.smart_id_watcher import SessionWatcher, WatcherBusy
+
+
+class FakePoll:
+    """Answers RUNNING ``running`` times per session, then ``final``; tracks concurrent calls."""
+
+    def __init__(self, running=1, final=None, delay=0.01):
+        self.running, self.delay = running, delay
+        self.final = final or {"state": "COMPLETE", "result": {"endResult": "OK"}}
+        self.calls, self.active, self.active_max = {}, 0, 0
+
+    async def __call__(self, session_id):
+        self.calls[session_id] = self.calls.get(session_id, 0) + 1
+        self.active += 1
+        self.active_max = max(self.active_max, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        return {"state": "RUNNING"} if self.calls[session_id] <= self.running else self.final
+
+
+async def test_duplicate_requests_share_one_watcher():
+    poll = FakePoll(running=2)
+    watcher = SessionWatcher(poll=poll)
+    results = await asyncio.gather(*(watcher.status("s1", wait=5) for _ in range(10)))
+    assert all(r["state"] == "COMPLETE" for r in results)
+    assert poll.calls == {"s1": 3}
+
+    assert (await watcher.status("s1", wait=0))["state"] == "COMPLETE" # Kept for late requests
+    assert poll.calls == {"s1": 3}
+    metrics = watcher.metrics()
+    assert (metrics["sessions"], metrics["joined"], metrics["completed"], metrics["pending"]) == (1, 10, 1, 0)
+
+
+async def test_upstream_polls_are_bounded_and_sessions_capped():
+    poll = FakePoll(running=1, delay=0.02)
+    watcher = SessionWatcher(poll=poll, max_polls=2, max_sessions=5)
+    tasks = [watcher.watch(f"s{i}") for i in range(5)]
+    assert watcher.full()
+    with pytest.raises(WatcherBusy):
+        watcher.watch("s5")
+
+    await asyncio.gather(*tasks)
+    assert poll.active_max == 2 and not watcher.full()
+    assert watcher.metrics()["rejected"] == 1
+
+
+async def test_status_answers_running_while_waiting_and_close_cancels():
+    watcher = SessionWatcher(poll=FakePoll(running=1000, delay=0.05))
+    assert await watcher.status("slow", wait=0.01) == {"state": "RUNNING"}
+    task = watcher.watch("slow")
+    await watcher.close()
+    assert task.cancelled() and watcher.metrics()["pending"] == 0
+
+
+def test_events_stream_done_then_status_finishes_the_flow(client):
+    poll = FakePoll(running=1, final={"state": "ERROR"})
+    watcher, main.auth_ctrl.watcher = main.auth_ctrl.watcher, SessionWatcher(poll=poll)
+    try:
+        events = client.get("/auth/smart-id/events/abc")
+        assert events.headers["content-type"].startswith("text/event-stream")
+        assert "event: done\ndata: ERROR" in events.text
+
+        status = client.get("/auth/smart-id/status/abc")
+        assert "Sisselogimine ebaõnnestus: ERROR" in status.text
+        assert poll.calls == {"abc": 2} # The status request reused the stream's result
+    finally:
+        main.auth_ctrl.watcher = watcher
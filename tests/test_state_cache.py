@@ -0,0 +1,56 @@
+from pathlib import Path
+
+import pytest
+from fastlite import database
+
+from logic.validator import ValidationEngine
+from logic.models import ApplicantData
+from services.evaluation_store import EvaluationStore
+from services.state_cache import EvaluationStateCache
+
+RULES_PATH = Path(__file__).parent.parent / 'app' / 'config' / 'rules.toml'
+QUAL_ID = "app@example.com:::Ehitusjuht, TASE 6:::Üldehitus"
+
+
+@pytest.fixture
+def cache():
+    db = database(":memory:")
+    db.t.evaluations.create(qual_id=str, evaluator_email=str, evaluation_state_json=str, updated_at=str, pk='qual_id')
+    engine = ValidationEngine(RULES_PATH)
+    return EvaluationStateCache(EvaluationStore(db), engine, max_entries=2)
+
+
+def _state(cache):
+    return cache.validation_engine.validate(ApplicantData(education="any"), "ehitusjuht_tase_6")[0]
+
+
+def test_hits_return_private_copies(cache):
+    assert cache.get(QUAL_ID) is None
+    cache.store.save(QUAL_ID, "eval@example.com", _state(cache))
+
+    first = cache.get(QUAL_ID)
+    first.accepted_work_experience_ids.append(7)
+    first.education.is_met = True
+    second = cache.get(QUAL_ID)
+    assert second.accepted_work_experience_ids == [] and not second.education.is_met
+    assert cache.metrics() == {"hits": 1, "misses": 2, "stale": 0, "evictions": 0, "size": 1, "hit_rate": 0.333}
+
+
+def test_write_through_and_saves_elsewhere(cache):
+    state = _state(cache)
+    state.final_decision = "Anda"
+    cache.put(QUAL_ID, state, cache.store.save(QUAL_ID, "eval@example.com", state))
+    assert cache.get(QUAL_ID).final_decision == "Anda"
+    assert cache.metrics()["hits"] == 1
+
+    # A save that bypasses the cache (another worker) bumps the revision: the entry is reloaded
+    state.final_decision = "Mitte anda"
+    cache.store.save(QUAL_ID, "other@example.com", state)
+    assert cache.get(QUAL_ID).final_decision == "Mitte anda"
+    assert cache.metrics()["stale"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    for i in range(3):
+        cache.put(f"{QUAL_ID}{i}", _state(cache), 1)
+    assert cache.metrics()["evictions"] == 1 and cache.metrics()["size"] == 2
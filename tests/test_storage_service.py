@@ -0,0 +1,35 @@
+import asyncio
+import threading
+
+import pytest
+
+from services.storage import StorageService, StorageTimeout
+
+
+async def test_timeout_does_not_hold_up_other_calls():
+    storage = StorageService(workers=2, timeouts={"sign": 0.05})
+    release = threading.Event()
+    try:
+        with pytest.raises(StorageTimeout):
+            await storage.run("sign", release.wait, 5)
+        assert await storage.run("exists", lambda: True) is True
+    finally:
+        release.set()
+        storage.shutdown()
+
+    metrics = storage.metrics()["operations"]
+    assert (metrics["sign"]["calls"], metrics["sign"]["timeouts"]) == (1, 1)
+    assert (metrics["exists"]["calls"], metrics["exists"]["errors"]) == (1, 0)
+
+
+async def test_errors_propagate_and_are_counted():
+    storage = StorageService(workers=1)
+    with pytest.raises(FileNotFoundError):
+        await storage.run("discard", open, "/nonexistent/file")
+    await asyncio.gather(*(storage.run("upload", sum, [i, 1]) for i in range(4)))
+    storage.shutdown()
+
+    metrics = storage.metrics()
+    assert metrics["in_flight"] == 0
+    assert metrics["operations"]["discard"]["errors"] == 1
+    assert metrics["operations"]["upload"]["calls"] == 4
@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+import time
+
+import pytest
+from fastlite import database
+from starlette.requests import Request
+
+from controllers.employment_proof import EmploymentProofController
+from services.file_storage import MemoryBackend
+from services.storage import StorageService
+from utils.streaming_upload import LocalFileSink, UploadError, UploadTooLarge, receive_upload
+
+BOUNDARY = "testboundary"
+
+
+def _body(*parts):
+    out = b""
+    for name, value, filename in parts:
+        disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+        out += f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n".encode()
+        out += b"Content-Type: application/pdf\r\n" if filename else b""
+        out += b"\r\n" + value + b"\r\n"
+    return out + f"--{BOUNDARY}--\r\n".encode()
+
+
+def _request(body, chunk_size=1000):
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    received = []
+
+    async def receive():
+        if chunks:
+            received.append(len(chunks[0]))
+            return {"type": "http.request", "body": chunks.pop(0), "more_body": bool(chunks)}
+        return {"type": "http.disconnect"}
+
+    scope = {"type": "http", "method": "POST", "path": "/upload", "query_string": b"",
+             "headers": [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]}
+    return Request(scope, receive), received
+
+
+def _sinks(tmp_path):
+    return lambda field, filename, content_type: LocalFileSink(tmp_path / filename, filename) if field == "doc" else None
+
+
+async def test_files_stream_to_the_sink_with_fields(tmp_path):
+    data = bytes(range(256)) * 40
+    request, received = _request(_body(("description", "Diplom".encode(), None), ("doc", data, "a.pdf"),
+                                       ("doc", b"", ""), ("other", b"ignored", "b.pdf")))
+    upload = await receive_upload(request, _sinks(tmp_path))
+
+    assert upload.get("description") == "Diplom"
+    [f] = upload.files
+    assert (f.filename, f.size, f.sha256, f.content_type) == ("a.pdf", len(data), hashlib.sha256(data).hexdigest(), "application/pdf")
+    assert (tmp_path / "a.pdf").read_bytes() == data
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.pdf"]
+    assert len(received) > 10 # Read in chunks, not in one piece
+
+
+async def test_oversized_file_aborts_early_and_leaves_nothing(tmp_path):
+    body = _body(("doc", b"ok", "first.pdf"), ("doc", b"x" * 50_000, "big.pdf"))
+    request, received = _request(body)
+    with pytest.raises(UploadTooLarge) as exc:
+        await receive_upload(request, _sinks(tmp_path), max_bytes=10_000)
+    assert exc.value.filename == "big.pdf"
+    assert sum(received) < len(body) // 2
+    assert list(tmp_path.iterdir()) == []
+
+
+async def test_non_multipart_body_is_rejected(tmp_path):
+    request, _ = _request(b"a=1")
+    request.scope["headers"] = [(b"content-type", b"application/x-www-form-urlencoded")]
+    with pytest.raises(UploadError):
+        await receive_upload(request, _sinks(tmp_path))
+
+
+class _SlowSink:
+    def __init__(self, events):
+        self.storage_identifier, self.events = "slow", events
+
+    def write(self, data):
+        self.events.append("write")
+        time.sleep(0.2)
+        self.events.append("written")
+
+    def commit(self):
+        pass
+
+    def discard(self):
+        self.events.append("discard")
+
+
+async def test_discard_waits_for_a_timed_out_write():
+    events = []
+    storage = StorageService(workers=2, timeouts={"upload": 0.05})
+    request, _ = _request(_body(("doc", b"x" * 100, "a.pdf")))
+    try:
+        with pytest.raises(UploadError):
+            await receive_upload(request, lambda *a: _SlowSink(events), run=storage.runner("upload"))
+        await asyncio.sleep(0.4) # The write finishes on the pool, then the discard runs
+    finally:
+        storage.shutdown()
+    assert events == ["write", "written", "discard"]
+
+
+async def test_replaced_proof_is_kept_when_the_old_file_cannot_be_deleted():
+    db = database(":memory:")
+    db.t.employment_proof.create(user_email=str, file_description=str, original_filename=str, storage_identifier=str,
+                                 upload_timestamp=str, file_size=int, sha256=str, pk="user_email")
+    db.t.employment_proof.insert({"user_email": "mari@example.com", "storage_identifier": "memory:old.pdf"})
+    backend = MemoryBackend()
+    def fail(key): raise OSError("bucket unavailable")
+    backend.delete = fail
+
+    request, _ = _request(_body(("employment_proof", b"new proof", "proof.pdf")))
+    request.scope["session"] = {"user_email": "mari@example.com"}
+    response = await EmploymentProofController(db, backend=backend).upload_employment_proof(request)
+
+    assert response.headers["HX-Redirect"] == "/app/tootamise_toend"
+    assert backend.get(backend.key(db.t.employment_proof["mari@example.com"]["storage_identifier"])) == b"new proof"
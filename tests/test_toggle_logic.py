@@ -8,6 +8,7 @@ from app.controllers.evaluator import EvaluatorController
 from app.controllers.evaluator_search_controller import EvaluatorSearchController
 from app.logic.models import ComplianceDashboardState, ComplianceCheck
 from app.logic.validator import ValidationEngine
+from app.services.evaluation_store import EvaluationStore
 
 # Mock classes
 class MockRequest:
@@ -37,6 +38,8 @@ def db():
     # Exp 2: 2 years (2021-01 to 2022-12)
     db.t.work_experience.insert(id=102, user_email="app@example.com", start_date="2021-01", end_date="2022-12", role="Role 2")
 
+    db.t.documents.create(id=int, user_email=str, document_type=str, original_filename=str, pk='id')
+
     # Evaluations
     db.t.evaluations.create(
         qual_id=str, evaluator_email=str, evaluation_state_json=str, updated_at=str, pk='qual_id'
@@ -93,8 +96,7 @@ async def test_toggle_experience_logic(db, validation_engine):
     # This should create the default state
     await bench_ctrl.re_evaluate_application(req, qual_id)
     
-    saved = db.t.evaluations.get(qual_id)
-    state = json.loads(saved['evaluation_state_json'])
+    state = EvaluationStore(db).load(qual_id)
     assert state['accepted_work_experience_ids'] == []
     # Check text
     # Check text
@@ -104,10 +106,11 @@ async def test_toggle_experience_logic(db, validation_engine):
 
     # 2. Toggle ID 102 (2 years) -> Accepted
     # This should satisfy the 2a requirement
-    await bench_ctrl.toggle_work_experience(req, qual_id, 102)
+    row, header = await bench_ctrl.toggle_work_experience(MockRequest(req.session, {"row_number": "2"}), qual_id, 102)
+    assert row.attrs["id"] == "workex-row-102" and "bg-green-50/50" in row.attrs["class"]
+    assert header.attrs["id"] == "section-header-tookogemus" and header.attrs["hx-swap-oob"] == "true"
     
-    saved = db.t.evaluations.get(qual_id)
-    state = json.loads(saved['evaluation_state_json'])
+    state = EvaluationStore(db).load(qual_id)
     assert 102 in state['accepted_work_experience_ids']
     assert 101 not in state['accepted_work_experience_ids']
     
@@ -119,8 +122,7 @@ async def test_toggle_experience_logic(db, validation_engine):
     # 3. Toggle ID 101 (1 year) -> Accepted (Total 3 years)
     await bench_ctrl.toggle_work_experience(req, qual_id, 101)
     
-    saved = db.t.evaluations.get(qual_id)
-    state = json.loads(saved['evaluation_state_json'])
+    state = EvaluationStore(db).load(qual_id)
     assert 101 in state['accepted_work_experience_ids']
     assert 102 in state['accepted_work_experience_ids']
     assert "Vastavaks tunnistatud: 3a" in state['matching_experience']['provided']
@@ -128,10 +130,39 @@ async def test_toggle_experience_logic(db, validation_engine):
     # 4. Toggle ID 102 OFF -> Total 1 year (Not met)
     await bench_ctrl.toggle_work_experience(req, qual_id, 102)
     
-    saved = db.t.evaluations.get(qual_id)
-    state = json.loads(saved['evaluation_state_json'])
+    state = EvaluationStore(db).load(qual_id)
     assert 102 not in state['accepted_work_experience_ids']
     assert 101 in state['accepted_work_experience_ids']
     assert "Vastavaks tunnistatud: 1a" in state['matching_experience']['provided']
     assert state['matching_experience']['is_met'] == False
 
+    # 5. The applicant extends accepted row 101 and deletes it again: toggles see the rows as they are now
+    db.t.work_experience.update({"id": 101, "end_date": "2020-06"})
+    await bench_ctrl.toggle_work_experience(req, qual_id, 102) # 0.5 + 2
+    state = EvaluationStore(db).load(qual_id)
+    assert "Vastavaks tunnistatud: 2a 6k" in state['matching_experience']['provided']
+
+    db.t.work_experience.delete(101)
+    await bench_ctrl.toggle_work_experience(req, qual_id, 102) # Off: no phantom years from 101
+    state = EvaluationStore(db).load(qual_id)
+    assert state['accepted_work_experience_ids'] == []
+    assert "Vastavaks tunnistatud: 0a" in state['matching_experience']['provided']
+    assert state['matching_experience']['is_met'] == False
+
+
+@pytest.mark.asyncio
+async def test_failed_save_is_reported_and_counted(db, validation_engine):
+    from app.utils.write_queue import WriteQueue
+    search_ctrl = EvaluatorSearchController(db, validation_engine)
+    main_ctrl = EvaluatorController(db, search_ctrl, None, validation_engine)
+    queue = WriteQueue(db)
+    bench_ctrl = EvaluatorWorkbenchController(db, validation_engine, main_ctrl, search_ctrl, queue)
+
+    def fail(*args):
+        raise RuntimeError("disk full")
+    bench_ctrl.evaluation_store.save = fail
+
+    qual_id = "app@example.com:::Ehitusjuht, TASE 6:::Ehitusjuhtimine"
+    result = await bench_ctrl.toggle_work_experience(MockRequest({"user_email": "eval@example.com"}), qual_id, 102)
+    assert "disk full" in str(result)
+    assert (queue.metrics()["committed"], queue.metrics()["failed"]) == (0, 1)
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import pytest
+from fastlite import database
+
+from logic.models import ApplicantData
+from logic.validator import ValidationEngine
+from services.applicant_data import load_cohort
+from services.evaluation_store import EvaluationStore
+from services.experience_summary import ExperienceSummary
+
+RULES_PATH = Path(__file__).parent.parent / 'app' / 'config' / 'rules.toml'
+EDUCATIONS = ["keskharidus", "vastav_kõrgharidus_180_eap", "vastav_kõrgharidus_300_eap", "any"]
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return ValidationEngine(RULES_PATH)
+
+
+def _cohort(n):
+    return [ApplicantData(education=EDUCATIONS[i % 4], work_experience_years=float(i % 9),
+                          matching_experience_years=float(i % 5), base_training_hours=40 * (i % 2))
+            for i in range(n)]
+
+
+def test_validate_many_matches_validate(engine):
+    cohort = _cohort(40)
+    expected = [engine.validate(a, "ehitusjuht_tase_6") for a in cohort]
+    assert engine.validate_many(cohort, "ehitusjuht_tase_6") == expected
+    # Process pool fan-out keeps input order
+    assert engine.validate_many(cohort, "ehitusjuht_tase_6", workers=2, chunk_size=7) == expected
+    assert engine.validate_many(cohort, "ehitusjuht_tase_6", best_only=True) == [engine.best_state(s) for s in expected]
+
+    with pytest.raises(ValueError):
+        engine.validate_many(cohort, "no_such_qualification")
+
+
+def test_cohort_input_and_bulk_save(engine):
+    db = database(":memory:")
+    db.t.education.create(id=int, user_email=str, education_category=str, pk='id')
+    db.t.work_experience.create(id=int, user_email=str, start_date=str, end_date=str, associated_activity=str, pk='id')
+    db.t.evaluations.create(qual_id=str, evaluator_email=str, evaluation_state_json=str, updated_at=str, pk='qual_id')
+    db.t.education.insert_all([dict(user_email="a@example.com", education_category="keskharidus"),
+                               dict(user_email="a@example.com", education_category="vastav_kõrgharidus_300_eap")])
+    db.t.work_experience.insert_all([dict(user_email="a@example.com", start_date="2015-01", end_date="2020-12",
+                                          associated_activity="Teedeehitus")])
+
+    cohort = load_cohort(db, ExperienceSummary(db), [("a@example.com", "Teedeehitus"), ("a@example.com", "Sillaehitus"),
+                                                     ("b@example.com", None)])
+    assert [(a.education, a.work_experience_years, a.matching_experience_years) for a in cohort] == [
+        ("vastav_kõrgharidus_300_eap", 6.0, 6.0), ("vastav_kõrgharidus_300_eap", 6.0, 0.0), ("any", 0.0, 0.0)]
+
+    states = engine.validate_many(cohort, "ehitusjuht_tase_6", best_only=True)
+    store = EvaluationStore(db)
+    qual_ids = [f"a@example.com:::Ehitusjuht, TASE 6:::{act}" for act in ("Teedeehitus", "Sillaehitus", "Üldehitus")]
+    assert store.save_many(zip(qual_ids, states), "system@auto.precheck") == 3
+    assert store.load(qual_ids[0])["package_id"] == states[0].package_id
+    assert db.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0] == 3
@@ -2,6 +2,8 @@
 import pytest
 from starlette.testclient import TestClient
 
+from main import write_queue
+
 # The 'authenticated_client' fixture is automatically provided by tests/conftest.py
 
 def test_submit_new_work_experience_v2(authenticated_client: TestClient):
@@ -41,4 +43,11 @@ def test_submit_new_work_experience_v2(authenticated_client: TestClient):
     assert response.status_code == 200
 
     # And we can assert that the OLD response fragment is NOT present
-    assert 'id="add-button-container"' not in response.text
\ No newline at end of file
+    assert 'id="add-button-container"' not in response.text
+
+def test_applicant_writes_go_through_the_write_queue(authenticated_client: TestClient):
+    committed = write_queue.metrics()["committed"]
+    form_data = {"associated_activity": "Üldehituslik ehitamine", "role": "Queued Role", "start_date": "2022-01"}
+    assert authenticated_client.post("/app/workex/save", data=form_data).status_code == 200
+    assert authenticated_client.post("/app/kutsed/submit", data={"qual_1_0": "on"}).status_code == 200
+    assert write_queue.metrics()["committed"] == committed + 2
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+from fastlite import database
+
+from utils.write_queue import WriteQueue, run_write
+
+
+@pytest.fixture
+def db():
+    db = database(":memory:")
+    db.t.documents.create(id=int, user_email=str, description=str, pk="id")
+    return db
+
+
+def test_concurrent_writes_share_one_batch(db):
+    queue = WriteQueue(db)
+
+    async def burst():
+        return await asyncio.gather(*(queue.submit(db.t.documents.insert, {"user_email": f"u{i}@example.com"})
+                                      for i in range(10)))
+
+    rows = asyncio.run(burst())
+    assert [r["user_email"] for r in rows] == [f"u{i}@example.com" for i in range(10)]
+    assert db.t.documents.count == 10
+
+    metrics = queue.metrics()
+    assert metrics["committed"] == 10 and metrics["failed"] == 0
+    assert metrics["batches"] == 1 and metrics["largest_batch"] == 10
+    assert metrics["depth"] == 0
+
+
+def test_failed_write_is_rolled_back_alone(db):
+    queue = WriteQueue(db)
+
+    def insert_then_fail():
+        db.t.documents.insert({"user_email": "broken@example.com"})
+        raise ValueError("boom")
+
+    async def burst():
+        ok = queue.submit(db.t.documents.insert, {"user_email": "ok@example.com"})
+        bad = queue.submit(insert_then_fail)
+        return await asyncio.gather(ok, bad, return_exceptions=True)
+
+    ok, bad = asyncio.run(burst())
+    assert ok["user_email"] == "ok@example.com"
+    assert isinstance(bad, ValueError)
+    assert [r["user_email"] for r in db.t.documents()] == ["ok@example.com"]
+    assert queue.metrics()["failed"] == 1
+
+
+def test_run_write_without_queue_runs_inline(db):
+    row = asyncio.run(run_write(None, db.t.documents.insert, {"user_email": "inline@example.com"}))
+    assert row["user_email"] == "inline@example.com"